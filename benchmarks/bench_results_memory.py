@@ -0,0 +1,79 @@
+"""
+Memory benchmark for pipeline results.
+
+Runs a two-step pipeline producing `ndocs * ntrials` outputs in its second step
+(1M by default) and reports the memory held by `pipeline.results`.
+
+    python -m benchmarks.bench_results_memory --ndocs 1000 --ntrials 1000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.pipeline import PipelineBase
+from pypes.base.step import PipelineStepBase
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+
+class DocOutput(DocInput):
+    pass
+
+@PipelineStepBase.auto_step("doc")
+class DocStep:
+    def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+        return DocOutput(trial=input.trial, name=input.name)
+
+
+class ScoreInput(StepInput):
+    pass
+
+class ScoreOutput(ScoreInput):
+    score: int
+
+@PipelineStepBase.auto_step("score", deps_spec="doc")
+class ScoreStep:
+    def input_to_output(self, input: ScoreInput, doc: DocOutput, **kwargs) -> ScoreOutput:
+        return ScoreOutput(trial=input.trial, score=len(doc.name) + input.trial)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ndocs", type=int, default=1000)
+    parser.add_argument("--ntrials", type=int, default=1000)
+    args = parser.parse_args()
+
+    config = OmegaConf.create(dict(
+        doc=dict(name=[f"doc-{i:06d}" for i in range(args.ndocs)]),
+        score=dict(ntrials=args.ntrials),
+    ))
+    pipeline = PipelineBase(name="bench_results_memory")
+    pipeline.add_steps([DocStep(), ScoreStep()])
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    pipeline.run(config)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    noutputs = sum(len(step_results) for step_results in pipeline.results.values())
+    print(f"outputs:         {noutputs:,}")
+    print(f"run time:        {elapsed:.1f} s")
+    print(f"results memory:  {current / 2**20:,.1f} MiB ({current / noutputs:.0f} B/output)")
+    print(f"peak memory:     {peak / 2**20:,.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -28,3 +28,15 @@ class ArtifactResolverBase:
 
     def resolve_request(self, request: ArtifactRequestBase) -> ArtifactResponseBase:
         raise NotImplementedError()  # pragma: no cover
+
+    def is_cached(self, request: ArtifactRequestBase) -> bool:
+        """
+        Whether `request` would be answered from the cache (False when the resolver can't tell).
+        """
+        return False
+
+    def probe_request(self, request: ArtifactRequestBase) -> ArtifactResponseBase|None:
+        """
+        The response if it is already cached, else None (also when the resolver can't tell).
+        """
+        return None
@@ -4,7 +4,19 @@ from .base import ArtifactSelfRequestBase
 
 class ArtifactSerialSelfResolver(ArtifactResolverBase):
     def resolve_request(self, request: ArtifactRequestBase) -> ArtifactResponseBase:
+        event = "on_cache_hit" if self.is_cached(request) else "on_cache_miss"
+        cache_key = request.cache_key
+        self.pipeline.hooks.emit(event, step_name=self.step.step_name, cache=cache_key.heading, key=cache_key.hash)
+        return request.resolve(self)
+
+    def is_cached(self, request: ArtifactRequestBase) -> bool:
         assert isinstance(request, ArtifactSelfRequestBase)
 
         request.init_cache(self)
+        cache_key = request.cache_key
+        return cache_key.hash in self.step_cache.cache_by_heading[cache_key.heading]
+
+    def probe_request(self, request: ArtifactRequestBase) -> ArtifactResponseBase|None:
+        if not self.is_cached(request):
+            return None
         return request.resolve(self)
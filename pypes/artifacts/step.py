@@ -1,14 +1,18 @@
+import time
 from typing import Generator, Callable, Any, TypeVar
 
 from ..core.mytyping import (
+    FullDepsDict,
     StepInputBase,
     StepOutputBase,
     DepsType,
 )
 from ..core.interface import PipelineInterface
+from ..core.planning import StepPlan
 from ..base.step import PipelineStepBase
 from .base import ArtifactRequestBase, ArtifactResponseBase, ArtifactResolverBase
 from ..utils.autosubclass import auto_subclass
+from ..utils.profiling import profile_span
 from ..utils.read_type_hints import get_first_param_and_return_type, unpack_generator_type_hint
 
 
@@ -25,6 +29,12 @@ class PipelineStepWithArtifacts(PipelineStepBase):
         proto_input_type: type[StepInputBase]|None = None,
         input_type: type[StepInputBase] = StepInputBase,
         output_type: type[StepOutputBase] = StepOutputBase,
+        reuse_inputs: bool = False,
+        cache_outputs: bool = False,
+        code_version: str|None = None,
+        transient: bool = False,
+        batch_size: int = 64,
+        max_batch_latency: float|None = None,
     ):
         if artifact_resolver is None:
             raise ValueError("A non-None artifact_resolver must be passed explicitly")
@@ -36,9 +46,16 @@ class PipelineStepWithArtifacts(PipelineStepBase):
             proto_input_type=proto_input_type,
             input_type=input_type,
             output_type=output_type,
+            reuse_inputs=reuse_inputs,
+            cache_outputs=cache_outputs,
+            code_version=code_version,
+            transient=transient,
+            batch_size=batch_size,
+            max_batch_latency=max_batch_latency,
         )
         self._artifact_resolver = artifact_resolver
         self._artifact_resolver.register_step(self)
+        self._all_requests_cached = False
 
     def gen_input_to_output(self, input: StepInputBase, **deps: DepsType) \
             -> Generator[ArtifactRequestBase, ArtifactResponseBase, StepOutputBase]:
@@ -47,14 +64,57 @@ class PipelineStepWithArtifacts(PipelineStepBase):
     def input_to_output(self, input: StepInputBase, **deps: DepsType) -> StepOutputBase:
         gen = self.gen_input_to_output(input=input, **deps)
         response: ArtifactResponseBase|None = None
+        num_requests = num_cached = 0
         while True:
             try:
                 request = gen.send(response)
             except StopIteration as error:
+                self._all_requests_cached = num_requests > 0 and num_cached == num_requests
                 ret = error.value
                 return ret
 
-            response = self._artifact_resolver.resolve_request(request)
+            num_requests += 1
+            num_cached += self._artifact_resolver.is_cached(request)
+            start = time.perf_counter()
+            with profile_span("resolve_request", request=type(request).__name__):
+                response = self._artifact_resolver.resolve_request(request)
+            self.pipeline.hooks.emit(
+                "on_artifact_request",
+                step_name=self.step_name,
+                request=request,
+                response=response,
+                seconds=time.perf_counter() - start,
+            )
+
+    def _last_output_was_cached(self) -> bool:
+        return self._all_requests_cached
+
+    def probe_output(
+        self,
+        input: StepInputBase,
+        full_deps_dict: FullDepsDict,
+        deps_dict: dict[str, DepsType],
+        step_plan: StepPlan,
+    ) -> StepOutputBase|None:
+        output = super().probe_output(input, full_deps_dict, deps_dict, step_plan)
+        if output is not None:
+            return output
+
+        # replay the generator for as long as its requests are answered from the cache
+        gen = self.gen_input_to_output(input=input, **deps_dict)
+        response: ArtifactResponseBase|None = None
+        while True:
+            try:
+                request = gen.send(response)
+            except StopIteration as error:
+                return error.value
+
+            response = self._artifact_resolver.probe_request(request)
+            if response is None:
+                step_plan.num_missed_requests += 1
+                gen.close()
+                return None
+            step_plan.num_cached_requests += 1
 
     def set_pipeline(self, pipeline: PipelineInterface) -> None:
         super().set_pipeline(pipeline)
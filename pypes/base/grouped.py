@@ -0,0 +1,77 @@
+from ..core.mytyping import (
+    DepsType,
+    FullDepsDict,
+    GroupedFullDepsDict,
+    StepInputBase,
+    StepOutputBase,
+)
+from ..resolvers.deps import DepsResolver
+from ..resolvers.config import ConfigResolver
+from ..utils.dag import normalize_deps_spec
+from .step import PipelineStepBase
+
+
+class PipelineGroupedStep(PipelineStepBase):
+    """
+    A step whose `input_to_output` receives a whole group of upstream outputs in one call.
+
+    Rows of `deps_spec` are grouped by their `group_by` ancestor (all rows form one group when
+    `group_by` is None).  The group key and its own ancestors are passed as single outputs,
+    and every other upstream label is passed as a list with one entry per row in the group.
+    """
+    def __init__(
+        self,
+        step_name: str,
+        substep_name: str = "base",
+        deps_spec: list[str]|str|None = None,
+        group_by: str|None = None,
+        proto_input_type: type[StepInputBase]|None = None,
+        input_type: type[StepInputBase] = StepInputBase,
+        output_type: type[StepOutputBase] = StepOutputBase,
+        deps_resolver: DepsResolver|None = None,
+        config_resolver: ConfigResolver|None = None,
+        reuse_inputs: bool = False,
+        cache_outputs: bool = False,
+        code_version: str|None = None,
+        transient: bool = False,
+        batch_size: int = 64,
+        max_batch_latency: float|None = None,
+    ):
+        if not deps_spec:
+            raise ValueError("A grouped step needs a non-empty deps_spec")
+
+        super().__init__(
+            step_name=step_name,
+            substep_name=substep_name,
+            deps_spec=deps_spec,
+            proto_input_type=proto_input_type,
+            input_type=input_type,
+            output_type=output_type,
+            deps_resolver=deps_resolver,
+            config_resolver=config_resolver,
+            reuse_inputs=reuse_inputs,
+            cache_outputs=cache_outputs,
+            code_version=code_version,
+            transient=transient,
+            batch_size=batch_size,
+            max_batch_latency=max_batch_latency,
+        )
+        self.group_by = group_by
+
+    def resolve_deps(self) -> list[GroupedFullDepsDict]:
+        return self._deps_resolver.resolve_grouped_deps(self.deps_spec, self.group_by, self.pipeline.results)
+
+    def unpack_deps(self, full_deps_dict: FullDepsDict) -> dict[str, DepsType|list[DepsType]]:
+        if not isinstance(full_deps_dict, GroupedFullDepsDict):
+            raise TypeError(f"Expected a GroupedFullDepsDict, not {type(full_deps_dict).__name__}")
+
+        deps: dict[str, DepsType|list[DepsType]] = dict(full_deps_dict.to_simple_dict())
+        members = full_deps_dict.members
+        if members:
+            member_labels = members[0].labels
+        else:
+            member_labels = normalize_deps_spec(self.deps_spec)
+        for label in member_labels:
+            if label not in deps:
+                deps[label] = [member[label].output for member in members]
+        return deps
@@ -1,4 +1,6 @@
 from pathlib import Path
+import tempfile
+import time
 from typing import Iterable
 
 import dill
@@ -9,17 +11,49 @@ from ..core.mytyping import (
     ResultsSpec,
     ConfigType,
     SubConfigType,
+    FullDepsDict,
+    GroupedFullDepsDict,
     FullStepOutput,
+    DepsType,
+    StepInputBase,
+    StepOutputBase,
 )
+from ..core.planning import StepPlan, PipelinePlan
+from ..core.hooks import HookRegistry
+from ..results.checkpoint import CheckpointStore, ResumedOutput, StepCheckpoint
+from ..results.columnar import write_columnar_results, read_columnar_results
+from ..results.hashes import input_field_names
+from ..results.spill import SpillingResults, SpillStore
+from ..results.stream import ResultsSink
+from ..utils.dag import normalize_deps_spec, ancestor_closure, release_schedule, sink_steps
+from ..utils.latency import LatencyStats
+from ..utils.profiling import Profiler, get_profiler, profile_span
+from ..utils.sharding import shard_of
 
 
 class PipelineBase(PipelineInterface):
-    def __init__(self, name: str = "default_pipeline"):
+    def __init__(self, name: str = "default_pipeline", results: ResultsSpec|None = None):
+        """
+        `results` is the (empty) results dict to fill, e.g. a `SpillingResults` to keep payloads on disk.
+        """
         super().__init__()
         self.name = name
         self._steps: dict[str, PipelineStepInterface] = {}
-        self._results: ResultsSpec = {}
+        self._results: ResultsSpec = results if results is not None else {}
         self._cache_base_dir: Path|None = None
+        self._checkpoint_dir: Path|None = None
+        self._checkpoints: CheckpointStore|None = None
+        self._resume = False
+        self._sink: ResultsSink|None = None
+        self._spill_dir: Path|None = None
+        self._spill_run_dir: tempfile.TemporaryDirectory|None = None
+        self._spill_stores: dict[str, SpillStore] = {}
+        self._stats_path: Path|None = None
+        self._latency_stats = LatencyStats()
+        self._hooks = HookRegistry()
+        self._shard_index = 0
+        self._num_shards = 1
+        self._shard_step: str|None = None
 
     @property
     def results(self) -> ResultsSpec:
@@ -29,24 +63,326 @@ class PipelineBase(PipelineInterface):
     def cache_base_dir(self) -> Path|None:
         return self._cache_base_dir
 
+    @property
+    def hooks(self) -> HookRegistry:
+        return self._hooks
+
+    @property
+    def latency_stats(self) -> LatencyStats:
+        return self._latency_stats
+
+    @property
+    def shard_step(self) -> str|None:
+        return self._shard_step
+
     def process_config(self, full_config: ConfigType) -> None:
         sub_config: SubConfigType = full_config.get("pipeline", SubConfigType({}))
         cache_base_dir = sub_config.get("cache_base_dir", f"./data/pipelines/{self.name}/results")
         self._cache_base_dir = Path(cache_base_dir)
+        checkpoint_dir = sub_config.get("checkpoint_dir", f"./data/pipelines/{self.name}/checkpoint")
+        self._checkpoint_dir = Path(checkpoint_dir)
+        spill_dir = sub_config.get("spill_dir", f"./data/pipelines/{self.name}/spill")
+        self._spill_dir = Path(spill_dir)
+        stats_path = sub_config.get("stats_path", None)
+        if stats_path is not None:
+            self._stats_path = Path(stats_path)
+            self._latency_stats = LatencyStats.load(self._stats_path)
+
+    def run(
+        self,
+        config: ConfigType,
+        *,
+        targets: list[str]|None = None,
+        reuse_results: Path|ResultsSpec|None = None,
+        shard_index: int = 0,
+        num_shards: int = 1,
+        shard_step: str|None = None,
+        checkpoint: bool = False,
+        resume: bool = False,
+        keep_results: str|list[str] = "all",
+        profiler: Profiler|None = None,
+        sink: ResultsSink|None = None,
+    ) -> None:
+        """
+        Execute the steps in order.
+
+        With `targets`, only those steps and their ancestors are executed.
+        Ancestors present in `reuse_results` (a results dict or a `save_results` file)
+        are taken from there instead of being recomputed, provided all of their own ancestors are too.
+        Their outputs are left untouched: they are never spilled.
+
+        With `num_shards > 1`, only the inputs of `shard_step` (by default the first step without deps)
+        whose stable hash falls in shard `shard_index` are processed, so downstream steps only see
+        that shard's lineage.  Combine the saved results of all shards with `merge_shard_results`.
+
+        With `checkpoint`, every output is appended to a per-step segment under the config's
+        `pipeline.checkpoint_dir` (in a `shard-<i>-of-<n>` subdirectory for sharded runs) as soon as it is produced.  `resume` (which implies `checkpoint`)
+        reloads those segments from an interrupted run: the inputs already processed are skipped,
+        unless the step's code or sub-config, the input itself or its upstream outputs have changed since.
+
+        `keep_results` selects the steps left in `results` after the run: "all" (the default),
+        "final" (the targets, or else the steps nothing depends on), or a list of step names.
+        Transient steps are never kept.  Every other step is released as soon as its last consumer
+        has run: it is removed from `results` and its payloads are spilled to the config's
+        `pipeline.spill_dir`, where they are still reachable through the lineage of kept outputs.
+
+        With a `profiler`, the run records timed spans for each step, deps resolution, input expansion,
+        `input_to_output` call, artifact request and cache access (see `Profiler.summary`).
+
+        With a `sink`, every output is also appended to the sink's per-step log as soon as it is produced,
+        so that the results can be followed while the run goes on (see `ResultsTail`) and survive a crash.
+        """
+        if profiler is not None:
+            with profiler.activate():
+                return self.run(
+                    config,
+                    targets=targets,
+                    reuse_results=reuse_results,
+                    shard_index=shard_index,
+                    num_shards=num_shards,
+                    shard_step=shard_step,
+                    checkpoint=checkpoint,
+                    resume=resume,
+                    keep_results=keep_results,
+                    sink=sink,
+                )
 
-    def run(self, config: ConfigType) -> None:
+        self._set_shard(shard_index, num_shards, shard_step)
         self.process_config(config)
-        for step_name in self._steps.keys():
-            self._execute_step(step_name, full_config=config)
+        self._resume = resume
+        self._checkpoints = None
+        if checkpoint or resume:
+            checkpoint_dir = self._checkpoint_dir
+            if self._num_shards > 1:
+                # shards may run concurrently, and each only holds its own outputs
+                checkpoint_dir = checkpoint_dir / f"shard-{self._shard_index}-of-{self._num_shards}"
+            self._checkpoints = CheckpointStore(checkpoint_dir)
+        self._sink = sink
+
+        deps_by_step = self._deps_by_step()
+        step_names = self._select_steps(deps_by_step, targets)
+
+        if isinstance(reuse_results, Path):
+            reuse_results = self.load_results(reuse_results)
+        reused_steps: set[str] = set()
+        if reuse_results is not None:
+            for step_name in step_names:
+                if targets is not None and step_name in targets:
+                    continue
+                if step_name in reuse_results and all(dep in reused_steps for dep in deps_by_step[step_name]):
+                    reused_steps.add(step_name)
+
+        keep = self._steps_to_keep(keep_results, deps_by_step, step_names, targets)
+        schedule = release_schedule(deps_by_step, step_names, keep)
+
+        for step in self._steps.values():
+            step.reset_run_state()
+        self._spill_run_dir = None
+        self._spill_stores = {}
+        run_start = time.perf_counter()
+        self._hooks.emit("on_run_start", step_names=step_names, config=config)
+        try:
+            for step_name in step_names:
+                if step_name in reused_steps:
+                    # the caller still holds the reused outputs, so they are never spilled
+                    if isinstance(self._results, SpillingResults):
+                        self._results.set_unspilled(step_name, reuse_results[step_name])
+                    else:
+                        self._results[step_name] = reuse_results[step_name]
+                    if sink is not None:
+                        sink.begin_step(step_name)
+                        sink.extend(self._results[step_name])
+                        sink.end_step(step_name)
+                else:
+                    with profile_span("execute_step", step_name):
+                        self._execute_step(step_name, full_config=config)
+                for released in schedule[step_name]:
+                    self._release_step(released, spill=released not in reused_steps)
+        finally:
+            for store in self._spill_stores.values():
+                store.close()
+            if sink is not None:
+                sink.close()
+        if self._stats_path is not None:
+            self._latency_stats.save(self._stats_path)
+        self._hooks.emit("on_run_end", step_names=step_names, seconds=time.perf_counter() - run_start)
+
+    def plan(
+        self,
+        config: ConfigType,
+        *,
+        targets: list[str]|None = None,
+        execute_steps: Iterable[str] = (),
+        cost_per_output: dict[str, float]|None = None,
+    ) -> PipelinePlan:
+        """
+        Report what `run` would do without computing any step output.
+
+        Deps rows and inputs are counted for every step whose fan-out does not depend on
+        unknown upstream outputs.  Outputs are looked up in the step output caches and,
+        for artifact steps, by replaying their requests against the artifact caches.
+        Steps in `execute_steps` (typically cheap ones feeding artifact steps) are really run
+        on their cache misses so that downstream caches can be probed.
+        The remaining inputs are expected misses, priced with the mean latency recorded
+        in `latency_stats` (persisted to the config's `pipeline.stats_path` if given)
+        and with `cost_per_output`.
+        """
+        self.process_config(config)
+        deps_by_step = self._deps_by_step()
+        step_names = self._select_steps(deps_by_step, targets)
+        execute_steps = set(execute_steps)
+        cost_per_output = cost_per_output or {}
+
+        pipeline_plan = PipelinePlan()
+        unknown_steps: set[str] = set()
+        saved_results = self._results
+        self._results = {}
+        for step in self._steps.values():
+            step.reset_run_state()
+        try:
+            for step_name in step_names:
+                step_plan = StepPlan(
+                    step_name=step_name,
+                    mean_seconds=self._latency_stats.mean_seconds(step_name),
+                    cost_per_output=cost_per_output.get(step_name),
+                )
+                pipeline_plan.steps[step_name] = step_plan
+                if any(dep in unknown_steps for dep in deps_by_step[step_name]) \
+                        or not self._plan_step(step_name, config, step_plan, step_name in execute_steps):
+                    unknown_steps.add(step_name)
+        finally:
+            self._results = saved_results
+            for step in self._steps.values():
+                step.reset_run_state()
+        return pipeline_plan
+
+    def _plan_step(self, step_name: str, full_config: ConfigType, step_plan: StepPlan, execute: bool) -> bool:
+        """
+        Fill `step_plan`, standing in None for unknown outputs.  False if the fan-out is unknown.
+        """
+        step = self._steps[step_name]
+        self._results[step_name] = []
+        full_deps_dicts = step.resolve_deps()
+        inputs_need_deps = step.count_inputs(full_config, full_deps_dicts) is None
+
+        planned: list[FullStepOutput] = []
+        num_rows = 0
+        for full_deps_dict in full_deps_dicts:
+            num_rows += 1
+            deps_known = _upstream_known(full_deps_dict)
+            if not deps_known and inputs_need_deps:
+                return False
+            deps_dict = step.unpack_deps(full_deps_dict)
+            for input in step.full_config_to_inputs(full_config, **deps_dict):
+                output = None
+                if not deps_known:
+                    step_plan.num_unprobed += 1
+                else:
+                    output = step.probe_output(input, full_deps_dict, deps_dict, step_plan)
+                    if output is None and execute:
+                        output = step.compute_output(input, full_deps_dict, deps_dict)
+                if output is not None:
+                    step_plan.num_known += 1
+                planned.append(FullStepOutput(deps=full_deps_dict, output=output, step_name=step_name))
+
+        step_plan.num_rows = num_rows
+        step_plan.num_inputs = len(planned)
+        self._results[step_name] = planned
+        return True
+
+    def _select_steps(self, deps_by_step: dict[str, list[str]], targets: list[str]|None) -> list[str]:
+        if targets is None:
+            return list(self._steps.keys())
+        closure = ancestor_closure(deps_by_step, targets)
+        return [step_name for step_name in self._steps.keys() if step_name in closure]
+
+    def _steps_to_keep(
+        self,
+        keep_results: str|list[str],
+        deps_by_step: dict[str, list[str]],
+        step_names: list[str],
+        targets: list[str]|None,
+    ) -> set[str]:
+        if keep_results == "all":
+            keep = set(step_names)
+        elif keep_results == "final":
+            keep = set(targets) if targets is not None else set(sink_steps(deps_by_step, step_names))
+        elif isinstance(keep_results, str):
+            raise ValueError(f"Invalid keep_results {keep_results!r}; expected 'all', 'final' or a list of steps")
+        else:
+            unknown = set(keep_results) - set(self._steps)
+            if unknown:
+                raise ValueError(f"Unknown steps in keep_results: {sorted(unknown)}")
+            keep = set(keep_results)
+        return {step_name for step_name in keep if not self._steps[step_name].transient}
+
+    def _release_step(self, step_name: str, spill: bool = True) -> None:
+        full_step_outputs = self._results.pop(step_name)
+        if not spill:
+            return
+        if self._spill_run_dir is None:
+            self._spill_dir.mkdir(exist_ok=True, parents=True)
+            # a fresh directory per run, so refs held by earlier results stay valid;
+            # the stores own it, and it is removed once the last of them (and of their refs) is gone
+            self._spill_run_dir = tempfile.TemporaryDirectory(dir=self._spill_dir, ignore_cleanup_errors=True)
+        store = SpillStore(Path(self._spill_run_dir.name) / f"{step_name}.seg", owner=self._spill_run_dir)
+        self._spill_stores[step_name] = store
+        store.spill(full_step_outputs)
+
+    def _deps_by_step(self) -> dict[str, list[str]]:
+        return {
+            step_name: normalize_deps_spec(step.deps_spec)
+            for step_name, step in self._steps.items()
+        }
+
+    def _set_shard(self, shard_index: int, num_shards: int, shard_step: str|None) -> None:
+        if num_shards < 1 or not 0 <= shard_index < num_shards:
+            raise ValueError(f"Invalid shard {shard_index} of {num_shards}")
+        if shard_step is None:
+            source_steps = [
+                step_name for step_name, step in self._steps.items()
+                if not normalize_deps_spec(step.deps_spec)
+            ]
+            shard_step = source_steps[0] if source_steps else None
+        elif shard_step not in self._steps:
+            raise ValueError(f"Unknown shard step {shard_step}")
+        elif normalize_deps_spec(self._steps[shard_step].deps_spec):
+            raise ValueError(f"Shard step {shard_step} must not have any deps")
+        self._shard_index = shard_index
+        self._num_shards = num_shards
+        self._shard_step = shard_step
 
     def save_results(self, dill_path: Path|None = None, mkdir: bool = True) -> None:
         if dill_path is None:
             dill_path = Path(f"./data/pipelines/{self.name}/dill/all_results.dill")  # pragma: no cover
+            if self._num_shards > 1:  # pragma: no cover
+                dill_path = dill_path.with_suffix(f".shard-{self._shard_index}-of-{self._num_shards}.dill")
         if mkdir:
             dill_path.parent.mkdir(exist_ok=True, parents=True)
         with open(dill_path, 'wb') as fdill:
             dill.dump(self._results, fdill)
 
+    def save_columnar_results(self, results_dir: Path|None = None) -> None:
+        if results_dir is None:
+            results_dir = Path(f"./data/pipelines/{self.name}/columnar")  # pragma: no cover
+            if self._num_shards > 1:  # pragma: no cover
+                results_dir = results_dir.with_name(f"columnar.shard-{self._shard_index}-of-{self._num_shards}")
+        input_fields = {
+            step_name: input_field_names(step.proto_input_type)
+            for step_name, step in self._steps.items()
+        }
+        write_columnar_results(self._results, results_dir, input_fields)
+
+    @staticmethod
+    def load_results(dill_path: Path) -> ResultsSpec:
+        """
+        Load results saved by `save_results`, or by `save_columnar_results` if `dill_path` is a directory.
+        """
+        if dill_path.is_dir():
+            return read_columnar_results(dill_path)
+        with open(dill_path, 'rb') as fdill:
+            return dill.load(fdill)
+
     def add_steps(self, steps: Iterable[PipelineStepInterface]) -> None:
         for step in steps:
             self.add_step(step)
@@ -62,16 +398,248 @@ class PipelineBase(PipelineInterface):
         step = self._steps[step_name]
         assert step_name not in self._results
         self._results[step_name] = []
-        with tqdm(desc=f"{step_name} ") as pbar:
-            for full_deps_dict in step.resolve_deps():
-                deps_dict = step.unpack_deps(full_deps_dict)
-                assert not "input" in deps_dict
-                for input in step.full_config_to_inputs(full_config, **deps_dict):
-                    step_output = step.input_to_output(input=input, **deps_dict)
-                    full_step_output = FullStepOutput(
-                        deps=full_deps_dict,
-                        output=step_output,
+
+        step_start = time.perf_counter()
+        with profile_span("resolve_deps"):
+            full_deps_dicts = step.resolve_deps()
+        is_sharded = self._num_shards > 1 and step_name == self._shard_step
+        total = None if is_sharded else step.count_inputs(full_config, full_deps_dicts)
+        hooks = self._hooks
+        hooks.emit("on_step_start", step_name=step_name, num_inputs=total)
+        sink = self._sink
+        if sink is not None:
+            sink.begin_step(step_name)
+
+        checkpoint = None
+        resumed_outputs: dict[tuple[int, int], ResumedOutput] = {}
+        if self._checkpoints is not None:
+            checkpoint = self._checkpoints.for_step(step_name, step.config_fingerprint(full_config))
+            if self._resume:
+                # outputs are only reused if their input and deps are unchanged, even once the step has finished
+                resumed_outputs, _is_complete = checkpoint.load()
+            else:
+                checkpoint.clear()
+
+        with tqdm(desc=f"{step_name} ", total=total) as pbar:
+            if step.supports_batching:
+                self._execute_batched(step_name, full_config, full_deps_dicts, resumed_outputs, checkpoint, is_sharded, pbar)
+            else:
+                self._execute_unbatched(step_name, full_config, full_deps_dicts, resumed_outputs, checkpoint, is_sharded, pbar)
+
+        if checkpoint is not None:
+            checkpoint.mark_complete()
+        if sink is not None:
+            sink.end_step(step_name)
+        self._emit_step_end(step_name, step_start)
+
+    def _execute_unbatched(
+        self,
+        step_name: str,
+        full_config: ConfigType,
+        full_deps_dicts: Iterable[FullDepsDict],
+        resumed_outputs: dict[tuple[int, int], ResumedOutput],
+        checkpoint: StepCheckpoint|None,
+        is_sharded: bool,
+        pbar: tqdm,
+    ) -> None:
+        step = self._steps[step_name]
+        step_results = self._results[step_name]
+        sink = self._sink
+        hooks = self._hooks
+        emit_inputs = hooks.active("on_input_start") or hooks.active("on_input_end")
+        for row_index, full_deps_dict in enumerate(full_deps_dicts):
+            deps_dict = step.unpack_deps(full_deps_dict)
+            assert not "input" in deps_dict
+            inputs = self._expand_inputs(step, full_config, deps_dict)
+            for input_index, input in enumerate(inputs):
+                if is_sharded and shard_of(input, self._num_shards) != self._shard_index:
+                    continue
+                input_fingerprint = step.input_fingerprint(input, full_deps_dict) if checkpoint is not None else None
+                resumed = resumed_outputs.get((row_index, input_index))
+                if resumed is not None and resumed[0] == input_fingerprint:
+                    step_output = resumed[1]
+                else:
+                    if emit_inputs:
+                        hooks.emit("on_input_start", step_name=step_name, row_index=row_index, input_index=input_index, input=input)
+                        start = time.perf_counter()
+                    step_output = step.compute_output(input, full_deps_dict, deps_dict)
+                    if emit_inputs:
+                        hooks.emit(
+                            "on_input_end",
+                            step_name=step_name,
+                            row_index=row_index,
+                            input_index=input_index,
+                            input=input,
+                            output=step_output,
+                            seconds=time.perf_counter() - start,
+                        )
+                    if checkpoint is not None:
+                        checkpoint.record_output(row_index, input_index, input_fingerprint, step_output)
+                full_step_output = FullStepOutput(
+                    deps=full_deps_dict,
+                    output=step_output,
+                    step_name=step_name,
+                )
+                step_results.append(full_step_output)
+                if sink is not None:
+                    sink.append(full_step_output)
+                pbar.update()
+
+    def _execute_batched(
+        self,
+        step_name: str,
+        full_config: ConfigType,
+        full_deps_dicts: Iterable[FullDepsDict],
+        resumed_outputs: dict[tuple[int, int], ResumedOutput],
+        checkpoint: StepCheckpoint|None,
+        is_sharded: bool,
+        pbar: tqdm,
+    ) -> None:
+        """
+        Queue inputs across deps rows and compute them `batch_size` at a time,
+        or sooner once the oldest queued input has waited `max_batch_latency` seconds.
+        """
+        step = self._steps[step_name]
+        pending: list[_PendingInput] = []
+        num_to_compute = 0
+        batch_start = 0.0
+        for row_index, full_deps_dict in enumerate(full_deps_dicts):
+            deps_dict = step.unpack_deps(full_deps_dict)
+            assert not "input" in deps_dict
+            inputs = self._expand_inputs(step, full_config, deps_dict)
+            for input_index, input in enumerate(inputs):
+                if is_sharded and shard_of(input, self._num_shards) != self._shard_index:
+                    continue
+                input_fingerprint = step.input_fingerprint(input, full_deps_dict) if checkpoint is not None else None
+                resumed = resumed_outputs.get((row_index, input_index))
+                is_resumed = resumed is not None and resumed[0] == input_fingerprint
+                pending.append(_PendingInput(
+                    row_index, input_index, input, input_fingerprint, full_deps_dict, deps_dict,
+                    resumed[1] if is_resumed else None, is_resumed,
+                ))
+                if not is_resumed:
+                    if num_to_compute == 0:
+                        batch_start = time.perf_counter()
+                    num_to_compute += 1
+                if num_to_compute >= step.batch_size or (
+                    step.max_batch_latency is not None
+                    and num_to_compute
+                    and time.perf_counter() - batch_start >= step.max_batch_latency
+                ):
+                    self._flush_inputs(step_name, pending, checkpoint)
+                    pbar.update(len(pending))
+                    pending = []
+                    num_to_compute = 0
+        if pending:
+            self._flush_inputs(step_name, pending, checkpoint)
+            pbar.update(len(pending))
+
+    def _flush_inputs(self, step_name: str, pending: list["_PendingInput"], checkpoint: StepCheckpoint|None) -> None:
+        """
+        Compute the outputs still missing from `pending` in one batch and append all of them to the results in order.
+        """
+        step = self._steps[step_name]
+        hooks = self._hooks
+        to_compute = [entry for entry in pending if not entry.is_computed]
+        if to_compute:
+            emit_inputs = hooks.active("on_input_start") or hooks.active("on_input_end")
+            if emit_inputs:
+                for entry in to_compute:
+                    hooks.emit(
+                        "on_input_start",
                         step_name=step_name,
+                        row_index=entry.row_index,
+                        input_index=entry.input_index,
+                        input=entry.input,
                     )
-                    self._results[step_name].append(full_step_output)
-                    pbar.update()
+            start = time.perf_counter()
+            outputs = step.compute_outputs(
+                [entry.input for entry in to_compute],
+                [entry.full_deps_dict for entry in to_compute],
+                [entry.deps_dict for entry in to_compute],
+            )
+            # each input's share of the batch
+            seconds = (time.perf_counter() - start) / len(to_compute)
+            for entry, output in zip(to_compute, outputs):
+                entry.output = output
+                entry.is_computed = True
+                if checkpoint is not None:
+                    checkpoint.record_output(entry.row_index, entry.input_index, entry.input_fingerprint, output)
+                if emit_inputs:
+                    hooks.emit(
+                        "on_input_end",
+                        step_name=step_name,
+                        row_index=entry.row_index,
+                        input_index=entry.input_index,
+                        input=entry.input,
+                        output=output,
+                        seconds=seconds,
+                    )
+
+        step_results = self._results[step_name]
+        sink = self._sink
+        for entry in pending:
+            full_step_output = FullStepOutput(
+                deps=entry.full_deps_dict,
+                output=entry.output,
+                step_name=step_name,
+            )
+            step_results.append(full_step_output)
+            if sink is not None:
+                sink.append(full_step_output)
+
+    def _expand_inputs(
+        self,
+        step: PipelineStepInterface,
+        full_config: ConfigType,
+        deps_dict: dict[str, DepsType],
+    ) -> Iterable[StepInputBase]:
+        """
+        The inputs of one deps row.  While profiling, they are all produced inside the span,
+        which would otherwise only time the creation of a lazy expansion or generator.
+        """
+        if get_profiler() is None:
+            return step.full_config_to_inputs(full_config, **deps_dict)
+        with profile_span("full_config_to_inputs"):
+            return list(step.full_config_to_inputs(full_config, **deps_dict))
+
+    def _emit_step_end(self, step_name: str, step_start: float) -> None:
+        self._hooks.emit(
+            "on_step_end",
+            step_name=step_name,
+            num_outputs=len(self._results[step_name]),
+            seconds=time.perf_counter() - step_start,
+        )
+
+def _upstream_known(full_deps_dict: FullDepsDict) -> bool:
+    if any(upstream.output is None for upstream in full_deps_dict.values):
+        return False
+    if isinstance(full_deps_dict, GroupedFullDepsDict):
+        return all(_upstream_known(member) for member in full_deps_dict.members)
+    return True
+
+
+class _PendingInput:
+    __slots__ = (
+        "row_index", "input_index", "input", "input_fingerprint", "full_deps_dict", "deps_dict", "output", "is_computed",
+    )
+
+    def __init__(
+        self,
+        row_index: int,
+        input_index: int,
+        input: StepInputBase,
+        input_fingerprint: str|None,
+        full_deps_dict: FullDepsDict,
+        deps_dict: dict[str, DepsType],
+        output: StepOutputBase|None,
+        is_computed: bool,
+    ):
+        self.row_index = row_index
+        self.input_index = input_index
+        self.input = input
+        self.input_fingerprint = input_fingerprint
+        self.full_deps_dict = full_deps_dict
+        self.deps_dict = deps_dict
+        self.output = output
+        self.is_computed = is_computed
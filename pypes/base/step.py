@@ -1,18 +1,27 @@
+from functools import cached_property
+import inspect
+import time
 from pathlib import Path
-from typing import Iterable, Any, Callable, TypeVar
+from typing import Iterable, Any, Callable, Sized, TypeVar
 
 from ..core.mytyping import (
     DepsType,
     FullDepsDict,
+    GroupedFullDepsDict,
     ConfigType,
     StepInputBase,
     StepOutputBase,
 )
 from ..core.interface import PipelineStepInterface
+from ..core.planning import StepPlan
+from ..caching.base import CacheBase, HashType
+from ..caching.dir import DirCachedDillDict
 from ..resolvers.deps import DepsResolver
 from ..resolvers.config import ConfigResolver
 from ..utils.autosubclass import auto_subclass
-from ..utils.read_type_hints import get_first_param_and_return_type
+from ..utils.read_type_hints import get_first_param_and_return_type, unpack_list_type_hint
+from ..utils.hashing import myhash, stable_hash
+from ..utils.profiling import profile_span
 
 
 C = TypeVar("C", bound=type[Any])
@@ -29,7 +38,19 @@ class PipelineStepBase(PipelineStepInterface):
         output_type: type[StepOutputBase] = StepOutputBase,
         deps_resolver: DepsResolver|None = None,
         config_resolver: ConfigResolver|None = None,
+        reuse_inputs: bool = False,
+        cache_outputs: bool = False,
+        code_version: str|None = None,
+        transient: bool = False,
+        batch_size: int = 64,
+        max_batch_latency: float|None = None,
     ):
+        """
+        Steps overriding `batch_input_to_output` get up to `batch_size` inputs per call, across deps rows;
+        a batch is also cut short once `max_batch_latency` seconds have passed since its first input was queued.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, not {batch_size}")
         super().__init__()
         self._step_name = step_name
         self._substep_name = substep_name
@@ -39,7 +60,16 @@ class PipelineStepBase(PipelineStepInterface):
         self.output_type = output_type
 
         self._deps_resolver = deps_resolver or DepsResolver()
-        self._config_resolver = config_resolver or ConfigResolver.from_step(self)
+        self._config_resolver = config_resolver or ConfigResolver.from_step(self, reuse_inputs=reuse_inputs)
+
+        self.transient = transient
+        self.batch_size = batch_size
+        self.max_batch_latency = max_batch_latency
+        self.cache_outputs = cache_outputs
+        self._code_version = code_version
+        self._output_cache: CacheBase|None = None
+        # keyed on id(); the hashed object is kept alongside so that its id stays unique
+        self._output_hash_memo: dict[int, tuple[Any, HashType]] = {}
 
     @property
     def step_name(self) -> str:
@@ -57,19 +87,183 @@ class PipelineStepBase(PipelineStepInterface):
     def cache_subdir(self) -> Path:
         return Path(self.step_name) / self.substep_name
 
+    @cached_property
+    def code_fingerprint(self) -> HashType:
+        if self._code_version is not None:
+            return myhash(self._code_version)
+        sources = []
+        for klass in type(self).__mro__:
+            if klass is object:
+                continue
+            try:
+                sources.append(inspect.getsource(klass))
+            except (OSError, TypeError):
+                sources.append(f"{klass.__module__}.{klass.__qualname__}")
+        return myhash(sources)
+
+    @property
+    def output_cache(self) -> CacheBase:
+        if self._output_cache is None:
+            cache_base_dir = self.pipeline.cache_base_dir
+            assert cache_base_dir is not None
+            self._output_cache = DirCachedDillDict(cache_dir=cache_base_dir / self.cache_subdir / "_step_outputs")
+        return self._output_cache
+
+    def reset_run_state(self) -> None:
+        self._config_resolver.clear_cache()
+        self._output_cache = None
+        self._output_hash_memo.clear()
+
     def resolve_deps(self) -> Iterable[FullDepsDict]:
-        yield from self._deps_resolver.resolve_deps(self.deps_spec, self.pipeline.results)
+        return self._deps_resolver.resolve_deps(self.deps_spec, self.pipeline.results)
 
     def unpack_deps(self, full_deps_dict: FullDepsDict) -> dict[str, DepsType]:
         return full_deps_dict.to_simple_dict()
 
     def full_config_to_inputs(self, full_config: ConfigType, **deps: DepsType) -> Iterable[StepInputBase]:
-        for sub_config in self._config_resolver.get_sub_configs(full_config):
-            yield from self._config_resolver.resolve_sub_config(sub_config)
+        return self._config_resolver.expand(full_config)
+
+    def count_inputs(self, full_config: ConfigType, full_deps_dicts: Iterable[FullDepsDict]) -> int|None:
+        if type(self).full_config_to_inputs is not PipelineStepBase.full_config_to_inputs:
+            # an override may fan out per deps row, so the count isn't known ahead of time
+            return None
+        if not isinstance(full_deps_dicts, Sized):
+            return None
+        return len(full_deps_dicts) * len(self._config_resolver.expand(full_config))
+
+    def config_fingerprint(self, full_config: ConfigType) -> str:
+        return stable_hash([self.code_fingerprint, stable_hash(full_config.get(self.step_name))])
+
+    def input_fingerprint(self, input: StepInputBase, full_deps_dict: FullDepsDict) -> str:
+        return stable_hash([stable_hash(input), self._deps_hash(full_deps_dict)])
 
     def input_to_output(self, input: StepInputBase, **deps: DepsType) -> StepOutputBase:
+        if self.supports_batching:
+            return self.batch_input_to_output([input], [deps])[0]
         raise NotImplementedError()  # pragma: no cover
 
+    def batch_input_to_output(
+        self,
+        inputs: list[StepInputBase],
+        deps_list: list[dict[str, DepsType]],
+    ) -> list[StepOutputBase]:
+        """
+        One output per input, in order; `deps_list[i]` holds the deps of `inputs[i]`.
+        """
+        return [self.input_to_output(input=input, **deps) for input, deps in zip(inputs, deps_list)]
+
+    @property
+    def supports_batching(self) -> bool:
+        return type(self).batch_input_to_output is not PipelineStepBase.batch_input_to_output
+
+    def compute_outputs(
+        self,
+        inputs: list[StepInputBase],
+        full_deps_dicts: list[FullDepsDict],
+        deps_dicts: list[dict[str, DepsType]],
+    ) -> list[StepOutputBase]:
+        outputs: list[StepOutputBase|None] = [None] * len(inputs)
+        keys: list[HashType|None] = [None] * len(inputs)
+        if self.cache_outputs:
+            hooks = self.pipeline.hooks
+            for i, (input, full_deps_dict) in enumerate(zip(inputs, full_deps_dicts)):
+                key = keys[i] = self.output_cache_key(input, full_deps_dict)
+                if key in self.output_cache:
+                    hooks.emit("on_cache_hit", step_name=self.step_name, cache="step_output", key=key)
+                    with profile_span("output_cache_read"):
+                        outputs[i] = self.output_cache[key]
+                else:
+                    hooks.emit("on_cache_miss", step_name=self.step_name, cache="step_output", key=key)
+
+        misses = [i for i, key in enumerate(keys) if key is None or key not in self.output_cache]
+        if misses:
+            start = time.perf_counter()
+            with profile_span("batch_input_to_output", batch_size=len(misses)):
+                computed = self.batch_input_to_output(
+                    [inputs[i] for i in misses],
+                    [deps_dicts[i] for i in misses],
+                )
+            if len(computed) != len(misses):
+                raise ValueError(f"Step {self.step_name} returned {len(computed)} outputs for a batch of {len(misses)} inputs")
+            seconds_per_output = (time.perf_counter() - start) / len(misses)
+            for i, output in zip(misses, computed):
+                self.pipeline.latency_stats.record(self.step_name, seconds_per_output)
+                outputs[i] = output
+                if self.cache_outputs:
+                    with profile_span("output_cache_write"):
+                        self.output_cache[keys[i]] = output
+        return outputs
+
+    def compute_output(
+        self,
+        input: StepInputBase,
+        full_deps_dict: FullDepsDict,
+        deps_dict: dict[str, DepsType],
+    ) -> StepOutputBase:
+        if not self.cache_outputs:
+            return self._timed_input_to_output(input, deps_dict)
+
+        key = self.output_cache_key(input, full_deps_dict)
+        hooks = self.pipeline.hooks
+        if key in self.output_cache:
+            hooks.emit("on_cache_hit", step_name=self.step_name, cache="step_output", key=key)
+            with profile_span("output_cache_read"):
+                return self.output_cache[key]
+        hooks.emit("on_cache_miss", step_name=self.step_name, cache="step_output", key=key)
+        output = self._timed_input_to_output(input, deps_dict)
+        with profile_span("output_cache_write"):
+            self.output_cache[key] = output
+        return output
+
+    def _timed_input_to_output(self, input: StepInputBase, deps_dict: dict[str, DepsType]) -> StepOutputBase:
+        start = time.perf_counter()
+        with profile_span("input_to_output"):
+            output = self.input_to_output(input=input, **deps_dict)
+        if not self._last_output_was_cached():
+            self.pipeline.latency_stats.record(self.step_name, time.perf_counter() - start)
+        return output
+
+    def _last_output_was_cached(self) -> bool:
+        """
+        Whether the last `input_to_output` call was answered from caches, and so says nothing about its latency.
+        """
+        return False
+
+    def probe_output(
+        self,
+        input: StepInputBase,
+        full_deps_dict: FullDepsDict,
+        deps_dict: dict[str, DepsType],
+        step_plan: StepPlan,
+    ) -> StepOutputBase|None:
+        if self.cache_outputs:
+            key = self.output_cache_key(input, full_deps_dict)
+            if key in self.output_cache:
+                return self.output_cache[key]
+        return None
+
+    def output_cache_key(self, input: StepInputBase, full_deps_dict: FullDepsDict) -> HashType:
+        return myhash((self.code_fingerprint, stable_hash(input), self._deps_hash(full_deps_dict)))
+
+    def _deps_hash(self, full_deps_dict: FullDepsDict) -> HashType:
+        def compute_hash() -> HashType:
+            parts: list[Any] = [
+                (label, self._memo_hash(upstream, lambda: stable_hash(upstream.output)))
+                for label, upstream in full_deps_dict.items()
+            ]
+            if isinstance(full_deps_dict, GroupedFullDepsDict):
+                parts += [self._deps_hash(member) for member in full_deps_dict.members]
+            return myhash(parts)
+
+        return self._memo_hash(full_deps_dict, compute_hash)
+
+    def _memo_hash(self, obj: Any, compute_hash: Callable[[], HashType]) -> HashType:
+        memo = self._output_hash_memo.get(id(obj))
+        if memo is None or memo[0] is not obj:
+            memo = (obj, compute_hash())
+            self._output_hash_memo[id(obj)] = memo
+        return memo[1]
+
     @classmethod
     def auto_step(
         cls,
@@ -83,10 +277,18 @@ class PipelineStepBase(PipelineStepInterface):
 
         def fkwargs(other_class: C) -> dict[str, Any]:
             input_to_output_method = getattr(other_class, "input_to_output", None)
-            if input_to_output_method is None:
-                raise ValueError(f"Expected decorated class to have an `input_to_output` method")
-            input_type, output_type = get_first_param_and_return_type(input_to_output_method)
-            return dict(input_type=input_type, output_type=output_type)
+            if input_to_output_method is not None:
+                input_type, output_type = get_first_param_and_return_type(input_to_output_method)
+                return dict(input_type=input_type, output_type=output_type)
+
+            batch_method = getattr(other_class, "batch_input_to_output", None)
+            if batch_method is None:
+                raise ValueError(f"Expected decorated class to have an `input_to_output` or `batch_input_to_output` method")
+            inputs_type, outputs_type = get_first_param_and_return_type(batch_method, require_return_type=True)
+            return dict(
+                input_type=unpack_list_type_hint(inputs_type),
+                output_type=unpack_list_type_hint(outputs_type),
+            )
 
         auto_suclass_deco = auto_subclass(
             cls,
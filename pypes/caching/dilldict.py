@@ -0,0 +1,51 @@
+from typing import Iterable, Any
+
+from .base import CacheBase, HashType
+from ..utils.profiling import profile_span
+
+
+ValueType = Any
+
+
+class CachedDillDictBase(CacheBase):
+    """
+    Cache of arbitrary dill-serializable values.
+
+    Only the keys are read up front; values are loaded from the backing store on access.
+    """
+    def __init__(
+        self,
+        assert_exists: bool = False,
+    ):
+        self._keys: set[HashType] = set()
+        with profile_span("cache_load", cache=type(self).__name__):
+            self._init_cache(assert_exists=assert_exists)
+
+    def _init_cache(self, assert_exists: bool) -> None:
+        raise NotImplementedError()  # pragma: no cover
+
+    def _load(self, key: HashType) -> ValueType:
+        raise NotImplementedError()  # pragma: no cover
+
+    def _update_cache(self, key: HashType, value: ValueType) -> None:
+        raise NotImplementedError()  # pragma: no cover
+
+    def __setitem__(self, key: HashType, value: ValueType) -> None:
+        with profile_span("cache_write", cache=type(self).__name__):
+            self._update_cache(key, value)
+        self._keys.add(key)
+
+    def __getitem__(self, key: HashType) -> ValueType:
+        if key not in self._keys:
+            raise KeyError(key)
+        with profile_span("cache_read", cache=type(self).__name__):
+            return self._load(key)
+
+    def __contains__(self, key: HashType) -> bool:
+        return key in self._keys
+
+    def keys(self) -> Iterable[HashType]:
+        yield from sorted(self._keys)
+
+    def __iter__(self) -> Iterable[HashType]:
+        yield from self.keys()
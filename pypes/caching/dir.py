@@ -2,8 +2,11 @@ from pathlib import Path
 import json
 from typing import Any
 
+import dill
+
 from .stringdict import CachedStringDictBase
 from .jsondict import CachedJsonDictBase
+from .dilldict import CachedDillDictBase
 
 
 class DirCachedStringDict(CachedStringDictBase):
@@ -53,3 +56,34 @@ class DirCachedJsonDict(CachedJsonDictBase):
     def _update_cache(self, key: str, value: dict[str, Any]) -> None:
         with open(self.cache_dir / f"{key}.json", 'w', encoding="utf-8") as fjson:
             json.dump(value, fjson, indent=4, ensure_ascii=False)
+
+
+class DirCachedDillDict(CachedDillDictBase):
+    def __init__(
+        self,
+        cache_dir: Path,
+        assert_exists: bool = False,
+    ):
+        self.cache_dir = cache_dir
+        super().__init__(assert_exists=assert_exists)
+
+    def _init_cache(self, assert_exists: bool) -> None:
+        if assert_exists:
+            assert self.cache_dir.exists()
+        else:
+            self.cache_dir.mkdir(exist_ok=True, parents=True)
+
+        for fpath in self.cache_dir.glob("*.dill"):
+            self._keys.add(fpath.stem)
+
+    def _load(self, key: str) -> Any:
+        with open(self.cache_dir / f"{key}.dill", 'rb') as fdill:
+            return dill.load(fdill)
+
+    def _update_cache(self, key: str, value: Any) -> None:
+        # write then rename, so an interrupted write never leaves a truncated entry behind
+        fpath = self.cache_dir / f"{key}.dill"
+        tmp_fpath = fpath.with_suffix(".dill.tmp")
+        with open(tmp_fpath, 'wb') as fdill:
+            dill.dump(value, fdill)
+        tmp_fpath.replace(fpath)
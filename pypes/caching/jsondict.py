@@ -1,6 +1,7 @@
 from typing import Iterable, Any
 
 from .base import CacheBase, HashType
+from ..utils.profiling import profile_span
 
 
 ValueType = dict[str, Any]
@@ -12,7 +13,8 @@ class CachedJsonDictBase(CacheBase):
         assert_exists: bool = False,
     ):
         self._data: dict[HashType, ValueType] = {}
-        self._init_cache(assert_exists=assert_exists)
+        with profile_span("cache_load", cache=type(self).__name__):
+            self._init_cache(assert_exists=assert_exists)
 
     def _init_cache(self, assert_exists: bool) -> None:
         raise NotImplementedError()  # pragma: no cover
@@ -21,7 +23,8 @@ class CachedJsonDictBase(CacheBase):
         raise NotImplementedError()  # pragma: no cover
 
     def __setitem__(self, key: HashType, value: ValueType) -> None:
-        self._update_cache(key, value)
+        with profile_span("cache_write", cache=type(self).__name__):
+            self._update_cache(key, value)
         self._data[key] = value
 
     def __getitem__(self, key: HashType) -> ValueType:
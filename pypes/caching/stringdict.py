@@ -1,6 +1,7 @@
 from typing import Iterable
 
 from .base import CacheBase, HashType
+from ..utils.profiling import profile_span
 
 
 class CachedStringDictBase(CacheBase):
@@ -9,7 +10,8 @@ class CachedStringDictBase(CacheBase):
         assert_exists: bool = False,
     ):
         self._data: dict[HashType, str] = {}
-        self._init_cache(assert_exists=assert_exists)
+        with profile_span("cache_load", cache=type(self).__name__):
+            self._init_cache(assert_exists=assert_exists)
 
     def _init_cache(self, assert_exists: bool) -> None:
         raise NotImplementedError()  # pragma: no cover
@@ -18,7 +20,8 @@ class CachedStringDictBase(CacheBase):
         raise NotImplementedError()  # pragma: no cover
 
     def __setitem__(self, key: HashType, value: str) -> None:
-        self._update_cache(key, value)
+        with profile_span("cache_write", cache=type(self).__name__):
+            self._update_cache(key, value)
         self._data[key] = value
 
     def __getitem__(self, key: HashType) -> str:
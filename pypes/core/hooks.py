@@ -0,0 +1,72 @@
+from typing import Any, Callable
+
+
+HookCallback = Callable[..., None]
+
+
+class HookRegistry:
+    """
+    Callbacks for pipeline lifecycle events, called in registration order with keyword arguments:
+
+    - on_run_start(step_names, config)
+    - on_step_start(step_name, num_inputs)  (num_inputs is None when unknown up front)
+    - on_input_start(step_name, row_index, input_index, input)
+    - on_input_end(step_name, row_index, input_index, input, output, seconds)  (an even share of its batch's time)
+    - on_artifact_request(step_name, request, response, seconds)
+    - on_cache_hit(step_name, cache, key) / on_cache_miss(step_name, cache, key)
+    - on_step_end(step_name, num_outputs, seconds)
+    - on_run_end(step_names, seconds)
+
+    Callbacks should accept `**kwargs` so that new arguments can be added without breaking them.
+    """
+    EVENTS = (
+        "on_run_start",
+        "on_step_start",
+        "on_input_start",
+        "on_input_end",
+        "on_artifact_request",
+        "on_cache_hit",
+        "on_cache_miss",
+        "on_step_end",
+        "on_run_end",
+    )
+
+    def __init__(self):
+        self._callbacks: dict[str, list[HookCallback]] = {event: [] for event in self.EVENTS}
+
+    def register(self, event: str, callback: HookCallback) -> HookCallback:
+        self._check_event(event)
+        self._callbacks[event].append(callback)
+        return callback
+
+    def unregister(self, event: str, callback: HookCallback) -> None:
+        self._check_event(event)
+        self._callbacks[event].remove(callback)
+
+    def on(self, event: str) -> Callable[[HookCallback], HookCallback]:
+        """
+        Decorator form of `register`.
+        """
+        def deco(callback: HookCallback) -> HookCallback:
+            return self.register(event, callback)
+        return deco
+
+    def register_object(self, obj: Any) -> None:
+        """
+        Register every method of `obj` named after an event.
+        """
+        for event in self.EVENTS:
+            callback = getattr(obj, event, None)
+            if callback is not None:
+                self.register(event, callback)
+
+    def active(self, event: str) -> bool:
+        return bool(self._callbacks[event])
+
+    def emit(self, event: str, **kwargs: Any) -> None:
+        for callback in self._callbacks[event]:
+            callback(**kwargs)
+
+    def _check_event(self, event: str) -> None:
+        if event not in self._callbacks:
+            raise ValueError(f"Unknown hook event {event!r}; expected one of {self.EVENTS}")
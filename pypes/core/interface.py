@@ -3,12 +3,16 @@ from typing import Iterable
 
 from .mytyping import (
     ConfigType,
+    DepsSpecType,
     DepsType,
     FullDepsDict,
     StepInputBase,
     StepOutputBase,
     ResultsSpec,
 )
+from .hooks import HookRegistry
+from .planning import StepPlan
+from ..utils.latency import LatencyStats
 
 
 class PipelineInterface:
@@ -20,8 +24,20 @@ class PipelineInterface:
     def cache_base_dir(self) -> Path|None:
         raise NotImplementedError()  # pragma: no cover
 
+    @property
+    def latency_stats(self) -> LatencyStats:
+        raise NotImplementedError()  # pragma: no cover
+
+    @property
+    def hooks(self) -> HookRegistry:
+        raise NotImplementedError()  # pragma: no cover
+
 
 class PipelineStepInterface:
+    deps_spec: DepsSpecType = None
+    # results of transient steps are released from `pipeline.results` once no later step needs them
+    transient: bool = False
+
     @property
     def step_name(self) -> str:
         raise NotImplementedError()  # pragma: no cover
@@ -37,6 +53,9 @@ class PipelineStepInterface:
     def set_pipeline(self, pipeline: "PipelineInterface") -> None:
         self.pipeline = pipeline
 
+    def reset_run_state(self) -> None:
+        pass
+
     def resolve_deps(self) -> Iterable[FullDepsDict]:
         raise NotImplementedError()  # pragma: no cover
 
@@ -46,5 +65,55 @@ class PipelineStepInterface:
     def full_config_to_inputs(self, full_config: ConfigType, **deps: DepsType) -> Iterable[StepInputBase]:
         raise NotImplementedError()  # pragma: no cover
 
+    def count_inputs(self, full_config: ConfigType, full_deps_dicts: Iterable[FullDepsDict]) -> int|None:
+        return None
+
+    def config_fingerprint(self, full_config: ConfigType) -> str:
+        """
+        Changes whenever the step's code or its part of `full_config` does.
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+    def input_fingerprint(self, input: StepInputBase, full_deps_dict: FullDepsDict) -> str:
+        """
+        Changes whenever `input` or the upstream outputs in `full_deps_dict` do.
+        """
+        raise NotImplementedError()  # pragma: no cover
+
     def input_to_output(self, input: StepInputBase, **deps: DepsType) -> StepOutputBase:
         raise NotImplementedError()  # pragma: no cover
+
+    supports_batching: bool = False
+    batch_size: int = 1
+    max_batch_latency: float|None = None
+
+    def compute_outputs(
+        self,
+        inputs: list[StepInputBase],
+        full_deps_dicts: list[FullDepsDict],
+        deps_dicts: list[dict[str, DepsType]],
+    ) -> list[StepOutputBase]:
+        return [
+            self.compute_output(input, full_deps_dict, deps_dict)
+            for input, full_deps_dict, deps_dict in zip(inputs, full_deps_dicts, deps_dicts)
+        ]
+
+    def compute_output(
+        self,
+        input: StepInputBase,
+        full_deps_dict: FullDepsDict,
+        deps_dict: dict[str, DepsType],
+    ) -> StepOutputBase:
+        return self.input_to_output(input=input, **deps_dict)
+
+    def probe_output(
+        self,
+        input: StepInputBase,
+        full_deps_dict: FullDepsDict,
+        deps_dict: dict[str, DepsType],
+        step_plan: StepPlan,
+    ) -> StepOutputBase|None:
+        """
+        The output if it can be had from caches without computing anything, else None.
+        """
+        return None
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import FrozenInstanceError
+from typing import Iterable
 
 from omegaconf import DictConfig
 import pandas as pd
@@ -21,32 +22,80 @@ DepsSpecType = list[str]|str|None
 
 
 class FullDepsDict:
+    """
+    Upstream outputs by step label, stored as a pair of tuples.
+
+    Label tuples are interned so that every deps dict with the same ancestry shares one,
+    and a single instance is shared by all outputs produced from the same deps row.
+    """
+    __slots__ = ("_labels", "_values")
+
+    _interned_labels: dict[tuple[str, ...], tuple[str, ...]] = {}
+
     def __init__(self, upstream_by_label: dict[str, "FullStepOutput"]):
         super().__init__()
-        self._data = upstream_by_label
+        self._labels = self._intern_labels(tuple(upstream_by_label.keys()))
+        self._values = tuple(upstream_by_label.values())
+
+    @classmethod
+    def _intern_labels(cls, labels: tuple[str, ...]) -> tuple[str, ...]:
+        return cls._interned_labels.setdefault(labels, labels)
+
+    @classmethod
+    def from_items(cls, labels: tuple[str, ...], values: tuple["FullStepOutput", ...]) -> "FullDepsDict":
+        if len(labels) != len(values):
+            raise ValueError(f"Got {len(labels)} labels but {len(values)} values")
+        full_deps_dict = cls.__new__(cls)
+        full_deps_dict._labels = cls._intern_labels(tuple(labels))
+        full_deps_dict._values = tuple(values)
+        return full_deps_dict
+
+    @property
+    def labels(self) -> tuple[str, ...]:
+        return self._labels
+
+    @property
+    def values(self) -> tuple["FullStepOutput", ...]:
+        return self._values
 
     @property
     def data(self) -> dict[str, "FullStepOutput"]:
-        return dict(self._data)
+        return dict(zip(self._labels, self._values))
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __contains__(self, label: str) -> bool:
+        return label in self._labels
+
+    def __getitem__(self, label: str) -> "FullStepOutput":
+        try:
+            return self._values[self._labels.index(label)]
+        except ValueError:
+            raise KeyError(label) from None
+
+    def items(self) -> Iterable[tuple[str, "FullStepOutput"]]:
+        return zip(self._labels, self._values)
 
     def as_row(self) -> pd.Series:
-        return pd.Series(list(self._data.values()), index=list(self._data.keys()))
+        return pd.Series(list(self._values), index=list(self._labels), dtype=object)
 
     @classmethod
     def from_row(cls, row: pd.Series) -> "FullDepsDict":
-        return cls(row.to_dict())
+        return cls.from_items(tuple(row.index), tuple(row.values))
 
     @classmethod
     def list_from_df(cls, df: pd.DataFrame) -> list["FullDepsDict"]:
+        labels = tuple(df.columns)
         return [
-            cls.from_row(row)
-            for _idx, row in df.iterrows()
+            cls.from_items(labels, values)
+            for values in df.itertuples(index=False, name=None)
         ]
 
     def to_simple_dict(self) -> dict[str, StepOutputBase]:
         return {
             name: full_step_output.output
-            for name, full_step_output in self._data.items()
+            for name, full_step_output in zip(self._labels, self._values)
         }
 
     def __hash__(self):
@@ -56,23 +105,114 @@ class FullDepsDict:
         return object.__eq__(self, other)
 
     def __repr__(self) -> str:
-        return f"{type(self).__name__}({self._data!r})"
+        return f"{type(self).__name__}({self.data!r})"
+
+
+class GroupedFullDepsDict(FullDepsDict):
+    """
+    Deps of a grouped step: the lineage of the group key, plus every upstream deps row in the group.
+
+    Only the key lineage takes part in `as_row`/`data`, so downstream steps and the browser
+    see a grouped output as descending from its group key alone.
+    """
+    __slots__ = ("_members",)
+
+    def __init__(
+        self,
+        upstream_by_label: dict[str, "FullStepOutput"],
+        members: Iterable[FullDepsDict] = (),
+    ):
+        super().__init__(upstream_by_label)
+        self._members = tuple(members)
+
+    @classmethod
+    def from_key(cls, key: FullDepsDict, members: Iterable[FullDepsDict]) -> "GroupedFullDepsDict":
+        grouped = cls.from_items(key.labels, key.values)
+        grouped._members = tuple(members)
+        return grouped
+
+    @property
+    def members(self) -> tuple[FullDepsDict, ...]:
+        return self._members
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.data!r}, members=<{len(self._members)} rows>)"
+
+
+class OutputRef:
+    """
+    Handle to a step output payload stored outside of memory.
+    """
+    def load(self) -> StepOutputBase:
+        raise NotImplementedError()  # pragma: no cover
 
 
-@dataclass(frozen=True, eq=False)
 class FullStepOutput:
+    """
+    A step output together with its lineage.
+
+    Instances are immutable and compared by identity.  The payload may be spilled to an `OutputRef`
+    in place, so that lineage pointing at this instance stays valid while the payload leaves memory;
+    `output` then loads it back on access.
+    """
+    __slots__ = ("deps", "_output", "step_name")
+
     deps: FullDepsDict
-    output: StepOutputBase
     step_name: str
 
+    def __init__(self, deps: FullDepsDict, output: StepOutputBase, step_name: str):
+        object.__setattr__(self, "deps", deps)
+        object.__setattr__(self, "_output", output)
+        object.__setattr__(self, "step_name", step_name)
+
+    @property
+    def output(self) -> StepOutputBase:
+        output = self._output
+        if isinstance(output, OutputRef):
+            return output.load()
+        return output
+
+    @property
+    def is_spilled(self) -> bool:
+        return isinstance(self._output, OutputRef)
+
+    def spill(self, ref: OutputRef) -> None:
+        object.__setattr__(self, "_output", ref)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def __getstate__(self) -> tuple[FullDepsDict, StepOutputBase, str]:
+        # spilled payloads are materialized, since refs point into files local to a run
+        return (self.deps, self.output, self.step_name)
+
+    def __setstate__(self, state: tuple[FullDepsDict, StepOutputBase, str]) -> None:
+        deps, output, step_name = state
+        FullStepOutput.__init__(self, deps, output, step_name)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(deps={self.deps!r}, output={self._output!r}, step_name={self.step_name!r})"
+
     def as_row(self, full_output: bool = True) -> pd.Series:
         output = self if full_output else self.output
-        row0 = self.deps.as_row()
-        row1 = pd.Series([output], index=[self.step_name])
-        return pd.concat([row0, row1])
+        return pd.Series(
+            [*self.deps.values, output],
+            index=[*self.deps.labels, self.step_name],
+            dtype=object,
+        )
 
     @classmethod
     def list_to_df(cls, the_list: list["FullStepOutput"]) -> pd.DataFrame:
+        if the_list:
+            first = the_list[0]
+            labels = first.deps.labels
+            if all(elem.deps.labels is labels and elem.step_name == first.step_name for elem in the_list):
+                # fast path: one shared label tuple, so build the frame straight from tuples
+                records = [(*elem.deps.values, elem) for elem in the_list]
+                return pd.DataFrame(records, columns=[*labels, first.step_name], dtype=object)
         rows = [elem.as_row() for elem in the_list]
         return pd.DataFrame(rows)
 
@@ -0,0 +1,72 @@
+from dataclasses import dataclass, field, asdict
+
+import pandas as pd
+
+
+@dataclass
+class StepPlan:
+    """
+    What running one step would involve, as found by `PipelineBase.plan`.
+
+    Counts are None when they cannot be known without running an upstream step.
+    `num_known` outputs come from the step output cache, from fully cached artifact requests,
+    or from steps executed during planning; all other inputs are `expected_misses`.
+    Inputs whose upstream outputs are unknown cannot be looked up and are counted as `num_unprobed`.
+    """
+    step_name: str
+    num_rows: int|None = None
+    num_inputs: int|None = None
+    num_known: int = 0
+    num_unprobed: int = 0
+    num_cached_requests: int = 0
+    num_missed_requests: int = 0
+    mean_seconds: float|None = None
+    cost_per_output: float|None = None
+
+    @property
+    def expected_misses(self) -> int|None:
+        if self.num_inputs is None:
+            return None
+        return self.num_inputs - self.num_known
+
+    @property
+    def est_seconds(self) -> float|None:
+        if self.expected_misses is None or self.mean_seconds is None:
+            return None
+        return self.expected_misses * self.mean_seconds
+
+    @property
+    def est_cost(self) -> float|None:
+        if self.expected_misses is None or self.cost_per_output is None:
+            return None
+        return self.expected_misses * self.cost_per_output
+
+
+@dataclass
+class PipelinePlan:
+    steps: dict[str, StepPlan] = field(default_factory=dict)
+
+    @property
+    def est_seconds(self) -> float|None:
+        """
+        Sum over the steps with an estimate; None if no step has one.
+        """
+        estimates = [plan.est_seconds for plan in self.steps.values() if plan.est_seconds is not None]
+        return sum(estimates) if estimates else None
+
+    @property
+    def est_cost(self) -> float|None:
+        estimates = [plan.est_cost for plan in self.steps.values() if plan.est_cost is not None]
+        return sum(estimates) if estimates else None
+
+    def to_df(self) -> pd.DataFrame:
+        rows = [
+            dict(
+                asdict(plan),
+                expected_misses=plan.expected_misses,
+                est_seconds=plan.est_seconds,
+                est_cost=plan.est_cost,
+            )
+            for plan in self.steps.values()
+        ]
+        return pd.DataFrame(rows).set_index("step_name")
@@ -1,7 +1,8 @@
 import os
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Any, Callable, Iterable
+import threading
+from typing import Any, Callable, Iterable, Iterator, Sequence
 
 import dill
 import numpy as np
@@ -14,6 +15,9 @@ from omegaconf import DictConfig
 from pypes.core.mytyping import (
     FullStepOutput, StepOutputBase, FullDepsDict,
 )
+from pypes.results.columnar import is_columnar_results
+from pypes.results.reader import LazyStepResults, ResultsReader
+from pypes.results.summary import as_categories, groupable_fields, summarize
 
 from .flet_utils import SandboxedFilePicker, PickResult
 
@@ -84,61 +88,162 @@ def full_step_output_list_to_exploded_df(
 
 
 class DfFilter:
-    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
         raise NotImplementedError()
 
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df[self.mask(df)]
+
 
 @dataclass(frozen=True, eq=False)
 class FieldEqFilter(DfFilter):
     field_name: str
     value: Any
 
-    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
-        return df[df[self.field_name] == self.value]
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        return (df[self.field_name] == self.value).to_numpy()
 
 
 class FilterableDf:
+    """
+    An immutable base table (one row per output, see `full_step_output_list_to_exploded_df`)
+    seen through boolean masks: the labeled masks in `mask_by_label` and the masks of `filters`,
+    each computed once against the base table.  The combined mask, the row indices it keeps
+    and the filtered frame are cached until a mask changes.
+
+    The outputs of the rows are the table's `full_step_output` column, or `full_step_outputs`
+    (e.g. a `LazyStepResults`, whose outputs are only read when a row is shown).
+    """
     def __init__(
         self,
         df: pd.DataFrame,
+        full_step_outputs: Sequence[FullStepOutput]|None = None,
     ):
-        self._df0 = df.copy()
-        self._df = self._df0
+        self._df0 = df.reset_index(drop=True)
+        if full_step_outputs is None:
+            full_step_outputs = self._df0["full_step_output"].to_numpy() if len(self._df0) else np.empty(0, dtype=object)
+        self._fsos: Sequence[FullStepOutput] = full_step_outputs
+        self._row_by_id: dict[int, int]|None = None
 
         self.mask_by_label: dict[str, np.ndarray] = {}
         self.filters: list[DfFilter] = []
+        self._filter_masks: list[np.ndarray] = []
         self.callbacks: list[Callable[[], None]] = []
+        self._mask: np.ndarray|None = None
+        self._indices: np.ndarray|None = None
+        self._df: pd.DataFrame|None = None
 
     @property
     def df0(self) -> pd.DataFrame:
-        return self._df0.copy()
+        """
+        The base table; treat it as read-only.
+        """
+        return self._df0
 
     @property
     def df(self) -> pd.DataFrame:
-        return self._df.copy()
+        if self._df is None:
+            self._df = self._df0.iloc[self.indices]
+        return self._df
+
+    @property
+    def mask(self) -> np.ndarray:
+        if self._mask is None:
+            mask = np.ones(len(self._df0), dtype=bool)
+            for label_mask in self.mask_by_label.values():
+                mask &= label_mask
+            for filter_mask in self._filter_masks:
+                mask &= filter_mask
+            self._mask = mask
+        return self._mask
+
+    @property
+    def indices(self) -> np.ndarray:
+        """
+        Base row indices kept by the masks, in order.
+        """
+        if self._indices is None:
+            self._indices = np.flatnonzero(self.mask)
+        return self._indices
+
+    def __len__(self) -> int:
+        return len(self._df0)
+
+    def fso_at(self, index: int) -> FullStepOutput:
+        return self._fsos[index]
+
+    def fsos_at(self, indices: np.ndarray) -> list[FullStepOutput]:
+        return [self._fsos[i] for i in indices.tolist()]
+
+    def indices_of(self, full_step_outputs: Iterable[FullStepOutput]) -> np.ndarray:
+        row_by_id = self._row_by_id
+        if row_by_id is None:
+            row_by_id = self._row_by_id = {id(fso): i for i, fso in enumerate(self._fsos)}
+        rows = [row_by_id[id(fso)] for fso in full_step_outputs if id(fso) in row_by_id]
+        return np.array(rows, dtype=np.int64)
+
+    def set_mask(self, label: str, mask: np.ndarray, notify: bool = True) -> None:
+        self.mask_by_label[label] = mask
+        self.update(notify=notify)
+
+    def remove_mask(self, label: str, notify: bool = True) -> None:
+        if self.mask_by_label.pop(label, None) is not None:
+            self.update(notify=notify)
 
     def update(self, notify: bool = True) -> None:
-        self._df = self._df0
-        full_mask = np.ones(len(self._df), dtype=bool)
-        for _mask_label, new_mask in self.mask_by_label.items():
-            full_mask &= new_mask
-        self._df = self._df[full_mask]
-
-        for filter in self.filters:
-            self._df = filter.apply(self._df)
+        """
+        Drop the cached views, e.g. after a mask in `mask_by_label` was changed in place.
+        """
+        self._mask = None
+        self._indices = None
+        self._df = None
         if notify:
             self.notify()
 
     def add_filter(self, filter: DfFilter) -> None:
         self.filters.append(filter)
-        self._df = filter.apply(self._df)
-        self.notify()
+        self._filter_masks.append(np.asarray(filter.mask(self._df0), dtype=bool))
+        self.update()
 
     def notify(self) -> None:
         for callback in self.callbacks:
             callback()
 
 
+class LineageIndex:
+    """
+    A lineage table (one row per lineage, one column per step, see `FullStepOutput.list_to_df`)
+    as integer row indices into the table of each step, -1 where a step is absent.
+    The lineages through each step row are grouped once, so that the rows of every step
+    related to a given row are found by slicing and indexing arrays.
+    """
+    def __init__(self, rows_by_step: dict[str, np.ndarray], num_rows_by_step: dict[str, int]):
+        self.rows_by_step = rows_by_step
+        self._order_by_step: dict[str, np.ndarray] = {}
+        self._starts_by_step: dict[str, np.ndarray] = {}
+        for step_name, rows in rows_by_step.items():
+            present = np.flatnonzero(rows >= 0)
+            self._order_by_step[step_name] = present[np.argsort(rows[present], kind="stable")]
+            starts = np.zeros(num_rows_by_step[step_name] + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows[present], minlength=num_rows_by_step[step_name]), out=starts[1:])
+            self._starts_by_step[step_name] = starts
+
+    def lineages_of(self, step_name: str, row: int) -> np.ndarray:
+        starts = self._starts_by_step[step_name]
+        return self._order_by_step[step_name][starts[row]:starts[row + 1]]
+
+    def related(self, step_name: str, row: int) -> dict[str, np.ndarray]:
+        """
+        For every step, the rows sharing a lineage with row `row` of `step_name`.
+        """
+        lineages = self.lineages_of(step_name, row)
+        related: dict[str, np.ndarray] = {}
+        for other_step_name, rows in self.rows_by_step.items():
+            other_rows = np.unique(rows[lineages])
+            related[other_step_name] = other_rows[other_rows >= 0]
+        return related
+
+
 class StepCard(ft.Container):
     def __init__(
         self,
@@ -195,6 +300,11 @@ class StepCard(ft.Container):
 
 
 class FilteredStepColumn(ft.Container):
+    """
+    Shows the filtered outputs of one step as cards, building only a window of them:
+    `page_size` cards at first, growing by `page_size` as the list is scrolled to its end,
+    up to `max_cards` (the oldest cards are then dropped).  The pager buttons move the window by a page.
+    """
     def __init__(
         self,
         page: ft.Page,
@@ -202,6 +312,8 @@ class FilteredStepColumn(ft.Container):
         step_Df: FilterableDf,
         fso_browser: "FullStepOutputBrowser",
         show_only_selected: bool = False,
+        page_size: int = 50,
+        max_cards: int = 200,
         expand=1,
     ):
         super().__init__(expand=expand)
@@ -209,9 +321,14 @@ class FilteredStepColumn(ft.Container):
         self.step_name = step_name
         self.step_Df = step_Df
         self.step_Df.callbacks.append(self.handle_step_Df_update)
-        self.selection_mask = np.zeros(len(step_Df.df0), dtype=bool)
+        self.selection_mask = np.zeros(len(step_Df), dtype=bool)
         self.fso_browser = fso_browser
         self._show_only_selected = show_only_selected
+        self.page_size = page_size
+        self.max_cards = max(max_cards, page_size)
+        self.window_start = 0
+        self.window_stop = 0
+        self.step_card_by_index: dict[int, StepCard] = {}
         self.do_build(update=False)
 
     def do_build(self, *args, update: bool = True) -> None:
@@ -227,11 +344,22 @@ class FilteredStepColumn(ft.Container):
             ],
         )
         self.larger_filters_container = ft.Container(filters_col)
-        self.steps_container = ft.Container(expand=1)
+        self.window_Text = ft.Text()
+        self.prev_button = ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, on_click=self.handle_prev_page)
+        self.next_button = ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, on_click=self.handle_next_page)
+        self.pager_row = ft.Row([self.prev_button, self.window_Text, self.next_button])
+        self.cards_list = ft.ListView(
+            spacing=1,
+            expand=1,
+            build_controls_on_demand=True,
+            on_scroll=self.handle_scroll,
+        )
+        self.steps_container = ft.Container(self.cards_list, expand=1)
         col = ft.Column(
             [
                 ft.Markdown(f"## {self.step_name}", selectable=True),
                 self.larger_filters_container,
+                self.pager_row,
                 self.steps_container,
             ],
             expand=1,
@@ -260,31 +388,55 @@ class FilteredStepColumn(ft.Container):
         )
         self.filters_container.content = filters_col
 
-        self.step_cards = [
-            StepCard(
-                full_step_output=full_step_output,
-                filtered_col=self,
-                index=i,
-            )
-            for i, full_step_output in self.step_Df.df["full_step_output"].items()
-        ]
-        controls = [
-            ft.Row(card)
-            for card in self.step_cards
-        ]
-        controls = list(Filler(ft.Divider).fill(controls))
-        col = ft.Column(
-            controls,
-            spacing=1,
-            expand=1,
-            scroll=ft.ScrollMode.ALWAYS,
-        )
-        self.steps_container.content = col
+        self.set_window(0, self.page_size, update=False)
 
         if update:
             self.filters_container.update()
+            self.pager_row.update()
             self.steps_container.update()
 
+    def set_window(self, start: int, stop: int, *, update: bool = True) -> None:
+        """
+        Show the filtered rows `start:stop`, reusing the cards already built for them.
+        """
+        num_rows = len(self.step_Df.indices)
+        stop = min(stop, num_rows)
+        start = max(0, min(start, stop))
+        self.window_start, self.window_stop = start, stop
+
+        indices = self.step_Df.indices[start:stop]
+        step_card_by_index: dict[int, StepCard] = {}
+        for i, full_step_output in zip(indices.tolist(), self.step_Df.fsos_at(indices)):
+            card = self.step_card_by_index.get(i)
+            if card is None:
+                card = StepCard(full_step_output=full_step_output, filtered_col=self, index=i)
+            step_card_by_index[i] = card
+        self.step_card_by_index = step_card_by_index
+
+        controls = [ft.Row([card]) for card in step_card_by_index.values()]
+        self.cards_list.controls = list(Filler(ft.Divider).fill(controls))
+        self.window_Text.value = f"{start + 1}-{stop} of {num_rows}" if num_rows else "No outputs"
+        self.prev_button.disabled = start == 0
+        self.next_button.disabled = stop >= num_rows
+        if update:
+            self.pager_row.update()
+            self.cards_list.update()
+
+    def handle_scroll(self, e: ft.OnScrollEvent) -> None:
+        if e.event_type != ft.ScrollType.END or self.window_stop >= len(self.step_Df.indices):
+            return
+        if e.pixels >= e.max_scroll_extent - e.viewport_dimension / 2:
+            stop = self.window_stop + self.page_size
+            self.set_window(max(self.window_start, stop - self.max_cards), stop)
+
+    def handle_prev_page(self, *args) -> None:
+        start = max(0, self.window_start - self.page_size)
+        self.set_window(start, start + self.page_size)
+
+    def handle_next_page(self, *args) -> None:
+        start = self.window_start + self.page_size
+        self.set_window(start, start + self.page_size)
+
     def handle_step_Df_update(self, *args) -> None:
         self.do_update()
 
@@ -304,27 +456,30 @@ class FilteredStepColumn(ft.Container):
 
     def set_is_selected(self, index: int, is_selected: bool) -> None:
         self.selection_mask[index] = is_selected
-        full_step_output = self.index_to_fso(index)
-        self.fso_browser.propagate_selected(full_step_output)
+        self.fso_browser.propagate_selected(self.step_name, index)
 
     def set_selected_fsos(self, full_step_outputs: Iterable[FullStepOutput], *, update: bool = True) -> None:
-        # prev_mask = self.selection_mask.copy()
-        indices = list(self.fsos_to_indices(full_step_outputs))
+        self.set_selected_indices(self.fsos_to_indices(full_step_outputs), update=update)
+
+    def set_selected_indices(self, indices: np.ndarray, *, update: bool = True) -> None:
+        prev_mask = self.selection_mask.copy()
         self.selection_mask[:] = False
         self.selection_mask[indices] = True
-        # self.do_update(update=update)
-        for step_card in self.step_cards:
-            step_card.do_update(update=update)
+        if self._show_only_selected:
+            self.step_Df.update(notify=False)
+            self.do_update(update=update)
+            return
+        # only the built cards whose selection changed need redrawing
+        for index in np.flatnonzero(prev_mask != self.selection_mask).tolist():
+            step_card = self.step_card_by_index.get(index)
+            if step_card is not None:
+                step_card.do_update(update=update)
 
     def index_to_fso(self, index: int) -> FullStepOutput:
-        return self.step_Df.df0.iloc[index]["full_step_output"]
+        return self.step_Df.fso_at(index)
 
-    def fsos_to_indices(self, full_step_outputs: Iterable[FullStepOutput]) -> list[int]:
-        df = self.step_Df.df0
-        s = df["full_step_output"]
-        fsos_set = set(full_step_outputs)
-        indices = s[s.isin(fsos_set)].index
-        return list(indices)
+    def fsos_to_indices(self, full_step_outputs: Iterable[FullStepOutput]) -> np.ndarray:
+        return self.step_Df.indices_of(full_step_outputs)
 
     def set_show_only_selected(self, show_only_selected: bool, *, update: bool = True) -> None:
         if self._show_only_selected == show_only_selected:
@@ -333,10 +488,9 @@ class FilteredStepColumn(ft.Container):
 
         label = "show_only_selected"
         if self._show_only_selected:
-            self.step_Df.mask_by_label[label] = self.selection_mask
+            self.step_Df.set_mask(label, self.selection_mask, notify=False)
         else:
-            self.step_Df.mask_by_label.pop(label, None)
-        self.step_Df.update(notify=False)
+            self.step_Df.remove_mask(label, notify=False)
 
         self.do_update(update=update)
 
@@ -348,7 +502,7 @@ class FullStepOutputBrowser(ft.Container):
     def __init__(
         self,
         page: ft.Page,
-        full_step_outputs: list[FullStepOutput],
+        full_step_outputs: Sequence[FullStepOutput],
         step_name: str,
         show_only_selected: bool = False,
         expand=1,
@@ -357,18 +511,14 @@ class FullStepOutputBrowser(ft.Container):
         self.the_page = page
         self.full_step_outputs = full_step_outputs
         self.step_name = step_name
-        self.df = FullStepOutput.list_to_df(full_step_outputs)
 
-        self.step_Df_by_step_name: dict[str, FilterableDf] = {}
+        if isinstance(full_step_outputs, LazyStepResults):
+            rows_by_step, step_Df_by_step_name = self.lazy_step_tables(full_step_outputs)
+        else:
+            rows_by_step, step_Df_by_step_name = self.step_tables(full_step_outputs)
+        self.step_Df_by_step_name = step_Df_by_step_name
         self.step_col_by_step_name: dict[str, FilteredStepColumn] = {}
-        for col in self.df.columns:
-            full_step_outputs: list[FullStepOutput] = list(self.df[col].unique())
-            if not isinstance(fso:=full_step_outputs[0], FullStepOutput):
-                raise AssertionError(f"{repr(fso)}")
-
-            step_df = full_step_output_list_to_exploded_df(full_step_outputs)
-            step_Df = FilterableDf(step_df)
-            self.step_Df_by_step_name[col] = step_Df
+        for col, step_Df in step_Df_by_step_name.items():
             step_col = FilteredStepColumn(
                 page=self.the_page,
                 step_name=col,
@@ -378,6 +528,11 @@ class FullStepOutputBrowser(ft.Container):
             )
             self.step_col_by_step_name[col] = step_col
 
+        self.lineage_index = LineageIndex(
+            rows_by_step,
+            {step_name: len(step_Df) for step_name, step_Df in self.step_Df_by_step_name.items()},
+        )
+
         step_cols = list(self.step_col_by_step_name.values())
         row = ft.Row(
             step_cols,
@@ -386,23 +541,143 @@ class FullStepOutputBrowser(ft.Container):
         )
         self.content = row
 
-    def propagate_selected(self, full_step_output: FullStepOutput) -> None:
-        df = self.df
-        df = df[df[full_step_output.step_name] == full_step_output]
-        for step_name in df.columns:
-            fsos_to_highlight = list(df[step_name].unique())
-            self.step_col_by_step_name[step_name].set_selected_fsos(fsos_to_highlight)
+    @staticmethod
+    def step_tables(full_step_outputs: list[FullStepOutput]) -> tuple[dict[str, np.ndarray], dict[str, FilterableDf]]:
+        """
+        For every step in the lineage of `full_step_outputs`: the row of each lineage in the step's table, and the table.
+        """
+        lineage_df = FullStepOutput.list_to_df(full_step_outputs)
+        rows_by_step: dict[str, np.ndarray] = {}
+        step_Df_by_step_name: dict[str, FilterableDf] = {}
+        for col in lineage_df.columns:
+            # FullStepOutputs hash by identity, so the codes are the row of each lineage's output in the step table
+            codes, uniques = pd.factorize(lineage_df[col])
+            step_outputs: list[FullStepOutput] = list(uniques)
+            if not isinstance(fso:=step_outputs[0], FullStepOutput):
+                raise AssertionError(f"{repr(fso)}")
+            rows_by_step[col] = codes.astype(np.int64, copy=False)
+            step_Df_by_step_name[col] = FilterableDf(full_step_output_list_to_exploded_df(step_outputs))
+        return rows_by_step, step_Df_by_step_name
+
+    @staticmethod
+    def lazy_step_tables(full_step_outputs: LazyStepResults) -> tuple[dict[str, np.ndarray], dict[str, FilterableDf]]:
+        """
+        Same as `step_tables`, from the stored lineage columns, with tables of the stored scalar fields:
+        no output is decoded until its card is shown.
+        """
+        step = full_step_outputs.step
+        row_indices = full_step_outputs.row_indices
+        stored_rows = {label: step.lineage[label][row_indices] for label in step.deps_labels}
+        stored_rows[step.step_name] = row_indices
+        reader = full_step_outputs.reader
+        rows_by_step: dict[str, np.ndarray] = {}
+        step_Df_by_step_name: dict[str, FilterableDf] = {}
+        for label, rows in stored_rows.items():
+            codes = np.full(len(rows), -1, dtype=np.int64)
+            present = rows >= 0
+            present_codes, uniques = pd.factorize(rows[present])
+            codes[present] = present_codes
+            rows_by_step[label] = codes
+            step_outputs = LazyStepResults(reader, reader.step(label), rows=np.asarray(uniques, dtype=np.int64))
+            step_Df_by_step_name[label] = FilterableDf(step_outputs.to_scalar_df(), step_outputs)
+        return rows_by_step, step_Df_by_step_name
+
+    def propagate_selected(self, step_name: str, index: int) -> None:
+        """
+        Select, in every step, the outputs sharing a lineage with output `index` of `step_name`.
+        """
+        for related_step_name, indices in self.lineage_index.related(step_name, index).items():
+            self.step_col_by_step_name[related_step_name].set_selected_indices(indices)
 
     def set_show_only_selected(self, show_only_selected: bool) -> None:
         for step_col in self.step_col_by_step_name.values():
             step_col.set_show_only_selected(show_only_selected)
 
 
+class SummaryPanel(ft.Container):
+    """
+    Summary table of one step's outputs (see `summarize`): counts, means of numeric fields
+    and string length distributions, per distinct value of the checked fields.
+    """
+    default_group_fields = ("model", "prompt_version")
+
+    def __init__(
+        self,
+        page: ft.Page,
+        step_name: str,
+        df: pd.DataFrame,
+        max_rows: int = 500,
+        expand=1,
+    ):
+        super().__init__(expand=expand)
+        self.the_page = page
+        self.step_name = step_name
+        self.df = df
+        self.max_rows = max_rows
+
+        self.group_Checkboxes = {
+            name: ft.Checkbox(
+                label=name,
+                value=name in self.default_group_fields,
+                on_change=self.handle_group_change,
+            )
+            for name in groupable_fields(df)
+        }
+        self.summary_Text = ft.Text()
+        self.table_container = ft.Container()
+        self.content = ft.Column(
+            [
+                ft.Markdown(f"## {self.step_name}", selectable=True),
+                ft.Row([ft.Text("Group by: "), *self.group_Checkboxes.values()], wrap=True),
+                self.summary_Text,
+                ft.Row([self.table_container], scroll=ft.ScrollMode.AUTO),
+            ],
+            scroll=ft.ScrollMode.AUTO,
+            expand=1,
+        )
+        self.do_update(update=False)
+
+    @property
+    def group_fields(self) -> list[str]:
+        return [name for name, checkbox in self.group_Checkboxes.items() if checkbox.value]
+
+    def do_update(self, *args, update: bool = True) -> None:
+        by = self.group_fields
+        summary = summarize(self.df, by)
+        shown = summary.iloc[:self.max_rows].reset_index() if by else summary
+        self.table_container.content = ft.DataTable(
+            columns=[
+                ft.DataColumn(label=ft.Text(name), numeric=name not in by)
+                for name in shown.columns
+            ],
+            rows=[
+                ft.DataRow(cells=[ft.DataCell(ft.Text(self.format_value(value))) for value in row])
+                for row in shown.itertuples(index=False)
+            ],
+        )
+        self.summary_Text.value = f"{len(self.df)} outputs"
+        if by:
+            self.summary_Text.value += f" in {len(summary)} groups"
+            if len(summary) > self.max_rows:
+                self.summary_Text.value += f" (showing the first {self.max_rows})"
+        if update:
+            self.update()
+
+    @staticmethod
+    def format_value(value: Any) -> str:
+        if isinstance(value, (float, np.floating)):
+            return "" if np.isnan(value) else f"{value:.4g}"
+        return str(value)
+
+    def handle_group_change(self, *args) -> None:
+        self.do_update()
+
+
 class ResultsViewer(ft.Container):
     def __init__(
         self,
         page: ft.Page,
-        results_dict: dict[str, list[FullStepOutput]],
+        results_dict: dict[str, Sequence[FullStepOutput]],
         expand=1,
     ):
         super().__init__(expand=expand)
@@ -419,6 +694,11 @@ class ResultsViewer(ft.Container):
             on_select=self.handle_dropdown_change,
         )
 
+        self.summary_switch = ft.Switch(
+            label="Summary",
+            value=True,
+            on_change=self.handle_dropdown_change,
+        )
         self.toggle_switch = ft.Switch(
                 label=f"Show only selected outputs",
                 on_change=self.handle_toggle_switch,
@@ -428,9 +708,12 @@ class ResultsViewer(ft.Container):
                 ft.Text("Browsing: "),
                 self.dropdown,
                 ft.Container(width=100),
+                self.summary_switch,
                 self.toggle_switch,
             ],
         )
+        self.fso_browser: FullStepOutputBrowser|None = None
+        self._summary_df_by_step_name: dict[str, pd.DataFrame] = {}
         self.view_container = ft.Container(
             expand=1,
         )
@@ -448,20 +731,51 @@ class ResultsViewer(ft.Container):
     def handle_dropdown_change(self, *args, update: bool = True) -> None:
         step_name = self.dropdown.value.strip()
         outputs = self.results_dict[step_name]
-        self.fso_browser = FullStepOutputBrowser(
-            page=self.the_page,
-            full_step_outputs=outputs,
-            step_name=step_name,
-            show_only_selected=self.toggle_switch.value,
-        )
-        self.view_container.content = self.fso_browser
+        self.toggle_switch.disabled = self.summary_switch.value
+        if self.summary_switch.value:
+            self.view_container.content = SummaryPanel(
+                page=self.the_page,
+                step_name=step_name,
+                df=self.summary_df(step_name),
+            )
+        else:
+            self.fso_browser = FullStepOutputBrowser(
+                page=self.the_page,
+                full_step_outputs=outputs,
+                step_name=step_name,
+                show_only_selected=self.toggle_switch.value,
+            )
+            self.view_container.content = self.fso_browser
 
         if update:
             self.update()
 
+    def add_step(self, step_name: str, outputs: Sequence[FullStepOutput], *, update: bool = True) -> None:
+        self.results_dict[step_name] = outputs
+        self.dropdown.options.append(ft.DropdownOption(key=step_name))
+        if update:
+            self.dropdown.update()
+
+    def summary_df(self, step_name: str) -> pd.DataFrame:
+        """
+        The output fields of a step, with strings as categoricals; built once per step,
+        straight from the stored columns for columnar results (see `LazyStepResults.to_scalar_df`).
+        """
+        df = self._summary_df_by_step_name.get(step_name)
+        if df is None:
+            outputs = self.results_dict[step_name]
+            if isinstance(outputs, LazyStepResults):
+                df = outputs.to_scalar_df()
+            else:
+                df = full_step_output_list_to_exploded_df(outputs).drop(columns=["full_step_output", "step_output"], errors="ignore")
+                df = as_categories(df)
+            self._summary_df_by_step_name[step_name] = df
+        return df
+
     def handle_toggle_switch(self, *args) -> None:
         value = self.toggle_switch.value
-        self.fso_browser.set_show_only_selected(value)
+        if self.fso_browser is not None:
+            self.fso_browser.set_show_only_selected(value)
 
 
 class MyTabs(ft.Tabs):
@@ -514,12 +828,70 @@ class MyTabs(ft.Tabs):
         self.length -= 1
 
 
+class ResultsLoader:
+    """
+    Reads saved results on a worker thread (`page.run_thread(loader.run)`), handing each step to `on_step`
+    as soon as it is read.  The steps of a columnar results directory are opened lazily (`LazyStepResults`),
+    so only the outputs that are shown get decoded; a dill file is read all at once.
+    After `cancel`, no further callback is made; a dill file cannot be interrupted, so its load
+    runs to its end and is then dropped.
+    """
+    def __init__(
+        self,
+        path: Path,
+        on_step: Callable[[str, Sequence[FullStepOutput], int, int|None], None],
+        on_done: Callable[[BaseException|None], None],
+    ):
+        self.path = path
+        self.on_step = on_step
+        self.on_done = on_done
+        self._cancelled = threading.Event()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def run(self) -> None:
+        error: BaseException|None = None
+        try:
+            num_steps = None
+            reader = None
+            if self.path.is_dir():
+                if not is_columnar_results(self.path):
+                    raise ValueError(f"{self.path.name} is not a columnar results directory")
+                reader = ResultsReader(self.path)
+                num_steps = len(reader)
+            for i, (step_name, outputs) in enumerate(self.iter_steps(reader)):
+                if self.is_cancelled:
+                    return
+                self.on_step(step_name, outputs, i + 1, num_steps)
+        except Exception as e:
+            error = e
+        if not self.is_cancelled:
+            self.on_done(error)
+
+    def iter_steps(self, reader: ResultsReader|None = None) -> Iterator[tuple[str, Sequence[FullStepOutput]]]:
+        if reader is not None:
+            yield from reader.items()
+            return
+        with self.path.open('rb') as fdill:
+            results_dict: dict[str, list[FullStepOutput]] = dill.load(fdill)
+        yield from results_dict.items()
+
+
 class ResultsBrowser(ft.Container):
     def __init__(self, page: ft.Page, root_dir: str|Path, expand=1):
         super().__init__(expand=expand)
         self.the_page = page
 
         self._has_results_view_tab = False
+        self.loader: ResultsLoader|None = None
+        self.results_viewer: ResultsViewer|None = None
+        # guards `loader` and the results tab against callbacks of a loader that was just replaced
+        self._load_lock = threading.Lock()
 
         self.root_dir = Path(root_dir)
         subdir_path = self.root_dir / "pipelines"
@@ -529,17 +901,25 @@ class ResultsBrowser(ft.Container):
             root_dir=self.root_dir,
             start_subdir=subdir,
             allow_files=True,
-            allow_dirs=False,
+            allow_dirs=True,
             file_exts={".dill"},
             on_pick=self.handle_file_pick,
         )
         self.picker_results_Text = ft.Text("Results file not yet chosen")
+        self.load_status_Text = ft.Text()
+        self.load_ProgressBar = ft.ProgressBar(width=200, visible=False)
+        self.cancel_button = ft.TextButton(
+            content=ft.Text("Cancel"),
+            on_click=self.handle_cancel_load,
+            visible=False,
+        )
 
         choose_results_tab_control = ft.Column(
             [
                 self.file_picker.view,
                 ft.Divider(),
                 self.picker_results_Text,
+                ft.Row([self.load_ProgressBar, self.load_status_Text, self.cancel_button]),
             ],
             expand=1,
         )
@@ -559,20 +939,80 @@ class ResultsBrowser(ft.Container):
         rel_path = pick_result.rel_path
         self.picker_results_Text.value = f"Chosen results file: {rel_path}"
 
-        with self.results_fpath.open('rb') as fdill:
-            results_dict: dict[str, list[FullStepOutput]] = dill.load(fdill)
-        self.results_viewer = ResultsViewer(page=self.the_page, results_dict=results_dict)
+        loader = ResultsLoader(
+            self.results_fpath,
+            on_step=lambda *args: self.handle_step_loaded(loader, *args),
+            on_done=lambda error: self.handle_load_done(loader, error),
+        )
+        with self._load_lock:
+            if self.loader is not None:
+                self.loader.cancel()
+            self.loader = loader
+            self.results_viewer = None
+            if self._has_results_view_tab:
+                self.mytabs.remove_tab()
+                self._has_results_view_tab = False
+            self.set_loading(True, "Loading...")
+        self.the_page.update()
+        self.the_page.run_thread(loader.run)
+
+    def handle_step_loaded(
+        self,
+        loader: ResultsLoader,
+        step_name: str,
+        outputs: Sequence[FullStepOutput],
+        num_loaded: int,
+        num_steps: int|None,
+    ) -> None:
+        # runs on the loader's thread; the first step's view is built there too, outside the lock
+        results_viewer = self.results_viewer
+        if results_viewer is None:
+            results_viewer = ResultsViewer(page=self.the_page, results_dict={step_name: outputs})
+        with self._load_lock:
+            if loader is not self.loader or loader.is_cancelled:
+                return
+            if self.results_viewer is None:
+                self.results_viewer = results_viewer
+                self.mytabs.add_tab(
+                    tab=ft.Tab(label="View results"),
+                    content=self.results_viewer,
+                )
+                self._has_results_view_tab = True
+            else:
+                self.results_viewer.add_step(step_name, outputs, update=False)
+            if num_steps is not None:
+                self.load_ProgressBar.value = num_loaded / num_steps
+                self.load_status_Text.value = f"Loaded {step_name} ({num_loaded}/{num_steps} steps)"
+            else:
+                self.load_status_Text.value = f"Loaded {step_name} ({num_loaded} steps)"
+        self.the_page.update()
 
-        if self._has_results_view_tab:
-            self.mytabs.remove_tab()
+    def handle_load_done(self, loader: ResultsLoader, error: BaseException|None) -> None:
+        # runs on the loader's thread
+        with self._load_lock:
+            if loader is not self.loader or loader.is_cancelled:
+                return
+            if error is None:
+                num_steps = len(self.results_viewer.results_dict) if self.results_viewer is not None else 0
+                self.set_loading(False, f"Loaded {num_steps} steps")
+            else:
+                self.set_loading(False, f"Failed to load results: {error}")
+        self.the_page.update()
 
-        self.mytabs.add_tab(
-            tab=ft.Tab(label="View results"),
-            content=self.results_viewer,
-        )
-        self._has_results_view_tab = True
+    def handle_cancel_load(self, *args) -> None:
+        with self._load_lock:
+            if self.loader is not None:
+                self.loader.cancel()
+            self.set_loading(False, "Loading cancelled")
         self.the_page.update()
 
+    def set_loading(self, is_loading: bool, status: str) -> None:
+        self.load_status_Text.value = status
+        self.load_ProgressBar.visible = is_loading
+        # indeterminate until the number of steps is known
+        self.load_ProgressBar.value = None
+        self.cancel_button.visible = is_loading
+
 
 def main(page: ft.Page):
     print("Building")
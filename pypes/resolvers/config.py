@@ -1,7 +1,9 @@
+import bisect
 import itertools
-from typing import Iterable
+import math
+from typing import Any, Iterable, Iterator, Sequence, overload
 
-from omegaconf import DictConfig, ListConfig
+from omegaconf import DictConfig, ListConfig, OmegaConf
 
 from ..core.mytyping import (
     ConfigType, SubConfigType,
@@ -11,19 +13,168 @@ from ..core.interface import PipelineStepInterface
 from ..utils.config import sub_config_to_dict
 
 
+class SubConfigExpansion(Sequence[StepInputBase]):
+    """
+    The proto-inputs of one sub-config, as a lazy sequence of known length.
+
+    Index `i` is decoded in mixed radix over the scan-value lists followed by the trial,
+    in the same order as nested loops over `itertools.product(...)` and `range(ntrials)`.
+    Slicing returns another lazy expansion, so ranges can be handed out without enumerating them.
+    """
+    def __init__(
+        self,
+        proto_input_type: type[StepInputBase],
+        config_dict0: dict[str, Any],
+        scan_vals: dict[str, list[Any]],
+        ntrials: int,
+        indices: range|None = None,
+    ):
+        super().__init__()
+        self.proto_input_type = proto_input_type
+        self.config_dict0 = config_dict0
+        self.scan_vals = scan_vals
+        self.ntrials = ntrials
+        self._radices = [len(vals) for vals in scan_vals.values()] + [ntrials]
+        self._indices = indices if indices is not None else range(math.prod(self._radices))
+
+    @classmethod
+    def from_sub_config(cls, sub_config: SubConfigType, proto_input_type: type[StepInputBase]) -> "SubConfigExpansion":
+        sub_config = sub_config_to_dict(sub_config).copy()
+        ntrials = sub_config.pop("ntrials", 1)
+        config_dict0 = {}
+        scan_vals = {}
+        for key, value in sub_config.items():
+            if isinstance(value, list):
+                scan_vals[key] = value
+                config_dict0[key] = None
+            else:
+                config_dict0[key] = value
+        return cls(
+            proto_input_type=proto_input_type,
+            config_dict0=config_dict0,
+            scan_vals=scan_vals,
+            ntrials=ntrials,
+        )
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    @overload
+    def __getitem__(self, index: int) -> StepInputBase: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "SubConfigExpansion": ...
+
+    def __getitem__(self, index: int|slice) -> "StepInputBase|SubConfigExpansion":
+        if isinstance(index, slice):
+            return type(self)(
+                proto_input_type=self.proto_input_type,
+                config_dict0=self.config_dict0,
+                scan_vals=self.scan_vals,
+                ntrials=self.ntrials,
+                indices=self._indices[index],
+            )
+        return self._make_input(self.config_dict_at(index))
+
+    def __iter__(self) -> Iterator[StepInputBase]:
+        for flat_index in self._indices:
+            yield self._make_input(self._decode(flat_index))
+
+    def config_dict_at(self, index: int) -> dict[str, Any]:
+        return self._decode(self._indices[index])
+
+    def _decode(self, flat_index: int) -> dict[str, Any]:
+        digits = []
+        for radix in reversed(self._radices):
+            flat_index, digit = divmod(flat_index, radix)
+            digits.append(digit)
+        *scan_digits, trial = reversed(digits)
+
+        config_dict = {
+            **dict(trial=trial),
+            **self.config_dict0,
+        }
+        for (key, vals), digit in zip(self.scan_vals.items(), scan_digits, strict=True):
+            config_dict[key] = vals[digit]
+        return config_dict
+
+    def _make_input(self, config_dict: dict[str, Any]) -> StepInputBase:
+        proto_input_type = self.proto_input_type
+        if issubclass(proto_input_type, DictConfig):
+            return proto_input_type(config_dict)
+        else:
+            return proto_input_type(**config_dict)
+
+
+class ConfigExpansion(Sequence[StepInputBase]):
+    """
+    Concatenation of the proto-inputs of all of a step's sub-configs.
+    """
+    def __init__(self, parts: list[Sequence[StepInputBase]]):
+        super().__init__()
+        self.parts = parts
+        self._offsets = list(itertools.accumulate((len(part) for part in parts), initial=0))
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    @overload
+    def __getitem__(self, index: int) -> StepInputBase: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[StepInputBase]: ...
+
+    def __getitem__(self, index: int|slice) -> StepInputBase|list[StepInputBase]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"index out of range for {type(self).__name__} of length {len(self)}")
+        ipart = bisect.bisect_right(self._offsets, index) - 1
+        return self.parts[ipart][index - self._offsets[ipart]]
+
+    def __iter__(self) -> Iterator[StepInputBase]:
+        for part in self.parts:
+            yield from part
+
+
 class ConfigResolver:
-    def __init__(self, step_name: str, proto_input_type: type[StepInputBase]):
+    """
+    Expands a step's sub-configs into proto-inputs.
+
+    Expansions are cached per sub-config for the duration of a run (see `clear_cache`),
+    so steps with many upstream rows resolve their config once rather than once per row.
+    With `reuse_inputs`, the proto-input objects themselves are cached and shared across rows;
+    DictConfig inputs are then made read-only, so this is only for steps that never mutate them.
+    """
+    def __init__(
+        self,
+        step_name: str,
+        proto_input_type: type[StepInputBase],
+        reuse_inputs: bool = False,
+    ):
         super().__init__()
         self.step_name = step_name
         self.proto_input_type = proto_input_type
+        self.reuse_inputs = reuse_inputs
+
+        # keyed on id(sub_config); the sub-config is kept alongside so that its id stays unique
+        self._expansion_cache: dict[int, tuple[SubConfigType, SubConfigExpansion]] = {}
+        self._inputs_cache: dict[int, tuple[SubConfigType, tuple[StepInputBase, ...]]] = {}
 
     @classmethod
-    def from_step(cls, step: PipelineStepInterface) -> "ConfigResolver":
+    def from_step(cls, step: PipelineStepInterface, **kwargs: Any) -> "ConfigResolver":
         return cls(
             step_name=step.step_name,
             proto_input_type=step.proto_input_type,
+            **kwargs,
         )
 
+    def clear_cache(self) -> None:
+        self._expansion_cache.clear()
+        self._inputs_cache.clear()
+
     def get_sub_configs(self, full_config: ConfigType) -> Iterable[SubConfigType]:
         proto_sub_config = full_config[self.step_name]
         if isinstance(proto_sub_config, ListConfig):
@@ -34,29 +185,29 @@ class ConfigResolver:
         else:
             raise NotImplementedError(type(proto_sub_config))  # pragma: no cover
 
-    def resolve_sub_config(self, sub_config: SubConfigType) -> Iterable[StepInputBase]:
-        proto_input_type = self.proto_input_type
-        sub_config = sub_config_to_dict(sub_config).copy()
-        ntrials = sub_config.pop("ntrials", 1)
-        config_dict0 = {}
-        scan_vals = {}
-        for key, value in sub_config.items():
-            if isinstance(value, list):
-                scan_vals[key] = value
-                config_dict0[key] = None
-            else:
-                config_dict0[key] = value
+    def expand(self, full_config: ConfigType) -> ConfigExpansion:
+        return ConfigExpansion([
+            self.resolve_sub_config(sub_config)
+            for sub_config in self.get_sub_configs(full_config)
+        ])
+
+    def resolve_sub_config(self, sub_config: SubConfigType) -> Sequence[StepInputBase]:
+        if not self.reuse_inputs:
+            return self._get_expansion(sub_config)
+
+        cached = self._inputs_cache.get(id(sub_config))
+        if cached is None or cached[0] is not sub_config:
+            inputs = tuple(self._get_expansion(sub_config))
+            for input in inputs:
+                if isinstance(input, DictConfig):
+                    OmegaConf.set_readonly(input, True)
+            cached = (sub_config, inputs)
+            self._inputs_cache[id(sub_config)] = cached
+        return cached[1]
 
-        keys_tup = tuple(scan_vals.keys())
-        for vals_tup in itertools.product(*scan_vals.values()):
-            for trial in range(ntrials):
-                config_dict = {
-                    **dict(trial=trial),
-                    **config_dict0,
-                }
-                for key, val in zip(keys_tup, vals_tup, strict=True):
-                    config_dict[key] = val
-                if issubclass(proto_input_type, DictConfig):
-                    yield proto_input_type(config_dict)
-                else:
-                    yield proto_input_type(**config_dict)
+    def _get_expansion(self, sub_config: SubConfigType) -> SubConfigExpansion:
+        cached = self._expansion_cache.get(id(sub_config))
+        if cached is None or cached[0] is not sub_config:
+            cached = (sub_config, SubConfigExpansion.from_sub_config(sub_config, self.proto_input_type))
+            self._expansion_cache[id(sub_config)] = cached
+        return cached[1]
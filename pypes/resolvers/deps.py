@@ -1,33 +1,143 @@
-from typing import Iterable
+import itertools
+import math
+from typing import Iterable, Iterator, Sequence, overload
+
+import pandas as pd
 
 from ..core.mytyping import (
     DepsSpecType,
     ResultsSpec,
     FullDepsDict,
+    GroupedFullDepsDict,
     FullStepOutput,
 )
 from ..utils.merging import merge_on_identity_intersection_or_cross
 
 
+class FullDepsDictProduct(Sequence[FullDepsDict]):
+    """
+    Lazy cartesian product of independent groups ("factors") of dependency rows.
+
+    Rows are yielded in the same order as a chain of cross joins of the factors,
+    i.e. the last factor varies fastest, but no combination is built until requested.
+    Memory stays proportional to the sum of the factor lengths rather than their product.
+    """
+    def __init__(self, factors: list[list[FullDepsDict]]):
+        super().__init__()
+        self._factors = factors
+        self._len = math.prod(len(factor) for factor in factors)
+
+    @property
+    def factors(self) -> list[list[FullDepsDict]]:
+        return list(self._factors)
+
+    def __len__(self) -> int:
+        return self._len
+
+    @overload
+    def __getitem__(self, index: int) -> FullDepsDict: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[FullDepsDict]: ...
+
+    def __getitem__(self, index: int|slice) -> FullDepsDict|list[FullDepsDict]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(self._len)[index]]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(f"index out of range for {type(self).__name__} of length {self._len}")
+
+        # mixed-radix decoding, last factor varying fastest
+        combo: list[FullDepsDict] = []
+        for factor in reversed(self._factors):
+            index, sub_index = divmod(index, len(factor))
+            combo.append(factor[sub_index])
+        return self._combine(reversed(combo))
+
+    def __iter__(self) -> Iterator[FullDepsDict]:
+        if len(self._factors) == 1:
+            yield from self._factors[0]
+            return
+        for combo in itertools.product(*self._factors):
+            yield self._combine(combo)
+
+    def _combine(self, combo: Iterable[FullDepsDict]) -> FullDepsDict:
+        combo = list(combo)
+        if len(combo) == 1:
+            return combo[0]
+        labels = tuple(label for full_deps_dict in combo for label in full_deps_dict.labels)
+        values = tuple(value for full_deps_dict in combo for value in full_deps_dict.values)
+        return FullDepsDict.from_items(labels, values)
+
+
 class DepsResolver:
-    def resolve_deps(self, deps_spec: DepsSpecType, prev_results: ResultsSpec) -> Iterable[FullDepsDict]:
+    def resolve_deps(self, deps_spec: DepsSpecType, prev_results: ResultsSpec) -> FullDepsDictProduct:
         if not deps_spec:
-            return [FullDepsDict({})]
+            return FullDepsDictProduct([[FullDepsDict({})]])
         if isinstance(deps_spec, str):
             deps_spec = [deps_spec]
 
-        unprocessed_deps: list[str] = list(reversed(deps_spec))
-
-        df0 = None
-        while unprocessed_deps:
-            dep = unprocessed_deps.pop()
+        # Deps sharing ancestors are merged eagerly on their intersection;
+        # independent groups are kept apart and only crossed lazily.
+        factor_dfs: list[pd.DataFrame] = []
+        for dep in deps_spec:
             df1 = FullStepOutput.list_to_df(prev_results[dep])
-            if df0 is None:
-                df0 = df1
-            else:
-                df0 = merge_on_identity_intersection_or_cross(
-                    df0,
-                    df1,
+            overlapping = [
+                i for i, df in enumerate(factor_dfs)
+                if not df.columns.intersection(df1.columns).empty
+            ]
+            if not overlapping:
+                factor_dfs.append(df1)
+                continue
+
+            df0 = factor_dfs[overlapping[0]]
+            for i in overlapping[1:]:
+                df0 = df0.merge(factor_dfs[i], how="cross")
+            factor_dfs[overlapping[0]] = merge_on_identity_intersection_or_cross(
+                df0,
+                df1,
+            )
+            for i in reversed(overlapping[1:]):
+                del factor_dfs[i]
+
+        return FullDepsDictProduct([
+            FullDepsDict.list_from_df(df)
+            for df in factor_dfs
+        ])
+
+    def resolve_grouped_deps(
+        self,
+        deps_spec: DepsSpecType,
+        group_by: str|None,
+        prev_results: ResultsSpec,
+    ) -> list[GroupedFullDepsDict]:
+        """
+        Group the rows of `resolve_deps` by the identity of their `group_by` ancestor, in one pass.
+
+        Groups keep the order in which their key first appears.
+        With `group_by=None`, all rows form a single group with an empty key.
+        """
+        rows = self.resolve_deps(deps_spec, prev_results)
+        if group_by is None:
+            return [GroupedFullDepsDict({}, members=rows)]
+
+        key_by_id: dict[int, FullDepsDict] = {}
+        members_by_id: dict[int, list[FullDepsDict]] = {}
+        for row in rows:
+            if group_by not in row:
+                raise ValueError(f"Cannot group by {group_by!r}; it is not an ancestor in deps {row.labels}")
+            key_output = row[group_by]
+            key_id = id(key_output)
+            if key_id not in key_by_id:
+                key_by_id[key_id] = FullDepsDict.from_items(
+                    (*key_output.deps.labels, group_by),
+                    (*key_output.deps.values, key_output),
                 )
+                members_by_id[key_id] = []
+            members_by_id[key_id].append(row)
 
-        return FullDepsDict.list_from_df(df0)
+        return [
+            GroupedFullDepsDict.from_key(key, members_by_id[key_id])
+            for key_id, key in key_by_id.items()
+        ]
@@ -0,0 +1,124 @@
+import os
+from pathlib import Path
+
+from ..core.mytyping import StepOutputBase
+from .segments import SegmentWriter, iter_segment, truncate_to_valid
+
+
+InputKey = tuple[int, int]  # (deps row index, input index within the row)
+ResumedOutput = tuple[str, StepOutputBase]  # (fingerprint of the input it was computed from, output)
+
+
+class StepCheckpoint:
+    """
+    Append-only log of one step's outputs as they are produced.
+
+    The segment starts with the step's `fingerprint` (its code and sub-config),
+    and each output is stored with the index of its deps row, its index among that row's inputs
+    and the fingerprint of its input and deps, which is enough to rebuild its lineage
+    from the (deterministic) deps rows on resume and to tell whether it is still up to date.
+    A final marker record is written once the step has finished, after rewriting the segment
+    without the records superseded by later ones (e.g. outputs recomputed on resume).
+    """
+    _HEADER = "header"
+    _OUTPUT = "output"
+    _COMPLETE = "complete"
+
+    def __init__(self, fpath: Path, fingerprint: str, flush_every: int = 1):
+        self.fpath = fpath
+        self.fingerprint = fingerprint
+        self.flush_every = flush_every
+        self._writer: SegmentWriter|None = None
+        self._is_complete = False
+        self._recorded: set[InputKey] = set()
+        self._has_superseded = False
+
+    def load(self) -> tuple[dict[InputKey, ResumedOutput], bool]:
+        """
+        The recorded outputs and whether the step had finished.
+        A segment written under another fingerprint is deleted and yields nothing.
+        """
+        outputs: dict[InputKey, ResumedOutput] = {}
+        is_complete = False
+        num_outputs = 0
+        for offset, record in iter_segment(self.fpath):
+            kind, *payload = record
+            if offset == 0 and (kind != self._HEADER or payload[0] != self.fingerprint):
+                self.clear()
+                return {}, False
+            if kind == self._OUTPUT:
+                row_index, input_index, input_fingerprint, output = payload
+                outputs[(row_index, input_index)] = (input_fingerprint, output)
+                num_outputs += 1
+                is_complete = False
+            elif kind == self._COMPLETE:
+                is_complete = True
+            elif kind != self._HEADER:
+                raise ValueError(f"Unknown checkpoint record kind {kind!r} in {self.fpath}")  # pragma: no cover
+        self._is_complete = is_complete
+        self._recorded = set(outputs)
+        self._has_superseded = num_outputs > len(outputs)
+        return outputs, is_complete
+
+    def clear(self) -> None:
+        self.close()
+        self.fpath.unlink(missing_ok=True)
+        self._is_complete = False
+        self._recorded = set()
+        self._has_superseded = False
+
+    def record_output(self, row_index: int, input_index: int, input_fingerprint: str, output: StepOutputBase) -> None:
+        self._get_writer().append((self._OUTPUT, row_index, input_index, input_fingerprint, output))
+        self._is_complete = False
+        key = (row_index, input_index)
+        self._has_superseded |= key in self._recorded
+        self._recorded.add(key)
+
+    def mark_complete(self) -> None:
+        if not self._is_complete:
+            if self._has_superseded:
+                self.close()
+                self._compact()
+            self._get_writer().append((self._COMPLETE,))
+            self._is_complete = True
+        self.close()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _compact(self) -> None:
+        """
+        Rewrite the segment with only the latest output record of each input.
+        """
+        latest: dict[InputKey, tuple] = {}
+        for _offset, record in iter_segment(self.fpath):
+            if record[0] == self._OUTPUT:
+                latest[(record[1], record[2])] = record
+        tmp_path = self.fpath.with_name(f"{self.fpath.name}.tmp")
+        with SegmentWriter(tmp_path, flush_every=len(latest) + 1) as writer:
+            writer.append((self._HEADER, self.fingerprint))
+            for record in latest.values():
+                writer.append(record)
+        os.replace(tmp_path, self.fpath)
+        self._has_superseded = False
+
+    def _get_writer(self) -> SegmentWriter:
+        if self._writer is None:
+            # drop a torn record left behind by a crash before appending after it
+            truncate_to_valid(self.fpath)
+            is_new = not self.fpath.exists() or self.fpath.stat().st_size == 0
+            self._writer = SegmentWriter(self.fpath, flush_every=self.flush_every)
+            if is_new:
+                self._writer.append((self._HEADER, self.fingerprint))
+        return self._writer
+
+
+class CheckpointStore:
+    def __init__(self, checkpoint_dir: Path, flush_every: int = 1):
+        self.checkpoint_dir = checkpoint_dir
+        self.flush_every = flush_every
+
+    def for_step(self, step_name: str, fingerprint: str) -> StepCheckpoint:
+        return StepCheckpoint(self.checkpoint_dir / f"{step_name}.seg", fingerprint, flush_every=self.flush_every)
@@ -0,0 +1,557 @@
+"""
+Columnar results format: one directory per step, so that a step or a few of its columns can be
+read without deserializing the rest.
+
+    <results_dir>/manifest.json            format version and step names, ancestors first
+    <results_dir>/<step>/meta.json         row count, lineage labels, column kinds
+    <results_dir>/<step>/output_type.dill  the output model class (pydantic outputs only)
+    <results_dir>/<step>/columns/          one file (or pair of files) per output field
+    <results_dir>/<step>/lineage/<label>.npy   row index of each row's `label` ancestor (-1 if none)
+    <results_dir>/<step>/members/          lineage of the member rows of grouped steps
+    <results_dir>/<step>/indexes/          secondary indexes over the scalar columns (see `indexes`)
+    <results_dir>/<step>/hashes/           content hash and lineage key of each output (see `hashes`)
+
+Output fields are stored as NumPy arrays when they are numeric or boolean,
+as a string table plus integer codes when they are strings, and otherwise as a segment of dill records
+(with their offsets) so that single values can be read on their own.
+Steps whose outputs are not all instances of one pydantic model get a single object column.
+"""
+from functools import cached_property
+from pathlib import Path
+import json
+import mmap
+from typing import Any, Iterable, Iterator, Sequence
+
+import dill
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from ..core.mytyping import (
+    ResultsSpec,
+    FullDepsDict,
+    GroupedFullDepsDict,
+    FullStepOutput,
+    StepOutputBase,
+)
+from ..utils.pydantic_utils import get_fields_dict
+from .hashes import HASH_DTYPE, content_hash, lineage_keys
+from .indexes import ColumnIndex, HashIndex, SortedIndex
+from .segments import SegmentWriter, iter_segment, read_record_from_buffer
+
+
+FORMAT_NAME = "pypes-columnar"
+FORMAT_VERSION = 1
+OUTPUT_COLUMN = "__output__"
+INDEXED_KINDS = ("bool", "int64", "float64", "string")
+
+
+def is_columnar_results(path: Path) -> bool:
+    return (path / "manifest.json").is_file()
+
+
+def write_columnar_results(
+    results: ResultsSpec,
+    results_dir: Path,
+    input_fields: dict[str, list[str]]|None = None,
+) -> None:
+    """
+    Write `results` in the columnar format.  Ancestors that are only reachable through lineage
+    (e.g. released steps) are written as steps of their own.
+    `input_fields` names the input fields of each step, which identify outputs across runs.
+    """
+    steps = collect_lineage_steps(results)
+    input_fields = input_fields or {}
+    results_dir.mkdir(exist_ok=True, parents=True)
+    row_index_by_step: dict[str, dict[int, int]] = {}
+    keys_by_step: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+    for step_name, full_step_outputs in steps.items():
+        keys_by_step[step_name] = write_columnar_step(
+            results_dir / step_name,
+            full_step_outputs,
+            row_index_by_step,
+            keys_by_step,
+            input_fields.get(step_name, ()),
+        )
+        row_index_by_step[step_name] = {id(fso): i for i, fso in enumerate(full_step_outputs)}
+    _write_json(results_dir / "manifest.json", dict(
+        format=FORMAT_NAME,
+        version=FORMAT_VERSION,
+        steps=list(steps.keys()),
+    ))
+
+
+def collect_lineage_steps(results: ResultsSpec) -> dict[str, list[FullStepOutput]]:
+    """
+    The steps of `results` together with any ancestor steps reachable only through lineage,
+    ordered so that every step comes after the steps it depends on.
+    """
+    steps: dict[str, list[FullStepOutput]] = {name: list(fsos) for name, fsos in results.items()}
+    deps_labels: dict[str, list[str]] = {}
+    frontier = list(steps.keys())
+    while frontier:
+        extra: dict[str, dict[int, FullStepOutput]] = {}
+        for step_name in frontier:
+            labels: dict[str, None] = {}
+            for fso in steps[step_name]:
+                for deps in _deps_rows(fso.deps):
+                    for label, upstream in deps.items():
+                        labels[label] = None
+                        if label not in steps:
+                            extra.setdefault(label, {})[id(upstream)] = upstream
+            deps_labels[step_name] = list(labels)
+        for label, by_id in extra.items():
+            steps[label] = list(by_id.values())
+        frontier = list(extra.keys())
+
+    ordered: dict[str, list[FullStepOutput]] = {}
+
+    def visit(step_name: str) -> None:
+        if step_name in ordered:
+            return
+        for label in deps_labels[step_name]:
+            visit(label)
+        ordered[step_name] = steps[step_name]
+
+    for step_name in steps:
+        visit(step_name)
+    return ordered
+
+
+def write_columnar_step(
+    step_dir: Path,
+    full_step_outputs: list[FullStepOutput],
+    row_index_by_step: dict[str, dict[int, int]],
+    keys_by_step: dict[str, tuple[np.ndarray, np.ndarray]],
+    input_fields: Iterable[str] = (),
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Write one step and return the lineage and position keys of its outputs.
+    `row_index_by_step` maps the id of every ancestor output to its row in its own step,
+    and `keys_by_step` holds the lineage keys of the ancestor steps.
+    """
+    (step_dir / "columns").mkdir(exist_ok=True, parents=True)
+
+    outputs = [fso.output for fso in full_step_outputs]
+    output_type = _common_model_type(outputs)
+    if output_type is not None:
+        with open(step_dir / "output_type.dill", 'wb') as fdill:
+            dill.dump(output_type, fdill)
+        field_values: dict[str, list[Any]] = {name: [] for name in output_type.model_fields}
+        for output in outputs:
+            for name, value in get_fields_dict(output).items():
+                field_values[name].append(value)
+    else:
+        field_values = {OUTPUT_COLUMN: outputs}
+    columns = {
+        name: write_column(step_dir / "columns", name, values)
+        for name, values in field_values.items()
+    }
+    indexes = {
+        name: write_column_index(step_dir, name, kind)
+        for name, kind in columns.items()
+        if kind in INDEXED_KINDS
+    }
+
+    deps_labels = _labels(fso.deps for fso in full_step_outputs)
+    lineage = write_lineage(step_dir / "lineage", [fso.deps for fso in full_step_outputs], deps_labels, row_index_by_step)
+
+    (step_dir / "hashes").mkdir(exist_ok=True)
+    np.save(step_dir / "hashes" / "content.npy", np.array([content_hash(output) for output in outputs], dtype=HASH_DTYPE))
+    keys = lineage_keys(step_dir.name, outputs, keys_by_step, lineage, input_fields)
+    np.save(step_dir / "hashes" / "lineage.npy", keys[0])
+    np.save(step_dir / "hashes" / "position.npy", keys[1])
+
+    grouped = any(isinstance(fso.deps, GroupedFullDepsDict) for fso in full_step_outputs)
+    member_labels: list[str] = []
+    if grouped:
+        members_by_row = [_members(fso.deps) for fso in full_step_outputs]
+        offsets = np.zeros(len(members_by_row) + 1, dtype=np.int64)
+        np.cumsum([len(members) for members in members_by_row], out=offsets[1:])
+        flat_members = [member for members in members_by_row for member in members]
+        member_labels = _labels(flat_members)
+        (step_dir / "members").mkdir(exist_ok=True)
+        np.save(step_dir / "members" / "offsets.npy", offsets)
+        write_lineage(step_dir / "members", flat_members, member_labels, row_index_by_step)
+
+    _write_json(step_dir / "meta.json", dict(
+        num_rows=len(full_step_outputs),
+        deps_labels=deps_labels,
+        grouped=grouped,
+        member_labels=member_labels,
+        output_kind="pydantic" if output_type is not None else "object",
+        columns=columns,
+        indexes=indexes,
+    ))
+    return keys
+
+
+def write_lineage(
+    lineage_dir: Path,
+    rows: list[FullDepsDict],
+    labels: list[str],
+    row_index_by_step: dict[str, dict[int, int]],
+) -> dict[str, np.ndarray]:
+    lineage_dir.mkdir(exist_ok=True, parents=True)
+    lineage: dict[str, np.ndarray] = {}
+    for label in labels:
+        row_index = row_index_by_step[label]
+        lineage[label] = np.fromiter(
+            (row_index[id(deps[label])] if label in deps else -1 for deps in rows),
+            dtype=np.int64,
+            count=len(rows),
+        )
+        np.save(lineage_dir / f"{label}.npy", lineage[label])
+    return lineage
+
+
+def write_column(columns_dir: Path, name: str, values: list[Any]) -> str:
+    """
+    Write one column and return its kind.
+    """
+    kind = column_kind(values)
+    if kind == "string":
+        table: dict[str, int] = {}
+        codes = np.fromiter((table.setdefault(value, len(table)) for value in values), dtype=np.int32, count=len(values))
+        np.save(columns_dir / f"{name}.codes.npy", codes)
+        _write_json(columns_dir / f"{name}.table.json", list(table))
+    elif kind == "object":
+        with SegmentWriter(columns_dir / f"{name}.seg", flush_every=len(values) or 1) as writer:
+            offsets = np.fromiter((writer.append(value) for value in values), dtype=np.int64, count=len(values))
+        np.save(columns_dir / f"{name}.offsets.npy", offsets)
+    else:
+        np.save(columns_dir / f"{name}.npy", np.array(values, dtype=kind))
+    return kind
+
+
+def write_column_index(step_dir: Path, name: str, kind: str) -> str:
+    """
+    Build and write the index of a scalar column that was just written, and return its kind.
+    """
+    columns_dir = step_dir / "columns"
+    index_dir = step_dir / "indexes"
+    index_dir.mkdir(exist_ok=True)
+    if kind == "string":
+        with open(columns_dir / f"{name}.table.json", 'r', encoding="utf-8") as fjson:
+            table = json.load(fjson)
+        index: ColumnIndex = HashIndex.build(table, np.load(columns_dir / f"{name}.codes.npy"))
+    else:
+        index = SortedIndex.build(np.load(columns_dir / f"{name}.npy"))
+    index.save(index_dir, name)
+    return index.kind
+
+
+_INT64_MIN, _INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+
+def column_kind(values: list[Any]) -> str:
+    types = {type(value) for value in values}
+    if not types:
+        return "object"
+    if types == {bool}:
+        return "bool"
+    if types == {int}:
+        # ints beyond int64 keep their exact value as objects
+        return "int64" if all(_INT64_MIN <= value <= _INT64_MAX for value in values) else "object"
+    if types == {float}:
+        return "float64"
+    if types == {str}:
+        return "string"
+    return "object"
+
+
+class ObjectColumn(Sequence[Any]):
+    """
+    A column of dill records, each decoded from a memory map of the segment when accessed.
+    """
+    def __init__(self, fpath: Path, offsets: np.ndarray):
+        self.fpath = fpath
+        self.offsets = offsets
+        self._mmap: mmap.mmap|None = None
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, row: int) -> Any:
+        offset = int(self.offsets[row])
+        if self._mmap is None:
+            with open(self.fpath, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return read_record_from_buffer(self._mmap, offset)
+
+    def __iter__(self) -> Iterator[Any]:
+        for _offset, value in iter_segment(self.fpath):
+            yield value
+
+
+class ColumnarStep:
+    """
+    Read access to one step of a columnar results directory; columns are loaded on first use.
+    """
+    def __init__(self, step_dir: Path):
+        self.step_dir = step_dir
+        with open(step_dir / "meta.json", 'r', encoding="utf-8") as fjson:
+            self.meta: dict[str, Any] = json.load(fjson)
+        self._columns: dict[str, np.ndarray|ObjectColumn] = {}
+        self._string_columns: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._indexes: dict[str, ColumnIndex|None] = {}
+
+    @property
+    def step_name(self) -> str:
+        return self.step_dir.name
+
+    @property
+    def num_rows(self) -> int:
+        return self.meta["num_rows"]
+
+    @property
+    def column_names(self) -> list[str]:
+        return list(self.meta["columns"])
+
+    @property
+    def deps_labels(self) -> list[str]:
+        return self.meta["deps_labels"]
+
+    @property
+    def is_grouped(self) -> bool:
+        return self.meta["grouped"]
+
+    @property
+    def member_labels(self) -> list[str]:
+        return self.meta["member_labels"]
+
+    @cached_property
+    def output_type(self) -> type[BaseModel]|None:
+        if self.meta["output_kind"] != "pydantic":
+            return None
+        with open(self.step_dir / "output_type.dill", 'rb') as fdill:
+            return dill.load(fdill)
+
+    def column(self, name: str) -> np.ndarray|ObjectColumn:
+        if name not in self._columns:
+            self._columns[name] = self._read_column(name)
+        return self._columns[name]
+
+    def _read_column(self, name: str) -> np.ndarray|ObjectColumn:
+        kind = self.meta["columns"].get(name)
+        if kind is None:
+            raise KeyError(f"Step {self.step_name} has no column {name!r}")
+        columns_dir = self.step_dir / "columns"
+        if kind == "string":
+            codes, table = self.string_column(name)
+            return table[codes] if len(table) else np.array([], dtype=object)
+        if kind == "object":
+            return ObjectColumn(columns_dir / f"{name}.seg", np.load(columns_dir / f"{name}.offsets.npy"))
+        return np.load(columns_dir / f"{name}.npy", mmap_mode='r')
+
+    def string_column(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The integer codes and the table of distinct values of a string column.
+        """
+        if name not in self._string_columns:
+            columns_dir = self.step_dir / "columns"
+            with open(columns_dir / f"{name}.table.json", 'r', encoding="utf-8") as fjson:
+                table = np.array(json.load(fjson), dtype=object)
+            self._string_columns[name] = np.load(columns_dir / f"{name}.codes.npy", mmap_mode='r'), table
+        return self._string_columns[name]
+
+    def index(self, name: str) -> ColumnIndex|None:
+        """
+        The index of a column, if one was written.
+        """
+        if name not in self._indexes:
+            index_kind = self.meta.get("indexes", {}).get(name)
+            index_dir = self.step_dir / "indexes"
+            if index_kind == HashIndex.kind:
+                self._indexes[name] = HashIndex.load(index_dir, name, self.string_column(name)[1])
+            elif index_kind == SortedIndex.kind:
+                self._indexes[name] = SortedIndex.load(index_dir, name)
+            else:
+                self._indexes[name] = None
+        return self._indexes[name]
+
+    def value(self, name: str, row: int) -> Any:
+        """
+        One value of a column, without decoding the rest of a string column.
+        """
+        if name not in self._columns and self.meta["columns"].get(name) == "string":
+            codes, table = self.string_column(name)
+            return table[codes[row]]
+        return _to_python(self.column(name)[row])
+
+    @cached_property
+    def content_hashes(self) -> np.ndarray:
+        return np.load(self.step_dir / "hashes" / "content.npy")
+
+    @cached_property
+    def lineage_keys(self) -> np.ndarray:
+        return np.load(self.step_dir / "hashes" / "lineage.npy")
+
+    @cached_property
+    def position_keys(self) -> np.ndarray:
+        return np.load(self.step_dir / "hashes" / "position.npy")
+
+    @cached_property
+    def lineage(self) -> dict[str, np.ndarray]:
+        return {label: np.load(self.step_dir / "lineage" / f"{label}.npy") for label in self.deps_labels}
+
+    @cached_property
+    def members(self) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """
+        Row offsets into the flat member arrays, and the flat member lineage by label.
+        """
+        members_dir = self.step_dir / "members"
+        offsets = np.load(members_dir / "offsets.npy")
+        return offsets, {label: np.load(members_dir / f"{label}.npy") for label in self.member_labels}
+
+    def output_at(self, row: int, columns: Iterable[str]|None = None) -> StepOutputBase:
+        """
+        Rebuild the output of one row; with `columns`, a pydantic output holds only those fields.
+        """
+        if self.output_type is None:
+            return self.column(OUTPUT_COLUMN)[row]
+        names = self.column_names if columns is None else list(columns)
+        fields = {name: self.value(name, row) for name in names}
+        return self.output_type.model_construct(**fields)
+
+    def take(self, name: str, rows: np.ndarray|None = None) -> np.ndarray|list[Any]:
+        """
+        The values of a column, for all rows or only for `rows`.
+        """
+        column = self.column(name)
+        if isinstance(column, ObjectColumn):
+            return list(column) if rows is None else [column[row] for row in rows]
+        return column if rows is None else column[rows]
+
+    def to_df(self, columns: Iterable[str]|None = None, rows: np.ndarray|None = None) -> pd.DataFrame:
+        names = self.column_names if columns is None else list(columns)
+        return pd.DataFrame({name: self.take(name, rows) for name in names})
+
+
+def read_columnar_results(results_dir: Path, steps: Iterable[str]|None = None) -> ResultsSpec:
+    """
+    Materialize a columnar results directory, restoring shared lineage.
+    With `steps`, only those steps are returned (their ancestors are still read to rebuild lineage).
+    """
+    manifest = read_manifest(results_dir)
+    wanted = set(manifest["steps"] if steps is None else steps)
+    unknown = wanted - set(manifest["steps"])
+    if unknown:
+        raise KeyError(f"Unknown steps {sorted(unknown)} in {results_dir}")
+
+    columnar_steps = {name: ColumnarStep(results_dir / name) for name in manifest["steps"]}
+    needed: set[str] = set()
+    stack = list(wanted)
+    while stack:
+        name = stack.pop()
+        if name not in needed:
+            needed.add(name)
+            stack.extend(columnar_steps[name].deps_labels)
+            stack.extend(columnar_steps[name].member_labels)
+
+    materialized: dict[str, list[FullStepOutput]] = {}
+    for name in manifest["steps"]:
+        if name in needed:
+            materialized[name] = _materialize_step(columnar_steps[name], materialized)
+    return {name: fsos for name, fsos in materialized.items() if name in wanted}
+
+
+def iter_columnar_results(results_dir: Path) -> Iterator[tuple[str, list[FullStepOutput]]]:
+    """
+    Materialize a columnar results directory one step at a time, ancestors first,
+    so that a consumer can use each step before the next one is read.
+    """
+    manifest = read_manifest(results_dir)
+    materialized: dict[str, list[FullStepOutput]] = {}
+    for name in manifest["steps"]:
+        materialized[name] = _materialize_step(ColumnarStep(results_dir / name), materialized)
+        yield name, materialized[name]
+
+
+def read_manifest(results_dir: Path) -> dict[str, Any]:
+    with open(results_dir / "manifest.json", 'r', encoding="utf-8") as fjson:
+        manifest = json.load(fjson)
+    if manifest.get("format") != FORMAT_NAME:
+        raise ValueError(f"{results_dir} is not a {FORMAT_NAME} results directory")
+    if manifest["version"] > FORMAT_VERSION:
+        raise ValueError(f"{results_dir} has format version {manifest['version']}; this reader supports {FORMAT_VERSION}")
+    return manifest
+
+
+def _materialize_step(step: ColumnarStep, materialized: dict[str, list[FullStepOutput]]) -> list[FullStepOutput]:
+    deps_by_key: dict[tuple[int, ...], FullDepsDict] = {}
+
+    def make_deps(labels: list[str], lineage: dict[str, np.ndarray], i: int) -> FullDepsDict:
+        key = tuple(int(lineage[label][i]) for label in labels)
+        deps = deps_by_key.get(key)
+        if deps is None:
+            present = [(label, row) for label, row in zip(labels, key) if row >= 0]
+            deps = FullDepsDict.from_items(
+                tuple(label for label, _ in present),
+                tuple(materialized[label][row] for label, row in present),
+            )
+            deps_by_key[key] = deps
+        return deps
+
+    lineage = step.lineage
+    outputs = [step.output_at(i) for i in range(step.num_rows)]
+    if step.is_grouped:
+        offsets, member_lineage = step.members
+        full_deps_dicts: list[FullDepsDict] = []
+        for i in range(step.num_rows):
+            key = make_deps(step.deps_labels, lineage, i)
+            members = [
+                make_deps(step.member_labels, member_lineage, j)
+                for j in range(offsets[i], offsets[i + 1])
+            ]
+            full_deps_dicts.append(GroupedFullDepsDict.from_key(key, members))
+    else:
+        full_deps_dicts = [make_deps(step.deps_labels, lineage, i) for i in range(step.num_rows)]
+
+    return [
+        FullStepOutput(deps=deps, output=output, step_name=step.step_name)
+        for deps, output in zip(full_deps_dicts, outputs)
+    ]
+
+
+def _deps_rows(deps: FullDepsDict) -> list[FullDepsDict]:
+    return [deps, *_members(deps)]
+
+
+def _members(deps: FullDepsDict) -> tuple[FullDepsDict, ...]:
+    if isinstance(deps, GroupedFullDepsDict):
+        return deps.members
+    return ()
+
+
+def _labels(rows: Iterable[FullDepsDict]) -> list[str]:
+    labels: dict[str, None] = {}
+    seen: set[int] = set()
+    for deps in rows:
+        # rows typically share one interned label tuple
+        if id(deps.labels) not in seen:
+            seen.add(id(deps.labels))
+            labels.update(dict.fromkeys(deps.labels))
+    return list(labels)
+
+
+def _common_model_type(outputs: list[Any]) -> type[BaseModel]|None:
+    if not outputs:
+        return None
+    output_type = type(outputs[0])
+    if not issubclass(output_type, BaseModel):
+        return None
+    if any(type(output) is not output_type for output in outputs):
+        return None
+    return output_type
+
+
+def _to_python(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _write_json(fpath: Path, obj: Any) -> None:
+    with open(fpath, 'w', encoding="utf-8") as fjson:
+        json.dump(obj, fjson, indent=4)
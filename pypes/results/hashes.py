@@ -0,0 +1,69 @@
+"""
+Per-output hashes stored with columnar results, used to compare runs.
+
+The content hash identifies what an output holds.  The lineage key identifies which output it is,
+independently of its content: it combines the step name, the lineage keys of its deps row,
+the values of its input fields found on the output, and its ordinal among outputs sharing all of these.
+The position key does the same without the input values, so it survives a change of config value.
+"""
+from typing import Any, Iterable
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..core.mytyping import StepOutputBase
+from ..utils.hashing import myhash, stable_hash
+
+
+HASH_DTYPE = np.dtype("S32")
+
+
+def content_hash(output: StepOutputBase) -> bytes:
+    return bytes.fromhex(stable_hash(output))
+
+
+def lineage_keys(
+    step_name: str,
+    outputs: list[StepOutputBase],
+    parent_keys: dict[str, tuple[np.ndarray, np.ndarray]],
+    parent_rows: dict[str, np.ndarray],
+    input_fields: Iterable[str] = (),
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The lineage keys and position keys of the outputs of one step,
+    given those of the parent steps and the parent rows of each output (-1 if none).
+
+    Position keys leave out the input values, so they identify an output by its place in the lineage only.
+    """
+    labels = sorted(parent_rows)
+    input_fields = list(input_fields)
+    keys = np.empty(len(outputs), dtype=HASH_DTYPE)
+    position_keys = np.empty(len(outputs), dtype=HASH_DTYPE)
+    ordinals: dict[str, int] = {}
+    for i, output in enumerate(outputs):
+        rows = [(label, parent_rows[label][i]) for label in labels]
+        parents = tuple((label, parent_keys[label][0][row] if row >= 0 else None) for label, row in rows)
+        positions = tuple((label, parent_keys[label][1][row] if row >= 0 else None) for label, row in rows)
+        inputs = tuple(_field_value(output, name) for name in input_fields)
+        keys[i] = _keyed_ordinal(ordinals, str((step_name, parents, inputs)))
+        position_keys[i] = _keyed_ordinal(ordinals, str((step_name, positions)))
+    return keys, position_keys
+
+
+def input_field_names(input_type: type) -> list[str]:
+    if isinstance(input_type, type) and issubclass(input_type, BaseModel):
+        return list(input_type.model_fields)
+    return []
+
+
+def _field_value(output: Any, name: str) -> str:
+    return stable_hash(getattr(output, name, None))
+
+
+def _keyed_ordinal(ordinals: dict[str, int], slot: str) -> bytes:
+    """
+    Hash of `slot` and the number of times it was seen before, so that keys are unique within a step.
+    """
+    ordinal = ordinals.get(slot, 0)
+    ordinals[slot] = ordinal + 1
+    return bytes.fromhex(myhash(f"{slot}:{ordinal}"))
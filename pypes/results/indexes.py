@@ -0,0 +1,91 @@
+"""
+Secondary indexes over the scalar columns of a columnar step, built when the step is written.
+
+String columns get a hash index: the rows grouped by string code, so that the rows holding a value
+are one slice.  Numeric and boolean columns get a sorted index: the row order that sorts the column,
+along with the sorted values, searched by bisection.
+Lookups return ascending row indices.
+"""
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+
+
+class HashIndex:
+    kind = "hash"
+
+    def __init__(self, table: dict[Any, int], rows: np.ndarray, starts: np.ndarray):
+        self.table = table
+        self.rows = rows
+        self.starts = starts
+
+    @classmethod
+    def build(cls, table: Iterable[Any], codes: np.ndarray) -> "HashIndex":
+        table = {value: code for code, value in enumerate(table)}
+        rows = np.argsort(codes, kind="stable")
+        starts = np.zeros(len(table) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(table)), out=starts[1:])
+        return cls(table, rows, starts)
+
+    def save(self, index_dir: Path, name: str) -> None:
+        np.save(index_dir / f"{name}.rows.npy", self.rows)
+        np.save(index_dir / f"{name}.starts.npy", self.starts)
+
+    @classmethod
+    def load(cls, index_dir: Path, name: str, table: Iterable[Any]) -> "HashIndex":
+        return cls(
+            {value: code for code, value in enumerate(table)},
+            np.load(index_dir / f"{name}.rows.npy", mmap_mode='r'),
+            np.load(index_dir / f"{name}.starts.npy"),
+        )
+
+    def lookup(self, values: Iterable[Any]) -> np.ndarray:
+        codes = {self.table[value] for value in values if isinstance(value, str) and value in self.table}
+        return _sorted_union(self.rows[self.starts[code]:self.starts[code + 1]] for code in codes)
+
+
+class SortedIndex:
+    kind = "sorted"
+
+    def __init__(self, rows: np.ndarray, sorted_values: np.ndarray):
+        self.rows = rows
+        self.sorted_values = sorted_values
+
+    @classmethod
+    def build(cls, values: np.ndarray) -> "SortedIndex":
+        rows = np.argsort(values, kind="stable")
+        return cls(rows, values[rows])
+
+    def save(self, index_dir: Path, name: str) -> None:
+        np.save(index_dir / f"{name}.rows.npy", self.rows)
+        np.save(index_dir / f"{name}.sorted.npy", self.sorted_values)
+
+    @classmethod
+    def load(cls, index_dir: Path, name: str) -> "SortedIndex":
+        return cls(
+            np.load(index_dir / f"{name}.rows.npy", mmap_mode='r'),
+            np.load(index_dir / f"{name}.sorted.npy", mmap_mode='r'),
+        )
+
+    def lookup(self, values: Iterable[Any]) -> np.ndarray:
+        numbers = {value for value in values if isinstance(value, (int, float, np.number, np.bool_))}
+        return _sorted_union(self.between(value, value) for value in numbers)
+
+    def between(self, low: Any, high: Any) -> np.ndarray:
+        """
+        Rows whose value lies in `[low, high]`.
+        """
+        start = np.searchsorted(self.sorted_values, low, side="left")
+        stop = np.searchsorted(self.sorted_values, high, side="right")
+        return np.sort(self.rows[start:stop])
+
+
+ColumnIndex = HashIndex|SortedIndex
+
+
+def _sorted_union(row_slices: Iterable[np.ndarray]) -> np.ndarray:
+    row_slices = list(row_slices)
+    if not row_slices:
+        return np.array([], dtype=np.int64)
+    return np.sort(np.concatenate(row_slices))
@@ -0,0 +1,263 @@
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..core.mytyping import (
+    ResultsSpec,
+    FullDepsDict,
+    GroupedFullDepsDict,
+    FullStepOutput,
+    OutputRef,
+    StepOutputBase,
+)
+from .columnar import ColumnarStep, ObjectColumn, is_columnar_results, read_manifest
+from .indexes import SortedIndex
+from .summary import summarize
+
+
+def open_results(results_dir: Path) -> "ResultsReader":
+    """
+    Open saved results without reading them; only the columnar format can be read lazily.
+    """
+    if not is_columnar_results(results_dir):
+        raise ValueError(
+            f"{results_dir} is not a columnar results directory; "
+            "save results with `PipelineBase.save_columnar_results` to read them lazily"
+        )
+    return ResultsReader(results_dir)
+
+
+class ColumnarRef(OutputRef):
+    __slots__ = ("step", "row", "columns")
+
+    def __init__(self, step: ColumnarStep, row: int, columns: tuple[str, ...]|None = None):
+        self.step = step
+        self.row = row
+        self.columns = columns
+
+    def load(self) -> StepOutputBase:
+        return self.step.output_at(self.row, self.columns)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.step.step_name}[{self.row}])"
+
+
+class ResultsReader(Mapping[str, "LazyStepResults"]):
+    """
+    Results dict over a columnar results directory, where `reader[step_name]` is a `LazyStepResults`.
+
+    Outputs are only decoded when their `output` is accessed, and lineage is built on demand
+    from the stored row indices; each row is represented by a single `FullStepOutput`.
+    """
+    def __init__(self, results_dir: Path):
+        self.results_dir = results_dir
+        manifest = read_manifest(results_dir)
+        self._steps = {name: ColumnarStep(results_dir / name) for name in manifest["steps"]}
+        self._full_step_outputs: dict[str, dict[int, FullStepOutput]] = {name: {} for name in self._steps}
+        self._deps: dict[str, dict[tuple[int, ...], FullDepsDict]] = {name: {} for name in self._steps}
+
+    def __getitem__(self, step_name: str) -> "LazyStepResults":
+        return LazyStepResults(self, self.step(step_name))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._steps)
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def step(self, step_name: str) -> ColumnarStep:
+        return self._steps[step_name]
+
+    def full_step_output(self, step_name: str, row: int) -> FullStepOutput:
+        by_row = self._full_step_outputs[step_name]
+        full_step_output = by_row.get(row)
+        if full_step_output is None:
+            step = self._steps[step_name]
+            full_step_output = by_row[row] = FullStepOutput(
+                deps=self.full_deps_dict(step_name, row),
+                output=ColumnarRef(step, row),
+                step_name=step_name,
+            )
+        return full_step_output
+
+    def full_deps_dict(self, step_name: str, row: int) -> FullDepsDict:
+        step = self._steps[step_name]
+        deps = self._lineage_deps(step_name, step.deps_labels, step.lineage, row)
+        if not step.is_grouped:
+            return deps
+        offsets, member_lineage = step.members
+        return GroupedFullDepsDict.from_key(deps, [
+            self._lineage_deps(step_name, step.member_labels, member_lineage, j)
+            for j in range(offsets[row], offsets[row + 1])
+        ])
+
+    def materialize(self) -> ResultsSpec:
+        return {step_name: list(self[step_name]) for step_name in self._steps}
+
+    def _lineage_deps(self, step_name: str, labels: list[str], lineage: dict[str, np.ndarray], i: int) -> FullDepsDict:
+        key = tuple(int(lineage[label][i]) for label in labels)
+        cache = self._deps[step_name]
+        deps = cache.get(key)
+        if deps is None:
+            present = [(label, row) for label, row in zip(labels, key) if row >= 0]
+            deps = cache[key] = FullDepsDict.from_items(
+                tuple(label for label, _ in present),
+                tuple(self.full_step_output(label, row) for label, row in present),
+            )
+        return deps
+
+
+class LazyStepResults(Sequence[FullStepOutput]):
+    """
+    The outputs of one step, optionally restricted to some rows (`where`) and output fields (`select`).
+
+    Views are cheap: filtering only reads the columns it tests, and nothing else is decoded until used.
+    """
+    def __init__(
+        self,
+        reader: ResultsReader,
+        step: ColumnarStep,
+        rows: np.ndarray|None = None,
+        columns: tuple[str, ...]|None = None,
+    ):
+        self.reader = reader
+        self.step = step
+        self.rows = rows
+        self.columns = columns
+
+    @property
+    def step_name(self) -> str:
+        return self.step.step_name
+
+    @property
+    def row_indices(self) -> np.ndarray:
+        if self.rows is None:
+            return np.arange(self.step.num_rows)
+        return self.rows
+
+    def __len__(self) -> int:
+        return self.step.num_rows if self.rows is None else len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._view(rows=self.row_indices[index])
+        if self.rows is None:
+            row = range(self.step.num_rows)[index]
+        else:
+            row = int(self.rows[index])
+        if self.columns is None:
+            return self.reader.full_step_output(self.step_name, row)
+        return FullStepOutput(
+            deps=self.reader.full_deps_dict(self.step_name, row),
+            output=ColumnarRef(self.step, row, self.columns),
+            step_name=self.step_name,
+        )
+
+    def __iter__(self) -> Iterator[FullStepOutput]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def select(self, *columns: str) -> "LazyStepResults":
+        """
+        Only decode these fields of the outputs; the others are left unset.
+        """
+        if self.step.output_type is None:
+            raise ValueError(f"Outputs of step {self.step_name} are not pydantic models and have no fields to select")
+        unknown = set(columns) - set(self.step.column_names)
+        if unknown:
+            raise KeyError(f"Step {self.step_name} has no columns {sorted(unknown)}")
+        return self._view(columns=tuple(columns))
+
+    def where(self, **conditions: Any) -> "LazyStepResults":
+        """
+        Keep the rows whose fields equal the given values (or are in them, for a list, tuple or set).
+        Conditions are answered from the column indexes when there are some,
+        and otherwise by testing the stored columns, without decoding the outputs either way.
+        """
+        rows = self.rows
+        for name, value in conditions.items():
+            if rows is not None and not len(rows):
+                break
+            values = list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+            index = self.step.index(name)
+            if index is not None:
+                matches = index.lookup(values)
+                rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+            else:
+                rows = self.row_indices if rows is None else rows
+                rows = rows[self._match(name, values, rows)]
+        return self._view(rows=rows)
+
+    def between(self, name: str, low: Any, high: Any) -> "LazyStepResults":
+        """
+        Keep the rows whose numeric field `name` lies in `[low, high]`.
+        """
+        index = self.step.index(name)
+        if isinstance(index, SortedIndex):
+            matches = index.between(low, high)
+            rows = matches if self.rows is None else np.intersect1d(self.rows, matches, assume_unique=True)
+        else:
+            rows = self.row_indices
+            if self.step.meta["columns"].get(name) not in ("bool", "int64", "float64"):
+                raise KeyError(f"Step {self.step_name} has no numeric column {name!r}")
+            values = self.step.column(name)[rows]
+            rows = rows[(values >= low) & (values <= high)]
+        return self._view(rows=rows)
+
+    def to_df(self) -> pd.DataFrame:
+        df = self.step.to_df(self.columns, self.rows)
+        df.index = self.row_indices
+        return df
+
+    def summarize(self, *by: str) -> pd.DataFrame:
+        """
+        Counts, means of numeric fields and string length distributions per distinct value of the `by` fields
+        (see `summary.summarize`).  String fields are read as their stored codes, without decoding them.
+        """
+        return summarize(self.to_scalar_df(*by), by)
+
+    def to_scalar_df(self, *keep: str) -> pd.DataFrame:
+        """
+        The numeric, boolean and string fields, one row per output, read from the stored columns
+        without decoding the outputs: strings are categoricals over their stored codes.
+        Other fields are left out, unless named in `keep`.
+        """
+        unknown = set(keep) - set(self.step.column_names)
+        if unknown:
+            raise KeyError(f"Step {self.step_name} has no columns {sorted(unknown)}")
+        names = self.step.column_names if self.columns is None else list(self.columns)
+        columns: dict[str, Any] = {}
+        for name in dict.fromkeys([*keep, *names]):
+            kind = self.step.meta["columns"][name]
+            if kind == "string":
+                codes, table = self.step.string_column(name)
+                columns[name] = pd.Categorical.from_codes(codes if self.rows is None else codes[self.rows], table)
+            elif kind != "object" or name in keep:
+                columns[name] = self.step.take(name, self.rows)
+        return pd.DataFrame(columns, index=pd.RangeIndex(len(self)))
+
+    def _match(self, name: str, values: list[Any], rows: np.ndarray) -> np.ndarray:
+        kind = self.step.meta["columns"].get(name)
+        if kind is None:
+            raise KeyError(f"Step {self.step_name} has no column {name!r}")
+        if kind == "string":
+            codes, table = self.step.string_column(name)
+            wanted = np.flatnonzero(np.isin(table, values))
+            return np.isin(codes[rows], wanted)
+        column = self.step.column(name)
+        if isinstance(column, ObjectColumn):
+            return np.fromiter((column[row] in values for row in rows), dtype=bool, count=len(rows))
+        return np.isin(column[rows], values)
+
+    def _view(self, rows: np.ndarray|None = None, columns: tuple[str, ...]|None = None) -> "LazyStepResults":
+        return LazyStepResults(
+            self.reader,
+            self.step,
+            rows=self.rows if rows is None else rows,
+            columns=self.columns if columns is None else columns,
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.step_name!r}, <{len(self)} rows>)"
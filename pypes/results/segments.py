@@ -0,0 +1,152 @@
+import mmap
+from pathlib import Path
+import struct
+from typing import Any, BinaryIO, Iterator
+
+import dill
+
+
+# Each record is a little-endian u64 payload length followed by a dill payload,
+# so a reader can always tell a complete record from a torn write at the end of the file.
+RECORD_HEADER = struct.Struct("<Q")
+
+
+class SegmentWriter:
+    """
+    Append-only writer of dill records.
+
+    Records are flushed to the OS every `flush_every` appends (and on close),
+    so a crashed process leaves at most that many records unwritten and never a corrupt prefix.
+    """
+    def __init__(self, fpath: Path, flush_every: int = 1, mkdir: bool = True):
+        if mkdir:
+            fpath.parent.mkdir(exist_ok=True, parents=True)
+        self.fpath = fpath
+        self.flush_every = flush_every
+        self._f: BinaryIO = open(fpath, 'ab')
+        self._num_unflushed = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._f.closed
+
+    def append(self, record: Any) -> int:
+        payload = dill.dumps(record)
+        offset = self._f.tell()
+        self._f.write(RECORD_HEADER.pack(len(payload)))
+        self._f.write(payload)
+        self._num_unflushed += 1
+        if self._num_unflushed >= self.flush_every:
+            self.flush()
+        return offset
+
+    def flush(self) -> None:
+        self._f.flush()
+        self._num_unflushed = 0
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+    def __enter__(self) -> "SegmentWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def iter_segment(fpath: Path, start_offset: int = 0) -> Iterator[tuple[int, Any]]:
+    """
+    Yield `(offset, record)` for every complete record, stopping quietly at a torn tail.
+    """
+    if not fpath.exists():
+        return
+    with open(fpath, 'rb') as f:
+        f.seek(start_offset)
+        while True:
+            offset = f.tell()
+            record = _read_record(f)
+            if record is _INCOMPLETE:
+                return
+            yield offset, record
+
+
+def read_new_records(fpath: Path, start_offset: int = 0) -> tuple[list[tuple[int, Any]], int]:
+    """
+    The complete `(offset, record)` pairs from `start_offset` on, and the offset to resume reading from,
+    for following a segment that is still being written.
+    """
+    records: list[tuple[int, Any]] = []
+    if not fpath.exists():
+        return records, start_offset
+    with open(fpath, 'rb') as f:
+        f.seek(start_offset)
+        while True:
+            offset = f.tell()
+            record = _read_record(f)
+            if record is _INCOMPLETE:
+                return records, offset
+            records.append((offset, record))
+
+
+def read_record_at(f: BinaryIO, offset: int) -> Any:
+    f.seek(offset)
+    record = _read_record(f)
+    if record is _INCOMPLETE:
+        raise EOFError(f"No complete record at offset {offset}")
+    return record
+
+
+def read_record_from_buffer(buf: bytes|mmap.mmap, offset: int) -> Any:
+    """
+    Decode the record at `offset` of an in-memory or memory-mapped segment.
+    """
+    if offset + RECORD_HEADER.size > len(buf):
+        raise EOFError(f"No complete record at offset {offset}")
+    (length,) = RECORD_HEADER.unpack_from(buf, offset)
+    start = offset + RECORD_HEADER.size
+    if start + length > len(buf):
+        raise EOFError(f"No complete record at offset {offset}")
+    return dill.loads(buf[start:start + length])
+
+
+def valid_length(fpath: Path) -> int:
+    """
+    Number of leading bytes of `fpath` made up of complete records.
+    """
+    if not fpath.exists():
+        return 0
+    size = fpath.stat().st_size
+    end = 0
+    with open(fpath, 'rb') as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return end
+            (length,) = RECORD_HEADER.unpack(header)
+            if f.tell() + length > size:
+                return end
+            end = f.seek(length, 1)
+
+
+def truncate_to_valid(fpath: Path) -> None:
+    if fpath.exists():
+        length = valid_length(fpath)
+        if length < fpath.stat().st_size:
+            with open(fpath, 'r+b') as f:
+                f.truncate(length)
+
+
+_INCOMPLETE = object()
+
+
+def _read_record(f: BinaryIO) -> Any:
+    header = f.read(RECORD_HEADER.size)
+    if len(header) < RECORD_HEADER.size:
+        return _INCOMPLETE
+    (length,) = RECORD_HEADER.unpack(header)
+    payload = f.read(length)
+    if len(payload) < length:
+        return _INCOMPLETE
+    return dill.loads(payload)
@@ -0,0 +1,182 @@
+from collections import OrderedDict
+import mmap
+from pathlib import Path
+import tempfile
+from typing import Any, Iterable, SupportsIndex
+
+from ..core.mytyping import OutputRef, FullStepOutput, StepOutputBase
+from .segments import SegmentWriter, read_record_from_buffer
+
+
+class SpillRef(OutputRef):
+    __slots__ = ("store", "offset")
+
+    def __init__(self, store: "SpillStore", offset: int):
+        self.store = store
+        self.offset = offset
+
+    def load(self) -> StepOutputBase:
+        return self.store.load(self.offset)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.store.fpath.name}@{self.offset})"
+
+
+class SpillStore:
+    """
+    Segment file holding spilled output payloads.
+
+    Payloads are read back through a memory map of the file and kept in an LRU of `cache_size` payloads.
+    `owner` (e.g. the `TemporaryDirectory` holding the file) is kept alive as long as the store,
+    and so as long as any `SpillRef` into it.
+    The file must not exist yet, since another store may still be reading it.
+    """
+    def __init__(self, fpath: Path, cache_size: int = 1024, owner: Any = None):
+        self.fpath = fpath
+        self.cache_size = cache_size
+        self.owner = owner
+        fpath.parent.mkdir(exist_ok=True, parents=True)
+        fpath.touch(exist_ok=False)
+        self._writer: SegmentWriter|None = None
+        self._mmap: mmap.mmap|None = None
+        self._cache: OrderedDict[int, StepOutputBase] = OrderedDict()
+
+    def put(self, output: StepOutputBase) -> SpillRef:
+        if self._writer is None or self._writer.closed:
+            self._writer = SegmentWriter(self.fpath, flush_every=1)
+        return SpillRef(self, self._writer.append(output))
+
+    def spill(self, full_step_outputs: Iterable[FullStepOutput]) -> None:
+        for fso in full_step_outputs:
+            if not fso.is_spilled:
+                fso.spill(self.put(fso.output))
+
+    def load(self, offset: int) -> StepOutputBase:
+        cache = self._cache
+        if offset in cache:
+            cache.move_to_end(offset)
+            return cache[offset]
+        output = self._read(offset)
+        cache[offset] = output
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return output
+
+    def _read(self, offset: int) -> StepOutputBase:
+        if self._mmap is not None:
+            try:
+                return read_record_from_buffer(self._mmap, offset)
+            except EOFError:
+                # written after the file was mapped
+                self._mmap.close()
+        with open(self.fpath, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return read_record_from_buffer(self._mmap, offset)
+
+    def close(self) -> None:
+        """
+        Stop writing and release the file; spilled payloads stay readable (the file is mapped again on demand).
+        """
+        if self._writer is not None:
+            self._writer.close()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._cache.clear()
+
+
+class SpilledStepList(list[FullStepOutput]):
+    """
+    A step's outputs whose payloads are spilled to `store` as soon as they are added.
+    """
+    def __init__(self, store: SpillStore, full_step_outputs: Iterable[FullStepOutput] = ()):
+        super().__init__()
+        self.store = store
+        self.extend(full_step_outputs)
+
+    def append(self, full_step_output: FullStepOutput) -> None:
+        self.store.spill([full_step_output])
+        super().append(full_step_output)
+
+    def extend(self, full_step_outputs: Iterable[FullStepOutput]) -> None:
+        for full_step_output in full_step_outputs:
+            self.append(full_step_output)
+
+    def insert(self, index: SupportsIndex, full_step_output: FullStepOutput) -> None:
+        self.store.spill([full_step_output])
+        super().insert(index, full_step_output)
+
+    def __setitem__(self, index: SupportsIndex|slice, value: Any) -> None:
+        if isinstance(index, slice):
+            value = list(value)
+            self.store.spill(value)
+        else:
+            self.store.spill([value])
+        super().__setitem__(index, value)
+
+    def __iadd__(self, full_step_outputs: Iterable[FullStepOutput]) -> "SpilledStepList":
+        self.extend(full_step_outputs)
+        return self
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+class SpillingResults(dict[str, list[FullStepOutput]]):
+    """
+    A `ResultsSpec` keeping output payloads on disk, one segment per step
+    in a directory of its own under `spill_dir` (removed once nothing refers to its payloads).
+
+    Only the `FullStepOutput` handles and their lineage stay in memory;
+    payloads are paged in on access through a per-step LRU of `cache_size` payloads.
+    Pickling (e.g. by `save_results`) writes a plain results dict with the payloads materialized.
+    """
+    def __init__(self, spill_dir: Path, cache_size: int = 1024):
+        super().__init__()
+        self.spill_dir = spill_dir
+        self.cache_size = cache_size
+        self._run_dir: tempfile.TemporaryDirectory|None = None
+        self._stores: dict[str, SpillStore] = {}
+
+    def __setitem__(self, step_name: str, full_step_outputs: list[FullStepOutput]) -> None:
+        if not isinstance(full_step_outputs, SpilledStepList):
+            full_step_outputs = SpilledStepList(self.store_for(step_name), full_step_outputs)
+        super().__setitem__(step_name, full_step_outputs)
+
+    def set_unspilled(self, step_name: str, full_step_outputs: list[FullStepOutput]) -> None:
+        """
+        Store outputs as they are, without spilling them, e.g. results that their owner still holds in memory.
+        """
+        super().__setitem__(step_name, full_step_outputs)
+
+    def update(self, *args: Any, **kwargs: list[FullStepOutput]) -> None:
+        for step_name, full_step_outputs in dict(*args, **kwargs).items():
+            self[step_name] = full_step_outputs
+
+    def setdefault(self, step_name: str, default: list[FullStepOutput]|None = None) -> list[FullStepOutput]:
+        if step_name not in self:
+            self[step_name] = [] if default is None else default
+        return self[step_name]
+
+    def __ior__(self, other: Any) -> "SpillingResults":
+        self.update(other)
+        return self
+
+    def store_for(self, step_name: str) -> SpillStore:
+        if step_name not in self._stores:
+            if self._run_dir is None:
+                self.spill_dir.mkdir(exist_ok=True, parents=True)
+                self._run_dir = tempfile.TemporaryDirectory(dir=self.spill_dir, ignore_cleanup_errors=True)
+            self._stores[step_name] = SpillStore(
+                Path(self._run_dir.name) / f"{step_name}.seg",
+                cache_size=self.cache_size,
+                owner=self._run_dir,
+            )
+        return self._stores[step_name]
+
+    def close(self) -> None:
+        for store in self._stores.values():
+            store.close()
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
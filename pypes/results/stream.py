@@ -0,0 +1,216 @@
+"""
+Streaming results: every output is appended to a per-step log while the pipeline runs,
+so the results of a running (or crashed) pipeline can be read without `save_results`.
+
+    <results_dir>/steps.seg     the step names, in the order they started
+    <results_dir>/<step>.seg    one record per output, then an index footer once the step has finished
+
+Output records carry their lineage as row indices into the logs of the upstream steps.
+"""
+from pathlib import Path
+import struct
+import time
+from typing import Iterable
+
+import dill
+
+from ..core.mytyping import ResultsSpec, FullDepsDict, GroupedFullDepsDict, FullStepOutput
+from .segments import (
+    RECORD_HEADER,
+    SegmentWriter,
+    iter_segment,
+    read_new_records,
+    read_record_at,
+    read_record_from_buffer,
+)
+
+
+_OUTPUT = "output"
+_INDEX = "index"
+_END = "end"
+_OFFSET = struct.Struct("<Q")
+# the last record of a finished log has a fixed size, so the footer can be found from the end of the file
+_TRAILER_SIZE = RECORD_HEADER.size + len(dill.dumps((_END, bytes(_OFFSET.size))))
+
+RowLineage = tuple[tuple[str, ...], tuple[int, ...]]
+
+
+class ResultsSink:
+    """
+    Writes the outputs of a run to per-step logs as they are produced (see `PipelineBase.run(..., sink=...)`).
+
+    Logs are flushed every `flush_every` outputs, at least every `flush_seconds`, and when a step finishes,
+    so a crash loses at most the last few outputs and never leaves an unreadable log.
+    The sink only keeps the row index of each output, not the output itself.
+    """
+    def __init__(self, results_dir: Path, flush_every: int = 64, flush_seconds: float = 1.0):
+        self.results_dir = results_dir
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._steps_writer: SegmentWriter|None = None
+        self._writers: dict[str, SegmentWriter] = {}
+        self._offsets: dict[str, list[int]] = {}
+        self._row_index: dict[str, dict[int, int]] = {}
+        self._last_flush = time.monotonic()
+
+    def begin_step(self, step_name: str) -> None:
+        if self._steps_writer is None:
+            self._clear()
+            self._steps_writer = SegmentWriter(self.results_dir / "steps.seg", flush_every=1)
+        fpath = self.results_dir / f"{step_name}.seg"
+        fpath.unlink(missing_ok=True)
+        self._writers[step_name] = SegmentWriter(fpath, flush_every=self.flush_every)
+        self._offsets[step_name] = []
+        self._row_index[step_name] = {}
+        self._steps_writer.append(step_name)
+
+    def append(self, full_step_output: FullStepOutput) -> None:
+        step_name = full_step_output.step_name
+        deps = full_step_output.deps
+        members = None
+        if isinstance(deps, GroupedFullDepsDict):
+            members = tuple(self._lineage(member) for member in deps.members)
+        writer = self._writers[step_name]
+        offsets = self._offsets[step_name]
+        self._row_index[step_name][id(full_step_output)] = len(offsets)
+        offsets.append(writer.append((_OUTPUT, self._lineage(deps), members, full_step_output.output)))
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def extend(self, full_step_outputs: Iterable[FullStepOutput]) -> None:
+        for full_step_output in full_step_outputs:
+            self.append(full_step_output)
+
+    def end_step(self, step_name: str) -> None:
+        """
+        Write the index footer (the offset of every output record) and close the step's log.
+        """
+        writer = self._writers.pop(step_name)
+        footer_offset = writer.append((_INDEX, self._offsets.pop(step_name)))
+        writer.append((_END, _OFFSET.pack(footer_offset)))
+        writer.close()
+
+    def flush(self) -> None:
+        for writer in self._writers.values():
+            writer.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Close all logs; steps that have not ended are left without a footer, as after a crash.
+        """
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        if self._steps_writer is not None:
+            self._steps_writer.close()
+            self._steps_writer = None
+
+    def _lineage(self, deps: FullDepsDict) -> RowLineage:
+        return deps.labels, tuple(self._row_index[label][id(upstream)] for label, upstream in deps.items())
+
+    def _clear(self) -> None:
+        steps_fpath = self.results_dir / "steps.seg"
+        for _offset, step_name in iter_segment(steps_fpath):
+            (self.results_dir / f"{step_name}.seg").unlink(missing_ok=True)
+        steps_fpath.unlink(missing_ok=True)
+
+
+class ResultsTail:
+    """
+    Incremental reader of the logs of a `ResultsSink`, possibly still being written.
+
+    Each `poll` reads the records appended since the previous one and rebuilds their lineage;
+    a torn record at the end of a log is left for the next poll.
+    """
+    def __init__(self, results_dir: Path):
+        self.results_dir = results_dir
+        self.results: ResultsSpec = {}
+        self.complete_steps: set[str] = set()
+        self._steps_offset = 0
+        self._step_offsets: dict[str, int] = {}
+        self._deps_cache: dict[str, dict[RowLineage, FullDepsDict]] = {}
+
+    def poll(self) -> dict[str, list[FullStepOutput]]:
+        """
+        The outputs appended to each step since the last poll.
+        """
+        step_records, self._steps_offset = read_new_records(self.results_dir / "steps.seg", self._steps_offset)
+        for _offset, step_name in step_records:
+            self.results[step_name] = []
+            self._step_offsets[step_name] = 0
+            self._deps_cache[step_name] = {}
+
+        new_outputs: dict[str, list[FullStepOutput]] = {}
+        for step_name in self.results:
+            if step_name in self.complete_steps:
+                continue
+            fpath = self.results_dir / f"{step_name}.seg"
+            records, self._step_offsets[step_name] = read_new_records(fpath, self._step_offsets[step_name])
+            added: list[FullStepOutput] = []
+            for _offset, record in records:
+                kind = record[0]
+                if kind == _OUTPUT:
+                    _kind, lineage, members, output = record
+                    added.append(FullStepOutput(
+                        deps=self._full_deps_dict(step_name, lineage, members),
+                        output=output,
+                        step_name=step_name,
+                    ))
+                elif kind == _END:
+                    self.complete_steps.add(step_name)
+                elif kind != _INDEX:
+                    raise ValueError(f"Unknown record kind {kind!r} in {fpath}")  # pragma: no cover
+            self.results[step_name].extend(added)
+            new_outputs[step_name] = added
+        return new_outputs
+
+    def _full_deps_dict(self, step_name: str, lineage: RowLineage, members: tuple[RowLineage, ...]|None) -> FullDepsDict:
+        deps = self._deps(step_name, lineage)
+        if members is None:
+            return deps
+        return GroupedFullDepsDict.from_key(deps, [self._deps(step_name, member) for member in members])
+
+    def _deps(self, step_name: str, lineage: RowLineage) -> FullDepsDict:
+        cache = self._deps_cache[step_name]
+        deps = cache.get(lineage)
+        if deps is None:
+            labels, rows = lineage
+            deps = cache[lineage] = FullDepsDict.from_items(
+                labels,
+                tuple(self.results[label][row] for label, row in zip(labels, rows)),
+            )
+        return deps
+
+
+def read_streamed_results(results_dir: Path) -> ResultsSpec:
+    """
+    Everything a `ResultsSink` has written so far.
+    """
+    tail = ResultsTail(results_dir)
+    tail.poll()
+    return tail.results
+
+
+def read_step_index(fpath: Path) -> list[int]|None:
+    """
+    The offsets of the output records of a finished step log, from its footer; None if the step has not finished.
+    """
+    size = fpath.stat().st_size
+    if size < _TRAILER_SIZE:
+        return None
+    with open(fpath, 'rb') as f:
+        f.seek(size - _TRAILER_SIZE)
+        trailer = f.read(_TRAILER_SIZE)
+        (length,) = RECORD_HEADER.unpack_from(trailer)
+        if length != _TRAILER_SIZE - RECORD_HEADER.size:
+            return None
+        try:
+            kind, packed_offset = read_record_from_buffer(trailer, 0)
+        except Exception:
+            # the tail of an unfinished log that happens to look like a trailer header
+            return None
+        if kind != _END:
+            return None
+        (footer_offset,) = _OFFSET.unpack(packed_offset)
+        return read_record_at(f, footer_offset)[1]
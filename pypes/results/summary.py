@@ -0,0 +1,192 @@
+"""
+Aggregate views over a table of output fields (one row per output, e.g. `LazyStepResults.to_df`):
+the number of outputs per group, the mean of each numeric field, and the distribution of the length
+of each string field.
+
+Rows are mapped once to integer group ids, and every statistic is then a `np.bincount`
+(or, for length quantiles, a histogram over the distinct lengths), so the cost is a few passes
+over each column.  String columns are cheapest as categoricals, whose lengths are measured once per category.
+"""
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+LENGTH_QUANTILES = (0.5, 0.9)
+
+
+def summarize(df: pd.DataFrame, by: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    One row per distinct value of the `by` fields, sorted (a single row without them), with columns
+    `count`, `<field> mean` for numeric and boolean fields, and `len(<field>) mean|p50|p90|max` for string fields.
+    Length quantiles are the smallest length reached by that fraction of a group's strings.
+    """
+    by = list(by)
+    unknown = set(by) - set(df.columns)
+    if unknown:
+        raise KeyError(f"No fields {sorted(unknown)} to group by")
+
+    group_ids, index = _group_ids(df, by)
+    num_groups = len(index)
+    counts = np.bincount(group_ids, minlength=num_groups)
+    summary: dict[str, np.ndarray] = {"count": counts}
+    for name in df.columns:
+        if name in by:
+            continue
+        kind = field_kind(df[name])
+        if kind == "number":
+            values = df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            summary[f"{name} mean"] = _group_means(group_ids, values, num_groups, counts)
+        elif kind == "string":
+            summary.update(_length_stats(f"len({name})", group_ids, df[name], num_groups))
+    return pd.DataFrame(summary, index=index)
+
+
+def field_kind(column: pd.Series) -> str|None:
+    """
+    "number", "string", "category" (other hashable scalars worth grouping by), or None.
+    """
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+        return "number"
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return "string" if pd.api.types.infer_dtype(column.cat.categories) == "string" else "category"
+    inferred = pd.api.types.infer_dtype(column, skipna=True)
+    if inferred == "string":
+        return "string"
+    if inferred in ("integer", "boolean", "mixed-integer"):
+        return "category"
+    return None
+
+
+def groupable_fields(df: pd.DataFrame, max_groups: int = 1000) -> list[str]:
+    """
+    Fields with scalar values and at most `max_groups` distinct ones.
+    """
+    return [
+        name for name in df.columns
+        if field_kind(df[name]) is not None and df[name].nunique(dropna=False) <= max_groups
+    ]
+
+
+def as_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    `df` with its string columns stored as categoricals, which makes repeated summaries cheap.
+    """
+    strings = {
+        name: df[name].astype("category") for name in df.columns
+        if not isinstance(df[name].dtype, pd.CategoricalDtype) and field_kind(df[name]) == "string"
+    }
+    return df.assign(**strings) if strings else df
+
+
+def _group_ids(df: pd.DataFrame, by: list[str]) -> tuple[np.ndarray, pd.Index]:
+    """
+    The group of each row and the index of the groups, in sorted order of the `by` values.
+    """
+    num_rows = len(df)
+    group_ids = np.zeros(num_rows, dtype=np.int64)
+    if not by:
+        return group_ids, pd.RangeIndex(1)
+    group_codes = np.zeros((1, 0), dtype=np.int64)
+    levels = []
+    for name in by:
+        codes, level = _key_codes(df[name])
+        levels.append(level)
+        # combine with the groups so far, then renumber the combinations that occur
+        present, group_ids = _compress(group_ids * len(level) + codes, len(group_codes) * len(level))
+        group_codes = np.column_stack([group_codes[present // len(level)], present % len(level)])
+    if len(by) == 1:
+        return group_ids, pd.Index(levels[0].take(group_codes[:, 0]), name=by[0])
+    return group_ids, pd.MultiIndex.from_arrays(
+        [level.take(group_codes[:, i]) for i, level in enumerate(levels)],
+        names=by,
+    )
+
+
+def _key_codes(column: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    try:
+        codes, level = pd.factorize(column, sort=True, use_na_sentinel=False)
+    except TypeError:
+        # values that cannot be ordered keep the order they appear in
+        codes, level = pd.factorize(column, use_na_sentinel=False)
+    if isinstance(level.dtype, pd.CategoricalDtype):
+        level = np.asarray(level)
+    return codes.astype(np.int64, copy=False), pd.Index(level)
+
+
+def _compress(keys: np.ndarray, num_keys: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The distinct `keys` in `range(num_keys)`, sorted, and the position of each key among them.
+    """
+    if num_keys <= 4 * len(keys) + 1024:
+        present = np.flatnonzero(np.bincount(keys, minlength=num_keys))
+        renumbered = np.empty(num_keys, dtype=np.int64)
+        renumbered[present] = np.arange(len(present))
+        return present, renumbered[keys]
+    present, inverse = np.unique(keys, return_inverse=True)
+    return present, inverse.reshape(-1)
+
+
+def _group_means(
+    group_ids: np.ndarray,
+    values: np.ndarray,
+    num_groups: int,
+    counts: np.ndarray|None = None,
+) -> np.ndarray:
+    """
+    The mean of `values` in each group, ignoring NaNs; `counts` are the group sizes, if already known.
+    """
+    missing = np.isnan(values)
+    if missing.any():
+        group_ids, values = group_ids[~missing], values[~missing]
+        counts = None
+    sums = np.bincount(group_ids, weights=values, minlength=num_groups)
+    if counts is None:
+        counts = np.bincount(group_ids, minlength=num_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def _length_stats(label: str, group_ids: np.ndarray, column: pd.Series, num_groups: int) -> dict[str, np.ndarray]:
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes, table = column.cat.codes.to_numpy(), column.cat.categories
+    else:
+        codes, table = pd.factorize(column)
+    names = [f"{label} mean", *(f"{label} p{round(q * 100)}" for q in LENGTH_QUANTILES), f"{label} max"]
+    if not len(table):
+        return {name: np.full(num_groups, np.nan) for name in names}
+
+    table_lengths = np.fromiter(map(len, table), dtype=np.int64, count=len(table))
+    lengths, length_codes = np.unique(table_lengths, return_inverse=True)
+    length_codes = length_codes.reshape(-1)
+    present = codes >= 0
+    if not present.all():
+        group_ids, codes = group_ids[present], codes[present]
+    length_codes = length_codes[codes]
+    num_lengths = len(lengths)
+
+    totals = np.bincount(group_ids, minlength=num_groups)
+    ranks = [np.maximum(np.ceil(q * totals).astype(np.int64), 1) for q in LENGTH_QUANTILES]
+    keys = group_ids * num_lengths + length_codes
+    if num_groups * num_lengths <= 4 * len(keys) + 1024:
+        # histogram of the lengths in each group
+        histogram = np.bincount(keys, minlength=num_groups * num_lengths).reshape(num_groups, num_lengths)
+        cumulative = np.cumsum(histogram, axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = histogram @ lengths / totals
+        positions = [(cumulative < rank[:, None]).sum(axis=1) for rank in ranks]
+        positions.append(num_lengths - 1 - np.argmax(histogram[:, ::-1] > 0, axis=1))
+    else:
+        # too many groups and lengths for a histogram: sort the lengths within each group
+        mean = _group_means(group_ids, lengths[length_codes].astype(np.float64), num_groups, totals)
+        sorted_codes = np.sort(keys) % num_lengths
+        starts = np.zeros(num_groups, dtype=np.int64)
+        np.cumsum(totals[:-1], out=starts[1:])
+        last = len(sorted_codes) - 1
+        positions = [sorted_codes[np.minimum(starts + rank - 1, last)] for rank in ranks]
+        positions.append(sorted_codes[np.minimum(starts + totals - 1, last)])
+
+    missing = totals == 0
+    values = [mean] + [np.where(missing, np.nan, lengths[np.minimum(p, num_lengths - 1)]) for p in positions]
+    return dict(zip(names, values))
@@ -0,0 +1,59 @@
+from ..core.mytyping import DepsSpecType
+
+
+def normalize_deps_spec(deps_spec: DepsSpecType) -> list[str]:
+    if not deps_spec:
+        return []
+    if isinstance(deps_spec, str):
+        return [deps_spec]
+    return list(deps_spec)
+
+
+def ancestor_closure(deps_by_step: dict[str, list[str]], targets: list[str]) -> set[str]:
+    """
+    The targets together with every step they transitively depend on.
+    """
+    closure: set[str] = set()
+    stack = list(targets)
+    while stack:
+        step_name = stack.pop()
+        if step_name in closure:
+            continue
+        if step_name not in deps_by_step:
+            raise ValueError(f"Unknown step {step_name}")
+        closure.add(step_name)
+        stack.extend(deps_by_step[step_name])
+    return closure
+
+
+def release_schedule(
+    deps_by_step: dict[str, list[str]],
+    step_names: list[str],
+    keep: set[str],
+) -> dict[str, list[str]]:
+    """
+    Liveness of step results over an execution order.
+
+    Maps each of `step_names` to the steps whose results are dead once it has run:
+    those not in `keep` whose last direct consumer (or the step itself, if nothing consumes it) it is.
+    Deeper ancestors stay reachable through the lineage of their consumers' outputs.
+    """
+    last_use = {step_name: step_name for step_name in step_names}
+    for step_name in step_names:
+        for dep in deps_by_step[step_name]:
+            if dep in last_use:
+                last_use[dep] = step_name
+
+    schedule: dict[str, list[str]] = {step_name: [] for step_name in step_names}
+    for step_name, last in last_use.items():
+        if step_name not in keep:
+            schedule[last].append(step_name)
+    return schedule
+
+
+def sink_steps(deps_by_step: dict[str, list[str]], step_names: list[str]) -> list[str]:
+    """
+    The steps among `step_names` that no other step among them depends on.
+    """
+    consumed = {dep for step_name in step_names for dep in deps_by_step[step_name]}
+    return [step_name for step_name in step_names if step_name not in consumed]
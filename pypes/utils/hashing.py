@@ -1,6 +1,9 @@
 import hashlib
+import json
 from typing import Any
 
+import dill
+from omegaconf import DictConfig, ListConfig, OmegaConf
 from pydantic import BaseModel
 
 from .pydantic_utils import get_fields_dict
@@ -9,6 +12,8 @@ from .pydantic_utils import get_fields_dict
 def myhash(obj: Any) -> str:
     if isinstance(obj, BaseModel):
         return myhash(tuple(get_fields_dict(obj).items()))
+    elif isinstance(obj, (DictConfig, ListConfig)):
+        return myhash(OmegaConf.to_container(obj))
     elif isinstance(obj, tuple):
         return myhash(str(obj))
     elif isinstance(obj, list):
@@ -19,5 +24,31 @@ def myhash(obj: Any) -> str:
         return myhash(str(obj))
     elif isinstance(obj, str):
         return hashlib.sha256(obj.encode("utf-8")).hexdigest()
+    elif obj is None:
+        return myhash(str(obj))
     else:
         raise NotImplementedError(type(obj))
+
+
+def stable_hash(obj: Any) -> str:
+    """
+    Hash of a canonical serialization of `obj`, stable across runs and processes.
+
+    Pydantic models are hashed by their type and the JSON of their fields, configs and plain data
+    by sorted-key JSON, and anything else (including models with fields JSON can't encode) by its dill bytes.
+    Unlike `myhash`, it accepts any picklable object and never depends on reprs.
+    """
+    return hashlib.sha256(_stable_bytes(obj)).hexdigest()
+
+
+def _stable_bytes(obj: Any) -> bytes:
+    try:
+        if isinstance(obj, BaseModel):
+            klass = type(obj)
+            return f"{klass.__module__}.{klass.__qualname__}:{obj.model_dump_json()}".encode("utf-8")
+        if isinstance(obj, (DictConfig, ListConfig)):
+            obj = OmegaConf.to_container(obj, resolve=True)
+        return f"json:{json.dumps(obj, sort_keys=True, separators=(',', ':'))}".encode("utf-8")
+    except (TypeError, ValueError):
+        # includes pydantic's serialization error for field types JSON can't encode
+        return b"dill:" + dill.dumps(obj)
@@ -0,0 +1,52 @@
+from pathlib import Path
+import json
+
+
+class LatencyStats:
+    """
+    Running count and total wall time of the outputs each step actually computed
+    (step output cache hits, and artifact steps whose requests were all answered from the cache, excluded).
+    """
+    def __init__(self):
+        self._count: dict[str, int] = {}
+        self._total_seconds: dict[str, float] = {}
+
+    def record(self, step_name: str, seconds: float) -> None:
+        self._count[step_name] = self._count.get(step_name, 0) + 1
+        self._total_seconds[step_name] = self._total_seconds.get(step_name, 0.0) + seconds
+
+    def count(self, step_name: str) -> int:
+        return self._count.get(step_name, 0)
+
+    def mean_seconds(self, step_name: str) -> float|None:
+        count = self.count(step_name)
+        if count == 0:
+            return None
+        return self._total_seconds[step_name] / count
+
+    def to_dict(self) -> dict[str, dict[str, float]]:
+        return {
+            step_name: dict(count=count, total_seconds=self._total_seconds[step_name])
+            for step_name, count in self._count.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, dict[str, float]]) -> "LatencyStats":
+        stats = cls()
+        for step_name, entry in data.items():
+            stats._count[step_name] = int(entry["count"])
+            stats._total_seconds[step_name] = float(entry["total_seconds"])
+        return stats
+
+    @classmethod
+    def load(cls, json_path: Path) -> "LatencyStats":
+        if not json_path.exists():
+            return cls()
+        with open(json_path, 'r', encoding="utf-8") as fjson:
+            return cls.from_dict(json.load(fjson))
+
+    def save(self, json_path: Path, mkdir: bool = True) -> None:
+        if mkdir:
+            json_path.parent.mkdir(exist_ok=True, parents=True)
+        with open(json_path, 'w', encoding="utf-8") as fjson:
+            json.dump(self.to_dict(), fjson, indent=4)
@@ -0,0 +1,135 @@
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import os
+import threading
+import time
+from typing import Any, ContextManager, Iterator
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True, slots=True)
+class Span:
+    name: str
+    step_name: str|None
+    start_ns: int
+    wall_ns: int
+    cpu_ns: int
+    pid: int
+    tid: int
+    args: dict[str, Any]|None = None
+
+
+class Profiler:
+    """
+    Collects timed spans while active (see `activate`, or `PipelineBase.run(..., profiler=...)`).
+
+    Each span records wall and thread CPU time with the process and thread IDs.
+    Spans opened without a step name inherit the one of the enclosing span on the same thread.
+    """
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._local = threading.local()
+
+    @contextmanager
+    def activate(self) -> Iterator["Profiler"]:
+        global _active_profiler
+        previous = _active_profiler
+        _active_profiler = self
+        try:
+            yield self
+        finally:
+            _active_profiler = previous
+
+    @contextmanager
+    def span(self, name: str, step_name: str|None = None, **args: Any) -> Iterator[None]:
+        stack: list[str|None] = getattr(self._local, "step_stack", None)
+        if stack is None:
+            stack = self._local.step_stack = []
+        if step_name is None and stack:
+            step_name = stack[-1]
+        stack.append(step_name)
+        start_ns = time.perf_counter_ns()
+        start_cpu_ns = time.thread_time_ns()
+        try:
+            yield
+        finally:
+            wall_ns = time.perf_counter_ns() - start_ns
+            cpu_ns = time.thread_time_ns() - start_cpu_ns
+            stack.pop()
+            self.spans.append(Span(
+                name=name,
+                step_name=step_name,
+                start_ns=start_ns,
+                wall_ns=wall_ns,
+                cpu_ns=cpu_ns,
+                pid=os.getpid(),
+                tid=threading.get_ident(),
+                args=args or None,
+            ))
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """
+        The spans as complete ("X") events of the Chrome trace event format, also read by Perfetto.
+        """
+        events = [
+            dict(
+                name=span.name,
+                cat=span.step_name or "pipeline",
+                ph="X",
+                ts=span.start_ns / 1000,
+                dur=span.wall_ns / 1000,
+                pid=span.pid,
+                tid=span.tid,
+                args=dict(cpu_us=span.cpu_ns / 1000, **(span.args or {})),
+            )
+            for span in self.spans
+        ]
+        return dict(traceEvents=events, displayTimeUnit="ms")
+
+    def save_chrome_trace(self, json_path: Path, mkdir: bool = True) -> None:
+        if mkdir:
+            json_path.parent.mkdir(exist_ok=True, parents=True)
+        with open(json_path, 'w', encoding="utf-8") as fjson:
+            json.dump(self.to_chrome_trace(), fjson)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Per (step, span name): call count, total wall and CPU seconds, and wall-time percentiles.
+        """
+        columns = ["step_name", "name", "count", "wall_s", "cpu_s", "p50_s", "p95_s", "p99_s"]
+        groups: dict[tuple[str, str], list[Span]] = {}
+        for span in self.spans:
+            groups.setdefault((span.step_name or "", span.name), []).append(span)
+
+        rows = []
+        for (step_name, name), spans in groups.items():
+            wall_s = np.array([span.wall_ns for span in spans]) / 1e9
+            p50, p95, p99 = np.percentile(wall_s, [50, 95, 99])
+            rows.append((
+                step_name, name, len(spans),
+                wall_s.sum(), sum(span.cpu_ns for span in spans) / 1e9,
+                p50, p95, p99,
+            ))
+        return pd.DataFrame(rows, columns=columns)
+
+
+_active_profiler: Profiler|None = None
+_NULL_SPAN = nullcontext()
+
+
+def get_profiler() -> Profiler|None:
+    return _active_profiler
+
+
+def profile_span(name: str, step_name: str|None = None, **args: Any) -> ContextManager[None]:
+    """
+    A span on the active profiler; a shared no-op context when profiling is off.
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        return _NULL_SPAN
+    return profiler.span(name, step_name, **args)
@@ -80,3 +80,22 @@ def unpack_generator_type_hint(anno: object) -> tuple[Any, Any, Any]:
         raise ValueError(f"Generator annotation must have three type arguments; got {args!r}")
 
     return args[0], args[1], args[2]
+
+
+def unpack_list_type_hint(anno: object) -> Any:
+    """
+    Given an annotation of the form list[T] or Sequence[T], return T.
+
+    Raises:
+        ValueError if anno is not a parameterized list or sequence.
+    """
+    origin = get_origin(anno)
+
+    if origin not in (list, collections.abc.Sequence):
+        raise ValueError(f"Annotation {anno!r} is not a list[...] or Sequence[...] type")
+
+    args = get_args(anno)
+    if len(args) != 1:
+        raise ValueError(f"List annotation must have one type argument; got {args!r}")
+
+    return args[0]
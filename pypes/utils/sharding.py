@@ -0,0 +1,107 @@
+from typing import Any
+
+from ..core.mytyping import (
+    ResultsSpec,
+    FullDepsDict,
+    GroupedFullDepsDict,
+    FullStepOutput,
+)
+from .hashing import stable_hash
+
+
+def shard_of(obj: Any, num_shards: int) -> int:
+    """
+    Deterministic shard index of `obj`, stable across processes and machines.
+    """
+    return int(stable_hash(obj), 16) % num_shards
+
+
+def default_shard_step(results: ResultsSpec) -> str|None:
+    for step_name, step_results in results.items():
+        if step_results and len(step_results[0].deps) == 0:
+            return step_name
+    return None
+
+
+def merge_shard_results(shard_results: list[ResultsSpec], shard_step: str|None = None) -> ResultsSpec:
+    """
+    Combine the results of sharded runs into one `ResultsSpec`.
+
+    Steps descending from `shard_step` (the step whose inputs were partitioned;
+    by default the first source step) are concatenated in shard order.
+    Every other step was computed identically on every shard and is taken from the first one,
+    and the lineage of later shards is rewired onto those shared outputs.
+    Grouped steps whose groups span several shards (their group key does not descend from `shard_step`
+    but their members do) cannot be merged this way: they raise a ValueError, and must be run on the merged results instead.
+    """
+    if not shard_results:
+        raise ValueError("Need at least one set of shard results to merge")
+    if shard_step is None:
+        shard_step = default_shard_step(shard_results[0])
+
+    step_names = list(shard_results[0].keys())
+    for results in shard_results[1:]:
+        if list(results.keys()) != step_names:
+            raise ValueError(f"Shard results have different steps: {list(results.keys())} vs {step_names}")
+
+    replacement: dict[int, FullStepOutput] = {}
+    deps_replacement: dict[int, FullDepsDict] = {}
+
+    def remap_deps(deps: FullDepsDict) -> FullDepsDict:
+        if id(deps) in deps_replacement:
+            return deps_replacement[id(deps)]
+        values = tuple(replacement.get(id(value), value) for value in deps.values)
+        if isinstance(deps, GroupedFullDepsDict):
+            key = FullDepsDict.from_items(deps.labels, values)
+            new_deps = GroupedFullDepsDict.from_key(key, [remap_deps(member) for member in deps.members])
+        elif any(new is not old for new, old in zip(values, deps.values)):
+            new_deps = FullDepsDict.from_items(deps.labels, values)
+        else:
+            new_deps = deps
+        deps_replacement[id(deps)] = new_deps
+        return new_deps
+
+    partitioned_steps: set[str] = set()
+
+    def descends_from_partitioned(deps: FullDepsDict) -> bool:
+        if any(label in partitioned_steps for label in deps.labels):
+            return True
+        if isinstance(deps, GroupedFullDepsDict):
+            return any(descends_from_partitioned(member) for member in deps.members)
+        return False
+
+    def spans_shards(deps: FullDepsDict) -> bool:
+        return (
+            isinstance(deps, GroupedFullDepsDict)
+            and not any(label in partitioned_steps for label in deps.labels)
+            and any(descends_from_partitioned(member) for member in deps.members)
+        )
+
+    merged: ResultsSpec = {}
+    for step_name in step_names:
+        first_deps = [results[step_name][0].deps for results in shard_results if results[step_name]]
+        if any(spans_shards(deps) for deps in first_deps):
+            raise ValueError(f"Grouped step {step_name} has groups spanning several shards, which cannot be merged")
+        is_partitioned = step_name == shard_step or any(descends_from_partitioned(deps) for deps in first_deps)
+        base = shard_results[0][step_name]
+        if not is_partitioned:
+            for results in shard_results[1:]:
+                if len(results[step_name]) != len(base):
+                    raise ValueError(f"Step {step_name} is not sharded but its outputs differ between shards")
+                for fso, base_fso in zip(results[step_name], base):
+                    replacement[id(fso)] = base_fso
+            merged[step_name] = list(base)
+            continue
+
+        partitioned_steps.add(step_name)
+        merged[step_name] = list(base)
+        for results in shard_results[1:]:
+            for fso in results[step_name]:
+                new_deps = remap_deps(fso.deps)
+                if new_deps is not fso.deps:
+                    new_fso = FullStepOutput(deps=new_deps, output=fso.output, step_name=fso.step_name)
+                    replacement[id(fso)] = new_fso
+                    fso = new_fso
+                merged[step_name].append(fso)
+
+    return merged
@@ -0,0 +1,182 @@
+from pathlib import Path
+import tempfile
+import time
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.step import PipelineStepBase
+from pypes.base.pipeline import PipelineBase
+from pypes.utils.pydantic_utils import get_fields_dict
+
+import pytest
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  nsentences: [1, 2]
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+
+
+@PipelineStepBase.auto_step("doc")
+class DocStep:
+    def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+        return DocOutput(**get_fields_dict(input))
+
+
+def truncate(input: TruncatedDocInput, doc: DocOutput) -> TruncatedDocOutput:
+    sentences = doc.text.split(".")[:input.nsentences]
+    return TruncatedDocOutput(**get_fields_dict(input), text=".".join(sentences))
+
+
+def create_pipeline(batch_sizes: list[int], **step_kwargs) -> PipelineBase:
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc", **step_kwargs)
+    class BatchedTruncatedDocStep:
+        def batch_input_to_output(
+            self,
+            inputs: list[TruncatedDocInput],
+            deps_list: list[dict[str, DocOutput]],
+        ) -> list[TruncatedDocOutput]:
+            batch_sizes.append(len(inputs))
+            return [truncate(input, deps["doc"]) for input, deps in zip(inputs, deps_list)]
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), BatchedTruncatedDocStep()])
+    return the_pipeline
+
+
+def expected_outputs(pipeline: PipelineBase) -> list[TruncatedDocOutput]:
+    return [
+        truncate(TruncatedDocInput(trial=0, nsentences=nsentences), fso_doc.output)
+        for fso_doc in pipeline.results["doc"]
+        for nsentences in [1, 2]
+    ]
+
+
+def test_batched_step():
+    full_config = OmegaConf.create(config_str)
+    batch_sizes: list[int] = []
+    pipeline = create_pipeline(batch_sizes, batch_size=3)
+    step = pipeline._steps["truncated_doc"]
+    assert step.input_type is TruncatedDocInput
+    assert step.output_type is TruncatedDocOutput
+    assert step.supports_batching
+
+    pipeline.run(full_config)
+    assert batch_sizes == [3, 1]
+    results = pipeline.results["truncated_doc"]
+    assert [fso.output for fso in results] == expected_outputs(pipeline)
+    assert [fso.deps["doc"] for fso in results] == [pipeline.results["doc"][i] for i in [0, 0, 1, 1]]
+
+    # a single input goes through a batch of one
+    assert step.input_to_output(TruncatedDocInput(trial=0, nsentences=1), doc=results[0].deps["doc"].output) \
+        == results[0].output
+    assert batch_sizes[-1] == 1
+
+
+def test_batch_latency():
+    full_config = OmegaConf.create(config_str)
+    batch_sizes: list[int] = []
+    create_pipeline(batch_sizes, batch_size=100, max_batch_latency=0.0).run(full_config)
+    assert batch_sizes == [1, 1, 1, 1]
+
+
+def test_batched_step_with_cache():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(cache_base_dir=tmpdirname)
+
+        batch_sizes: list[int] = []
+        create_pipeline(batch_sizes, cache_outputs=True).run(full_config)
+        assert batch_sizes == [4]
+
+        full_config.truncated_doc.nsentences = [1, 2, 3]
+        batch_sizes = []
+        pipeline = create_pipeline(batch_sizes, cache_outputs=True)
+        pipeline.run(full_config)
+        assert batch_sizes == [2]
+        assert [fso.output.nsentences for fso in pipeline.results["truncated_doc"]] == [1, 2, 3] * 2
+
+
+def test_bad_batch():
+    class BadBatchStep(PipelineStepBase):
+        def __init__(self):
+            super().__init__(step_name="truncated_doc", deps_spec="doc", input_type=TruncatedDocInput)
+
+        def batch_input_to_output(self, inputs, deps_list):
+            return []
+
+    pipeline = PipelineBase()
+    pipeline.add_steps([DocStep(), BadBatchStep()])
+    with pytest.raises(ValueError):
+        pipeline.run(OmegaConf.create(config_str))
+
+    with pytest.raises(ValueError):
+        PipelineStepBase("some_step", batch_size=0)
+
+    class NoMethod:
+        pass
+    with pytest.raises(ValueError):
+        PipelineStepBase.auto_step("no_method")(NoMethod)
+
+
+def test_batched_step_resume_and_hooks():
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc", batch_size=4)
+    class SometimesNoneStep:
+        def batch_input_to_output(
+            self,
+            inputs: list[TruncatedDocInput],
+            deps_list: list[dict[str, DocOutput]],
+        ) -> list[TruncatedDocOutput]:
+            batch_sizes.append(len(inputs))
+            time.sleep(0.2)
+            return [None if input.nsentences == 1 else truncate(input, deps["doc"]) for input, deps in zip(inputs, deps_list)]
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(checkpoint_dir=tmpdirname)
+
+        batch_sizes: list[int] = []
+        seconds: list[float] = []
+        pipeline = PipelineBase()
+        pipeline.add_steps([DocStep(), SometimesNoneStep()])
+        pipeline.hooks.register("on_input_end", lambda **kwargs: seconds.append(kwargs["seconds"]))
+        pipeline.run(full_config, checkpoint=True)
+        assert batch_sizes == [4]
+        # the batch's time is shared between its inputs
+        assert len(seconds) == 4 + 2
+        assert 0.15 <= sum(seconds[2:]) < 0.4
+
+        # outputs that are None are resumed like any other
+        batch_sizes.clear()
+        pipeline = PipelineBase()
+        pipeline.add_steps([DocStep(), SometimesNoneStep()])
+        pipeline.run(full_config, resume=True)
+        assert batch_sizes == []
+        assert [fso.output is None for fso in pipeline.results["truncated_doc"]] == [True, False] * 2
@@ -5,7 +5,7 @@ from pydantic import BaseModel
 
 from pypes.caching.base import CacheKeyBase
 from pypes.caching.null import NullCache
-from pypes.caching.dir import DirCachedStringDict, DirCachedJsonDict
+from pypes.caching.dir import DirCachedStringDict, DirCachedJsonDict, DirCachedDillDict
 
 import pytest
 
@@ -129,3 +129,35 @@ def test_dir_cached_string_dict():
         assert list(cache2.keys()) == list(dict_expected.keys())
         assert list(cache2.values()) == list(dict_expected.values())
         assert list(cache2) == list(dict_expected)
+
+
+def test_dir_cached_dill_dict():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        cache_dir = Path(tmpdirname) / "the_cache"
+        with pytest.raises(AssertionError):
+            DirCachedDillDict(cache_dir=cache_dir, assert_exists=True)
+
+        key1 = "dummy1"
+        key2 = "dummy2"
+        val1 = SimpleCacheKey(key="dummy1_value")
+        val2 = {"a": [1, 2], "b": SimpleCacheKey(key="dummy2_value")}
+
+        cache1 = DirCachedDillDict(cache_dir=cache_dir, assert_exists=False)
+        assert key1 not in cache1
+        with pytest.raises(KeyError):
+            cache1[key1]
+
+        cache1[key1] = val1
+        cache1[key2] = val2
+        assert (cache_dir / f"{key1}.dill").exists()
+        assert not list(cache_dir.glob("*.tmp"))
+        assert cache1[key1] == val1
+        assert cache1[key2] == val2
+
+        cache2 = DirCachedDillDict(cache_dir=cache_dir, assert_exists=True)
+        assert key1 in cache2
+        assert key2 in cache2
+        assert cache2[key1] == val1
+        assert cache2[key2] == val2
+        assert list(cache2.keys()) == [key1, key2]
+        assert list(cache2) == [key1, key2]
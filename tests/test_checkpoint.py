@@ -0,0 +1,195 @@
+from pathlib import Path
+import tempfile
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.step import PipelineStepBase
+from pypes.base.pipeline import PipelineBase
+from pypes.results.segments import SegmentWriter, iter_segment, valid_length
+from pypes.utils.pydantic_utils import get_fields_dict
+
+import pytest
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  nsentences: [1, 2]
+
+"""
+
+
+class Crash(Exception):
+    pass
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+
+
+def create_pipeline(
+    calls: dict[str, int],
+    crash_after: int|None = None,
+    truncated_doc_version: str|None = None,
+) -> PipelineBase:
+    @PipelineStepBase.auto_step("doc")
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            calls["doc"] += 1
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc", code_version=truncated_doc_version)
+    class TruncatedDocStep:
+        def input_to_output(self, input: TruncatedDocInput, doc: DocOutput, **kwargs) -> TruncatedDocOutput:
+            if crash_after is not None and calls["truncated_doc"] >= crash_after:
+                raise Crash()
+            calls["truncated_doc"] += 1
+            sentences = doc.text.split(".")[:input.nsentences]
+            return TruncatedDocOutput(
+                **get_fields_dict(input),
+                text=".".join(sentences),
+            )
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TruncatedDocStep()])
+    return the_pipeline
+
+
+def test_resume_after_crash():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(checkpoint_dir=str(tmp_dir))
+
+        calls = dict(doc=0, truncated_doc=0)
+        reference = create_pipeline(calls)
+        reference.run(full_config)
+
+        calls = dict(doc=0, truncated_doc=0)
+        with pytest.raises(Crash):
+            create_pipeline(calls, crash_after=3).run(full_config, checkpoint=True)
+        assert calls == dict(doc=2, truncated_doc=3)
+
+        calls = dict(doc=0, truncated_doc=0)
+        resumed = create_pipeline(calls)
+        resumed.run(full_config, resume=True)
+        assert calls == dict(doc=0, truncated_doc=1)
+
+        for step_name in ["doc", "truncated_doc"]:
+            assert [fso.output for fso in resumed.results[step_name]] \
+                == [fso.output for fso in reference.results[step_name]]
+        for fso in resumed.results["truncated_doc"]:
+            assert any(fso.deps["doc"] is fso_doc for fso_doc in resumed.results["doc"])
+
+        # everything is complete now, so resuming again recomputes nothing
+        calls = dict(doc=0, truncated_doc=0)
+        create_pipeline(calls).run(full_config, resume=True)
+        assert calls == dict(doc=0, truncated_doc=0)
+
+        # a fresh checkpointed run starts over
+        calls = dict(doc=0, truncated_doc=0)
+        create_pipeline(calls).run(full_config, checkpoint=True)
+        assert calls == dict(doc=2, truncated_doc=4)
+
+
+def test_resume_after_changes():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(checkpoint_dir=tmpdirname)
+
+        calls = dict(doc=0, truncated_doc=0)
+        create_pipeline(calls).run(full_config, checkpoint=True)
+        assert calls == dict(doc=2, truncated_doc=4)
+
+        # a changed sub-config invalidates the whole step
+        full_config.truncated_doc.nsentences = [1, 3]
+        calls = dict(doc=0, truncated_doc=0)
+        resumed = create_pipeline(calls)
+        resumed.run(full_config, resume=True)
+        assert calls == dict(doc=0, truncated_doc=4)
+        assert [fso.output.nsentences for fso in resumed.results["truncated_doc"]] == [1, 3, 1, 3]
+
+        # a changed upstream output only invalidates the outputs that depend on it
+        full_config.doc[1].text = "Another document. It has changed."
+        calls = dict(doc=0, truncated_doc=0)
+        resumed = create_pipeline(calls)
+        resumed.run(full_config, resume=True)
+        assert calls == dict(doc=2, truncated_doc=2)
+        # the superseded outputs were dropped from the segment: header, 4 outputs, complete marker
+        assert len(list(iter_segment(tmp_dir / "truncated_doc.seg"))) == 1 + 4 + 1
+
+        calls = dict(doc=0, truncated_doc=0)
+        reference = create_pipeline(calls)
+        reference.run(full_config)
+        for step_name in ["doc", "truncated_doc"]:
+            assert [fso.output for fso in resumed.results[step_name]] \
+                == [fso.output for fso in reference.results[step_name]]
+
+        # changed code invalidates the whole step
+        calls = dict(doc=0, truncated_doc=0)
+        create_pipeline(calls, truncated_doc_version="2").run(full_config, resume=True)
+        assert calls == dict(doc=0, truncated_doc=4)
+
+        calls = dict(doc=0, truncated_doc=0)
+        create_pipeline(calls, truncated_doc_version="2").run(full_config, resume=True)
+        assert calls == dict(doc=0, truncated_doc=0)
+
+
+def test_resume_shards():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(checkpoint_dir=tmpdirname)
+
+        num_outputs = []
+        for shard_index in range(2):
+            calls = dict(doc=0, truncated_doc=0)
+            pipeline = create_pipeline(calls)
+            pipeline.run(full_config, shard_index=shard_index, num_shards=2, checkpoint=True)
+            num_outputs.append(len(pipeline.results["truncated_doc"]))
+        assert sum(num_outputs) == 4
+
+        # every shard resumes from its own checkpoints
+        for shard_index in range(2):
+            calls = dict(doc=0, truncated_doc=0)
+            pipeline = create_pipeline(calls)
+            pipeline.run(full_config, shard_index=shard_index, num_shards=2, resume=True)
+            assert calls == dict(doc=0, truncated_doc=0)
+            assert len(pipeline.results["truncated_doc"]) == num_outputs[shard_index]
+
+
+def test_segment_torn_tail():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        fpath = Path(tmpdirname) / "step.seg"
+        with SegmentWriter(fpath) as writer:
+            offsets = [writer.append(dict(index=i)) for i in range(3)]
+        complete_length = fpath.stat().st_size
+
+        with open(fpath, 'ab') as f:
+            f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00partial")
+
+        assert [offset for offset, _ in iter_segment(fpath)] == offsets
+        assert [record["index"] for _, record in iter_segment(fpath)] == [0, 1, 2]
+        assert valid_length(fpath) == complete_length
+        assert list(iter_segment(Path(tmpdirname) / "missing.seg")) == []
@@ -0,0 +1,182 @@
+from pathlib import Path
+import tempfile
+
+import numpy as np
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.core.mytyping import GroupedFullDepsDict
+from pypes.base.step import PipelineStepBase
+from pypes.base.grouped import PipelineGroupedStep
+from pypes.base.pipeline import PipelineBase
+from pypes.results.columnar import (
+    ColumnarStep,
+    ObjectColumn,
+    column_kind,
+    is_columnar_results,
+    iter_columnar_results,
+    read_columnar_results,
+    write_column,
+    write_columnar_results,
+)
+from pypes.utils.pydantic_utils import get_fields_dict
+
+import pytest
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  ntrials: 2
+  nsentences: [1, 2]
+
+doc_stats: {}
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+    ratio: float
+    tags: list[str]
+
+
+class StatsOutput(StepInput):
+    count: int
+    total_length: int
+
+
+def create_pipeline() -> PipelineBase:
+    @PipelineStepBase.auto_step("doc")
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc")
+    class TruncatedDocStep:
+        def input_to_output(self, input: TruncatedDocInput, doc: DocOutput, **kwargs) -> TruncatedDocOutput:
+            text = ".".join(doc.text.split(".")[:input.nsentences])
+            return TruncatedDocOutput(
+                **get_fields_dict(input),
+                text=text,
+                ratio=len(text) / len(doc.text),
+                tags=[doc.name] * input.nsentences,
+            )
+
+    @PipelineGroupedStep.auto_step("doc_stats", deps_spec="truncated_doc", group_by="doc")
+    class DocStatsStep:
+        def input_to_output(self, input: StepInput, doc: DocOutput, truncated_doc: list[TruncatedDocOutput], **kwargs) -> StatsOutput:
+            return StatsOutput(
+                trial=input.trial,
+                count=len(truncated_doc),
+                total_length=sum(len(td.text) for td in truncated_doc),
+            )
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TruncatedDocStep(), DocStatsStep()])
+    return the_pipeline
+
+
+def test_columnar_roundtrip():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        results_dir = Path(tmpdirname) / "columnar"
+        pipeline = create_pipeline()
+        pipeline.run(OmegaConf.create(config_str))
+        pipeline.save_columnar_results(results_dir)
+        assert is_columnar_results(results_dir)
+
+        results = PipelineBase.load_results(results_dir)
+        assert list(results.keys()) == ["doc", "truncated_doc", "doc_stats"]
+        for step_name, fsos in pipeline.results.items():
+            assert [fso.output for fso in results[step_name]] == [fso.output for fso in fsos]
+            assert all(fso.step_name == step_name for fso in results[step_name])
+
+        # lineage is shared, not copied
+        docs = results["doc"]
+        for fso, original in zip(results["truncated_doc"], pipeline.results["truncated_doc"], strict=True):
+            assert fso.deps["doc"] is docs[pipeline.results["doc"].index(original.deps["doc"])]
+        for fso in results["doc_stats"]:
+            assert isinstance(fso.deps, GroupedFullDepsDict)
+            assert len(fso.deps.members) == 4
+            assert all(member["doc"] is fso.deps["doc"] for member in fso.deps.members)
+            assert all(member["truncated_doc"] in results["truncated_doc"] for member in fso.deps.members)
+
+        step = ColumnarStep(results_dir / "truncated_doc")
+        assert step.meta["columns"] == dict(
+            trial="int64", nsentences="int64", text="string", ratio="float64", tags="object",
+        )
+        df = step.to_df(["trial", "text"])
+        assert list(df.columns) == ["trial", "text"]
+        assert list(df.text) == [fso.output.text for fso in pipeline.results["truncated_doc"]]
+        assert "ratio" not in step._columns
+
+        only_stats = read_columnar_results(results_dir, steps=["doc_stats"])
+        assert list(only_stats.keys()) == ["doc_stats"]
+        with pytest.raises(KeyError):
+            read_columnar_results(results_dir, steps=["nothing"])
+
+        steps = iter_columnar_results(results_dir)
+        step_name, docs = next(steps)
+        assert step_name == "doc"
+        assert [fso.output for fso in docs] == [fso.output for fso in pipeline.results["doc"]]
+        rest = dict(steps)
+        assert list(rest.keys()) == ["truncated_doc", "doc_stats"]
+        assert all(fso.deps["doc"] in docs for fso in rest["truncated_doc"])
+
+
+def test_columnar_released_ancestors():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        results_dir = Path(tmpdirname) / "columnar"
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(spill_dir=tmpdirname)
+        pipeline = create_pipeline()
+        pipeline.run(full_config, keep_results="final")
+        assert list(pipeline.results.keys()) == ["doc_stats"]
+        write_columnar_results(pipeline.results, results_dir)
+
+        results = read_columnar_results(results_dir)
+        assert list(results.keys()) == ["doc", "truncated_doc", "doc_stats"]
+        assert len(results["doc"]) == 2
+        assert len(results["truncated_doc"]) == 8
+
+
+def test_column_kind():
+    assert column_kind([True, False]) == "bool"
+    assert column_kind([1, 2]) == "int64"
+    assert column_kind([1.0, 2.5]) == "float64"
+    # mixed ints and floats, and ints beyond int64, keep their exact values
+    assert column_kind([1, 2.5]) == "object"
+    assert column_kind([2**63, 1]) == "object"
+    assert column_kind([-2**63, 2**63 - 1]) == "int64"
+    assert column_kind(["a", "b"]) == "string"
+    assert column_kind(["a", None]) == "object"
+    assert column_kind([]) == "object"
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        columns_dir = Path(tmpdirname)
+        assert write_column(columns_dir, "x", [2**63, 1]) == "object"
+        column = ObjectColumn(columns_dir / "x.seg", np.load(columns_dir / "x.offsets.npy"))
+        assert list(column) == [2**63, 1]
+        assert write_column(columns_dir, "y", [1, 2.5]) == "object"
+        column = ObjectColumn(columns_dir / "y.seg", np.load(columns_dir / "y.offsets.npy"))
+        assert [type(value) for value in column] == [int, float]
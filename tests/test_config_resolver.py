@@ -1,8 +1,11 @@
 from omegaconf import OmegaConf, DictConfig
+from omegaconf.errors import ReadonlyConfigError
 from pydantic import BaseModel
 
 from pypes.resolvers.config import ConfigResolver
 
+import pytest
+
 
 config_str = """
 step1:
@@ -89,3 +92,93 @@ def test_pydantic():
         assert sub_configs == [DictConfig(dict(some_field=1, other_field="a string"))]
         proto_inputs = list(cr.resolve_sub_config(sub_configs[0]))
         assert proto_inputs == [Step1Input(trial=0, some_field=1, other_field="a string")]
+
+
+def test_sub_config_expansion_is_cached():
+    full_config = OmegaConf.create(config_str)
+
+    class ListStepInput(BaseModel, frozen=True):
+        trial: int
+        field1: int
+        field2: str
+
+    cr = ConfigResolver(
+        step_name="step_with_list",
+        proto_input_type=ListStepInput,
+    )
+    sub_config = next(iter(cr.get_sub_configs(full_config)))
+    first = list(cr.resolve_sub_config(sub_config))
+    second = list(cr.resolve_sub_config(sub_config))
+    assert first == second
+    # fresh input objects unless the step opts into reusing them
+    assert all(x is not y for x, y in zip(first, second, strict=True))
+    assert len(cr._expansion_cache) == 1
+
+    cr.clear_cache()
+    assert not cr._expansion_cache
+
+
+def test_reuse_inputs():
+    full_config = OmegaConf.create(config_str)
+
+    cr = ConfigResolver(
+        step_name="step_with_list",
+        proto_input_type=DictConfig,
+        reuse_inputs=True,
+    )
+    sub_config = next(iter(cr.get_sub_configs(full_config)))
+    first = cr.resolve_sub_config(sub_config)
+    second = cr.resolve_sub_config(sub_config)
+    assert first is second
+    assert list(first) == [
+        DictConfig(dict(trial=0, field1=x, field2="abc"))
+        for x in [1, 2, 3]
+    ]
+    # shared DictConfig inputs are made read-only
+    with pytest.raises(ReadonlyConfigError):
+        first[0].field2 = "changed"
+
+
+def test_sub_config_expansion_indexing():
+    sub_config = OmegaConf.create(dict(ntrials=3, a=[1, 2], b=["x", "y", "z"], c="fixed"))
+    cr = ConfigResolver(step_name="dummy", proto_input_type=DictConfig)
+    expansion = cr.resolve_sub_config(sub_config)
+
+    expected = [
+        DictConfig(dict(trial=trial, a=a, b=b, c="fixed"))
+        for a in [1, 2]
+        for b in ["x", "y", "z"]
+        for trial in range(3)
+    ]
+    assert len(expansion) == len(expected)
+    assert list(expansion) == expected
+    assert [expansion[i] for i in range(len(expansion))] == expected
+    assert expansion[-1] == expected[-1]
+
+    shard = expansion[1::4]
+    assert len(shard) == len(expected[1::4])
+    assert list(shard) == expected[1::4]
+    assert list(shard[1:3]) == expected[1::4][1:3]
+
+    with pytest.raises(IndexError):
+        expansion[len(expected)]
+
+
+def test_config_expansion_across_sub_configs():
+    full_config = OmegaConf.create(config_str)
+    cr = ConfigResolver(
+        step_name="step_with_list_config",
+        proto_input_type=DictConfig,
+    )
+    expansion = cr.expand(full_config)
+    expected = [
+        DictConfig(dict(trial=0, field1=1, field2=2)),
+        DictConfig(dict(trial=0, field1=2, field2=1)),
+    ]
+    assert len(expansion) == 2
+    assert list(expansion) == expected
+    assert [expansion[0], expansion[1]] == expected
+    assert expansion[-1] == expected[-1]
+    assert expansion[1:] == expected[1:]
+    with pytest.raises(IndexError):
+        expansion[2]
@@ -140,3 +140,38 @@ def test_deps_resolver(step_num: int):
     else:
         fdds_expected = fdd_comp_list([fso.deps for fso in all_results[step_name]])
     assert fdds_actual == fdds_expected
+
+
+def test_deps_resolver_cross_join_is_lazy():
+    dr = DepsResolver()
+    fdds = dr.resolve_deps(
+        deps_spec=deps_spec_by_step_name["step7"],
+        prev_results=get_prev_results(7),
+    )
+    # independent deps are kept as separate factors rather than a materialized product
+    assert [len(factor) for factor in fdds.factors] == [2, 2]
+    assert len(fdds) == 4
+
+    fdds_expected = fdd_comp_list([fso.deps for fso in all_results["step7"]])
+    assert fdd_comp_list(fdds) == fdds_expected
+    assert fdd_comp_list(fdds[i] for i in range(len(fdds))) == fdds_expected
+    assert fdd_comp_list([fdds[-1]]) == fdds_expected[-1:]
+    assert fdd_comp_list(fdds[1:3]) == fdds_expected[1:3]
+
+    with pytest.raises(IndexError):
+        fdds[len(fdds)]
+
+
+def test_deps_resolver_merges_within_factor():
+    # step6 shares an ancestor with step5 but not with step1
+    dr = DepsResolver()
+    fdds = dr.resolve_deps(
+        deps_spec=["step1", "step5", "step6"],
+        prev_results=get_prev_results(7),
+    )
+    assert len(fdds) == 4
+    assert fdd_comp_list(fdds) == [
+        dict(step1=fso_1, step5=fso_6.deps.data["step5"], step6=fso_6)
+        for fso_1 in all_results["step1"]
+        for fso_6 in all_results["step6"]
+    ]
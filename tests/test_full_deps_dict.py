@@ -1,4 +1,6 @@
-from pypes.core.mytyping import FullDepsDict
+from pypes.core.mytyping import FullDepsDict, FullStepOutput
+
+import pytest
 
 from .test_deps_resolver import get_prev_results
 
@@ -19,3 +21,35 @@ def test_full_deps_dict_hashing():
 
     # ensure repr doesn't cause an error
     assert repr(fdd1)
+
+
+def test_full_deps_dict_is_compact():
+    step4_results = get_prev_results(5)["step4"]
+    fdd_a, fdd_b = [fso.deps for fso in step4_results]
+
+    # same ancestry -> one shared label tuple, and no per-instance __dict__
+    assert fdd_a.labels is fdd_b.labels
+    assert not hasattr(fdd_a, "__dict__")
+    assert not hasattr(step4_results[0], "__dict__")
+
+    assert len(fdd_a) == 3
+    assert "step2" in fdd_a
+    assert fdd_a["step2"] is fdd_a.data["step2"]
+    assert dict(fdd_a.items()) == fdd_a.data
+    with pytest.raises(KeyError):
+        fdd_a["step4"]
+
+    with pytest.raises(ValueError):
+        FullDepsDict.from_items(("step1",), ())
+
+
+def test_full_deps_dict_roundtrip_through_df():
+    step4_results = get_prev_results(5)["step4"]
+    df = FullStepOutput.list_to_df(step4_results)
+    assert list(df.columns) == ["step1", "step2", "step3", "step4"]
+    fdds = FullDepsDict.list_from_df(df)
+    assert [fdd.data for fdd in fdds] == [
+        {**fso.deps.data, "step4": fso}
+        for fso in step4_results
+    ]
+    assert fdds[0].labels is fdds[1].labels
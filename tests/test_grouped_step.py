@@ -0,0 +1,155 @@
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.core.mytyping import GroupedFullDepsDict
+from pypes.base.step import PipelineStepBase
+from pypes.base.grouped import PipelineGroupedStep
+from pypes.base.pipeline import PipelineBase
+from pypes.utils.pydantic_utils import get_fields_dict
+
+import pytest
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  ntrials: 2
+  nsentences: [1, 2]
+
+doc_stats: {}
+
+global_stats: {}
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+@PipelineStepBase.auto_step("doc")
+class DocStep:
+    def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+        return DocOutput(**get_fields_dict(input))
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+
+@PipelineStepBase.auto_step("truncated_doc", deps_spec="doc")
+class TruncatedDocStep:
+    def input_to_output(self, input: TruncatedDocInput, doc: DocOutput, **kwargs) -> TruncatedDocOutput:
+        sentences = doc.text.split(".")[:input.nsentences]
+        return TruncatedDocOutput(
+            **get_fields_dict(input),
+            text=".".join(sentences),
+        )
+
+
+class StatsOutput(StepInput):
+    count: int
+    total_length: int
+
+@PipelineGroupedStep.auto_step("doc_stats", deps_spec="truncated_doc", group_by="doc")
+class DocStatsStep:
+    def input_to_output(self, input: StepInput, doc: DocOutput, truncated_doc: list[TruncatedDocOutput], **kwargs) -> StatsOutput:
+        assert isinstance(doc, DocOutput)
+        return StatsOutput(
+            trial=input.trial,
+            count=len(truncated_doc),
+            total_length=sum(len(td.text) for td in truncated_doc),
+        )
+
+
+@PipelineGroupedStep.auto_step("global_stats", deps_spec="truncated_doc")
+class GlobalStatsStep:
+    def input_to_output(self, input: StepInput, doc: list[DocOutput], truncated_doc: list[TruncatedDocOutput], **kwargs) -> StatsOutput:
+        assert len(doc) == len(truncated_doc)
+        return StatsOutput(
+            trial=input.trial,
+            count=len(truncated_doc),
+            total_length=sum(len(td.text) for td in truncated_doc),
+        )
+
+
+@pytest.fixture
+def pipeline() -> PipelineBase:
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps(
+        [
+            DocStep(),
+            TruncatedDocStep(),
+            DocStatsStep(),
+            GlobalStatsStep(),
+        ],
+    )
+    return the_pipeline
+
+
+def test_grouped_step(pipeline: PipelineBase):
+    full_config = OmegaConf.create(config_str)
+    pipeline.run(full_config)
+    results = pipeline.results
+
+    truncated_by_doc = {
+        id(fso_doc): [
+            len(fso.output.text)
+            for fso in results["truncated_doc"]
+            if fso.deps["doc"] is fso_doc
+        ]
+        for fso_doc in results["doc"]
+    }
+
+    doc_stats = results["doc_stats"]
+    assert len(doc_stats) == len(results["doc"])
+    for fso, fso_doc in zip(doc_stats, results["doc"], strict=True):
+        assert isinstance(fso.deps, GroupedFullDepsDict)
+        assert fso.deps.data == dict(doc=fso_doc)
+        assert len(fso.deps.members) == 4
+        assert fso.output == StatsOutput(
+            trial=0,
+            count=4,
+            total_length=sum(truncated_by_doc[id(fso_doc)]),
+        )
+
+    global_stats = results["global_stats"]
+    assert len(global_stats) == 1
+    assert global_stats[0].deps.data == {}
+    assert global_stats[0].output.count == len(results["truncated_doc"])
+
+
+def test_grouped_step_requires_deps():
+    with pytest.raises(ValueError):
+        PipelineGroupedStep("no_deps")
+
+
+def test_grouped_step_bad_group_by(pipeline: PipelineBase):
+    class BadStatsStep(PipelineGroupedStep):
+        def __init__(self):
+            super().__init__(
+                step_name="bad_stats",
+                deps_spec="doc",
+                group_by="truncated_doc",
+                input_type=StepInput,
+                output_type=StatsOutput,
+            )
+
+    pipeline.add_step(BadStatsStep())
+    full_config = OmegaConf.create(config_str + "\nbad_stats: {}\n")
+    with pytest.raises(ValueError):
+        pipeline.run(full_config)
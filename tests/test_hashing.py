@@ -1,8 +1,9 @@
 from copy import deepcopy
 
+from omegaconf import OmegaConf
 from pydantic import BaseModel
 
-from pypes.utils.hashing import myhash
+from pypes.utils.hashing import myhash, stable_hash
 
 import pytest
 
@@ -51,3 +52,26 @@ def test_dict_hashing_is_order_dependent():
     dict1 = {"a": 1, "b": 2}
     dict2 = {"b": 2, "a": 1}
     assert myhash(dict1) != myhash(dict2)
+
+
+class Payload:
+    def __init__(self, value: int):
+        self.value = value
+
+
+class ModelWithPayload(BaseModel, arbitrary_types_allowed=True):
+    x: int
+    payload: Payload
+
+
+def test_stable_hash():
+    # any picklable object, hashed by content rather than by repr (which holds the address here)
+    assert stable_hash(Payload(1)) == stable_hash(Payload(1))
+    assert stable_hash(Payload(1)) != stable_hash(Payload(2))
+    assert stable_hash(ModelWithPayload(x=1, payload=Payload(1))) == stable_hash(ModelWithPayload(x=1, payload=Payload(1)))
+    assert stable_hash(ModelWithPayload(x=1, payload=Payload(1))) != stable_hash(ModelWithPayload(x=1, payload=Payload(2)))
+
+    assert stable_hash(MyModel(x=1, s="dummy")) == stable_hash(MyModel(x=1, s="dummy"))
+    assert stable_hash(MyModel(x=1, s="dummy")) != stable_hash(MyModel(x=2, s="dummy"))
+    assert stable_hash({"a": 1, "b": 2}) == stable_hash({"b": 2, "a": 1})
+    assert stable_hash(OmegaConf.create({"a": [1, 2]})) == stable_hash({"a": [1, 2]})
@@ -0,0 +1,141 @@
+from pathlib import Path
+import tempfile
+from typing import Any, Generator
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.step import PipelineStepBase
+from pypes.base.pipeline import PipelineBase
+from pypes.artifacts.step import PipelineStepWithArtifacts
+from pypes.artifacts.self.serial import ArtifactSerialSelfResolver
+from pypes.artifacts.self.dummy import (
+    DummyStrDictArtifactSelfRequest,
+    DummyStrDictArtifactResponse,
+)
+from pypes.core.hooks import HookRegistry
+from pypes.utils.pydantic_utils import get_fields_dict
+
+import pytest
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+translated_doc:
+  language: [fr, de]
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TranslatedDocInput(StepInput):
+    language: str
+
+class TranslatedDocOutput(TranslatedDocInput):
+    text: str
+
+
+def create_pipeline() -> PipelineBase:
+    @PipelineStepBase.auto_step("doc", cache_outputs=True)
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepWithArtifacts.auto_step(
+        "translated_doc",
+        deps_spec="doc",
+        artifact_resolver=ArtifactSerialSelfResolver(),
+    )
+    class TranslatedDocStep:
+        def gen_input_to_output(self, input: TranslatedDocInput, doc: DocOutput, **kwargs) \
+                -> Generator[DummyStrDictArtifactSelfRequest, DummyStrDictArtifactResponse, TranslatedDocOutput]:
+            response = yield DummyStrDictArtifactSelfRequest(
+                content=f"[language={input.language}] {doc.text}",
+                cache_heading="dummy",
+            )
+            return TranslatedDocOutput(**get_fields_dict(input), text=response.content)
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TranslatedDocStep()])
+    return the_pipeline
+
+
+class Recorder:
+    def __init__(self):
+        self.events: list[tuple[str, dict[str, Any]]] = []
+
+    def __getattr__(self, name: str):
+        if name not in HookRegistry.EVENTS:
+            raise AttributeError(name)
+        return lambda **kwargs: self.events.append((name, kwargs))
+
+    def names(self, step_name: str|None = None) -> list[str]:
+        return [name for name, kwargs in self.events if step_name in (None, kwargs.get("step_name"))]
+
+
+def test_hooks():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(cache_base_dir=tmpdirname)
+
+        pipeline = create_pipeline()
+        recorder = Recorder()
+        pipeline.hooks.register_object(recorder)
+        pipeline.run(full_config)
+
+        assert recorder.events[0] == ("on_run_start", dict(step_names=["doc", "translated_doc"], config=full_config))
+        assert recorder.events[-1][0] == "on_run_end"
+        assert recorder.names("doc") == [
+            "on_step_start",
+            *["on_input_start", "on_cache_miss", "on_input_end"] * 2,
+            "on_step_end",
+        ]
+        assert recorder.names("translated_doc") == [
+            "on_step_start",
+            *["on_input_start", "on_cache_miss", "on_artifact_request", "on_input_end"] * 4,
+            "on_step_end",
+        ]
+
+        step_start = [kwargs for name, kwargs in recorder.events if name == "on_step_start"]
+        assert step_start == [dict(step_name="doc", num_inputs=2), dict(step_name="translated_doc", num_inputs=4)]
+        input_end = next(kwargs for name, kwargs in recorder.events if name == "on_input_end")
+        assert (input_end["row_index"], input_end["input_index"]) == (0, 0)
+        assert input_end["output"] == pipeline.results["doc"][0].output
+        assert input_end["seconds"] >= 0
+        step_end = [kwargs for name, kwargs in recorder.events if name == "on_step_end"]
+        assert [kwargs["num_outputs"] for kwargs in step_end] == [2, 4]
+
+        # a second run hits every cache
+        pipeline = create_pipeline()
+        hits: list[tuple[str, str]] = []
+
+        @pipeline.hooks.on("on_cache_hit")
+        def record_hit(step_name: str, cache: str, **kwargs) -> None:
+            hits.append((step_name, cache))
+
+        pipeline.run(full_config)
+        assert hits == [("doc", "step_output")] * 2 + [("translated_doc", "dummy")] * 4
+
+        pipeline.hooks.unregister("on_cache_hit", record_hit)
+        assert not pipeline.hooks.active("on_cache_hit")
+
+
+def test_unknown_hook_event():
+    with pytest.raises(ValueError):
+        HookRegistry().register("on_nothing", lambda **kwargs: None)
@@ -273,3 +273,54 @@ def test_save_results(pipeline: Pipeline):
 def test_duplicate_step(pipeline: Pipeline):
     with pytest.raises(ValueError):
         pipeline.add_step(DocStep())
+
+
+def test_count_inputs(pipeline: Pipeline):
+    full_config = OmegaConf.create(config_str)
+    pipeline.run(full_config)
+    for step_name, step in pipeline._steps.items():
+        full_deps_dicts = step.resolve_deps()
+        count = step.count_inputs(full_config, full_deps_dicts)
+        assert count == len(pipeline.results[step_name])
+    # counts are unknown when the deps rows are not sized
+    assert pipeline._steps["doc"].count_inputs(full_config, iter([])) is None
+
+
+def test_run_targets(pipeline: Pipeline):
+    full_config = OmegaConf.create(config_str)
+    pipeline.run(full_config, targets=["truncated_doc"])
+    assert list(pipeline.results.keys()) == ["doc", "truncated_doc"]
+    assert len(pipeline.results["truncated_doc"]) == 4
+
+    with pytest.raises(ValueError):
+        Pipeline().run(full_config, targets=["unknown_step"])
+
+
+def test_run_targets_reusing_results(pipeline: Pipeline):
+    full_config = OmegaConf.create(config_str)
+    pipeline.run(full_config)
+    prev_results = pipeline.results
+
+    second_pipeline = Pipeline()
+    second_pipeline.add_steps([DocStep(), TruncatedDocStep(), TranslatedDocStep()])
+    second_pipeline.run(full_config, targets=["translated_doc"], reuse_results=prev_results)
+    results = second_pipeline.results
+    assert results["doc"] is prev_results["doc"]
+    assert results["truncated_doc"] is prev_results["truncated_doc"]
+    assert results["translated_doc"] is not prev_results["translated_doc"]
+    assert get_outputs(results["translated_doc"]) == get_outputs(prev_results["translated_doc"])
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        fpath = Path(tmpdirname) / "results.dill"
+        # only `doc` was saved, so `truncated_doc` is recomputed on top of the loaded docs
+        partial_pipeline = Pipeline()
+        partial_pipeline.add_steps([DocStep()])
+        partial_pipeline.run(full_config)
+        partial_pipeline.save_results(dill_path=fpath)
+
+        third_pipeline = Pipeline()
+        third_pipeline.add_steps([DocStep(), TruncatedDocStep(), TranslatedDocStep()])
+        third_pipeline.run(full_config, targets=["truncated_doc"], reuse_results=fpath)
+        assert list(third_pipeline.results.keys()) == ["doc", "truncated_doc"]
+        assert get_outputs(third_pipeline.results["doc"]) == get_outputs(prev_results["doc"])
+        assert get_outputs(third_pipeline.results["truncated_doc"]) == get_outputs(prev_results["truncated_doc"])
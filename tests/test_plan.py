@@ -0,0 +1,156 @@
+from pathlib import Path
+import tempfile
+from typing import Generator
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.step import PipelineStepBase
+from pypes.base.pipeline import PipelineBase
+from pypes.artifacts.step import PipelineStepWithArtifacts
+from pypes.artifacts.self.serial import ArtifactSerialSelfResolver
+from pypes.artifacts.self.dummy import (
+    DummyStrDictArtifactSelfRequest,
+    DummyStrDictArtifactResponse,
+)
+from pypes.utils.pydantic_utils import get_fields_dict
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+translated_doc:
+  language: [fr, de]
+
+length: {}
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TranslatedDocInput(StepInput):
+    language: str
+
+class TranslatedDocOutput(TranslatedDocInput):
+    text: str
+
+
+class LengthOutput(StepInput):
+    length: int
+
+
+def create_pipeline() -> PipelineBase:
+    @PipelineStepBase.auto_step("doc")
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepWithArtifacts.auto_step(
+        "translated_doc",
+        deps_spec="doc",
+        artifact_resolver=ArtifactSerialSelfResolver(),
+    )
+    class TranslatedDocStep:
+        def gen_input_to_output(self, input: TranslatedDocInput, doc: DocOutput, **kwargs) \
+                -> Generator[DummyStrDictArtifactSelfRequest, DummyStrDictArtifactResponse, TranslatedDocOutput]:
+            response = yield DummyStrDictArtifactSelfRequest(
+                content=f"[language={input.language}] {doc.text}",
+                cache_heading="dummy",
+            )
+            return TranslatedDocOutput(**get_fields_dict(input), text=response.content)
+
+    @PipelineStepBase.auto_step("length", deps_spec="translated_doc")
+    class LengthStep:
+        def input_to_output(self, input: StepInput, translated_doc: TranslatedDocOutput, **kwargs) -> LengthOutput:
+            return LengthOutput(trial=input.trial, length=len(translated_doc.text))
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TranslatedDocStep(), LengthStep()])
+    return the_pipeline
+
+
+def test_plan():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(cache_base_dir=str(tmp_dir / "cache"), stats_path=str(tmp_dir / "stats.json"))
+
+        # nothing cached, and nothing known about doc outputs
+        plan = create_pipeline().plan(full_config)
+        assert [
+            (step_plan.num_rows, step_plan.num_inputs, step_plan.num_known, step_plan.num_unprobed)
+            for step_plan in plan.steps.values()
+        ] == [(1, 2, 0, 0), (2, 4, 0, 4), (4, 4, 0, 4)]
+        assert plan.est_seconds is None
+
+        pipeline = create_pipeline()
+        pipeline.run(full_config)
+        assert pipeline.latency_stats.count("translated_doc") == 4
+        assert (tmp_dir / "stats.json").exists()
+
+        full_config.translated_doc.language = ["fr", "de", "es"]
+        pipeline = create_pipeline()
+        plan = pipeline.plan(full_config, execute_steps=["doc"], cost_per_output=dict(translated_doc=0.5))
+        assert pipeline.results == {}
+
+        translated_plan = plan.steps["translated_doc"]
+        assert translated_plan.num_inputs == 6
+        assert translated_plan.num_known == 4
+        assert translated_plan.num_cached_requests == 4
+        assert translated_plan.num_missed_requests == 2
+        assert translated_plan.expected_misses == 2
+        assert translated_plan.est_cost == 1.0
+        assert translated_plan.est_seconds == 2 * pipeline.latency_stats.mean_seconds("translated_doc")
+
+        length_plan = plan.steps["length"]
+        assert (length_plan.num_inputs, length_plan.num_known, length_plan.num_unprobed) == (6, 0, 2)
+        assert plan.est_seconds is not None
+
+        df = plan.to_df()
+        assert list(df.index) == ["doc", "translated_doc", "length"]
+        assert df.loc["translated_doc", "expected_misses"] == 2
+
+        # planning leaves a following run unaffected
+        pipeline.run(full_config)
+        assert len(pipeline.results["length"]) == 6
+        # only the two outputs whose artifacts were missing count towards latency
+        assert pipeline.latency_stats.count("translated_doc") == 4 + 2
+
+        pipeline = create_pipeline()
+        pipeline.run(full_config)
+        assert pipeline.latency_stats.count("translated_doc") == 4 + 2
+
+
+def test_plan_unknown_fan_out():
+    class FanOutStep(PipelineStepBase):
+        def __init__(self):
+            super().__init__(step_name="fan_out", deps_spec="doc", input_type=StepInput, output_type=LengthOutput)
+
+        def full_config_to_inputs(self, full_config, doc: DocOutput, **kwargs):
+            return [StepInput(trial=i) for i in range(len(doc.name))]
+
+    pipeline = create_pipeline()
+    pipeline.add_step(FanOutStep())
+    full_config = OmegaConf.create(config_str + "\nfan_out: {}\n")
+    plan = pipeline.plan(full_config, targets=["fan_out"])
+    assert list(plan.steps.keys()) == ["doc", "fan_out"]
+    assert plan.steps["fan_out"].num_inputs is None
+    assert plan.steps["fan_out"].expected_misses is None
+
+    plan = pipeline.plan(full_config, targets=["fan_out"], execute_steps=["doc"])
+    assert plan.steps["fan_out"].num_inputs == len("first-doc") + len("second-doc")
@@ -0,0 +1,160 @@
+from pathlib import Path
+import json
+import os
+import tempfile
+import time
+from typing import Generator, Iterable
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.step import PipelineStepBase
+from pypes.base.pipeline import PipelineBase
+from pypes.artifacts.step import PipelineStepWithArtifacts
+from pypes.artifacts.self.serial import ArtifactSerialSelfResolver
+from pypes.artifacts.self.dummy import (
+    DummyStrDictArtifactSelfRequest,
+    DummyStrDictArtifactResponse,
+)
+from pypes.utils.profiling import Profiler, get_profiler, profile_span
+from pypes.utils.pydantic_utils import get_fields_dict
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+translated_doc:
+  language: [fr, de]
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TranslatedDocInput(StepInput):
+    language: str
+
+class TranslatedDocOutput(TranslatedDocInput):
+    text: str
+
+
+def create_pipeline() -> PipelineBase:
+    @PipelineStepBase.auto_step("doc", cache_outputs=True)
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepWithArtifacts.auto_step(
+        "translated_doc",
+        deps_spec="doc",
+        artifact_resolver=ArtifactSerialSelfResolver(),
+    )
+    class TranslatedDocStep:
+        def gen_input_to_output(self, input: TranslatedDocInput, doc: DocOutput, **kwargs) \
+                -> Generator[DummyStrDictArtifactSelfRequest, DummyStrDictArtifactResponse, TranslatedDocOutput]:
+            response = yield DummyStrDictArtifactSelfRequest(
+                content=f"[language={input.language}] {doc.text}",
+                cache_heading="dummy",
+            )
+            return TranslatedDocOutput(**get_fields_dict(input), text=response.content)
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TranslatedDocStep()])
+    return the_pipeline
+
+
+def test_profiling():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(cache_base_dir=str(tmp_dir))
+
+        profiler = Profiler()
+        create_pipeline().run(full_config, profiler=profiler)
+        assert get_profiler() is None
+
+        counts: dict[tuple[str|None, str], int] = {}
+        for span in profiler.spans:
+            key = (span.step_name, span.name)
+            counts[key] = counts.get(key, 0) + 1
+            assert span.pid == os.getpid()
+            assert span.wall_ns >= 0
+        assert counts[("doc", "execute_step")] == 1
+        assert counts[("doc", "resolve_deps")] == 1
+        assert counts[("doc", "input_to_output")] == 2
+        assert counts[("doc", "output_cache_write")] == 2
+        assert counts[("translated_doc", "full_config_to_inputs")] == 2
+        assert counts[("translated_doc", "input_to_output")] == 4
+        assert counts[("translated_doc", "resolve_request")] == 4
+        assert counts[("translated_doc", "cache_write")] == 4
+
+        trace_path = tmp_dir / "trace.json"
+        profiler.save_chrome_trace(trace_path)
+        with open(trace_path) as fjson:
+            trace = json.load(fjson)
+        assert len(trace["traceEvents"]) == len(profiler.spans)
+        event = trace["traceEvents"][0]
+        assert event["ph"] == "X"
+        assert {"name", "cat", "ts", "dur", "pid", "tid"} <= set(event.keys())
+        assert "cpu_us" in event["args"]
+
+        summary = profiler.summary()
+        row = summary[(summary.step_name == "translated_doc") & (summary.name == "input_to_output")].iloc[0]
+        assert row["count"] == 4
+        assert row["p50_s"] <= row["p95_s"] <= row["p99_s"]
+
+        # a second run reads the doc outputs back from the cache
+        profiler = Profiler()
+        create_pipeline().run(full_config, profiler=profiler)
+        names = {(span.step_name, span.name) for span in profiler.spans}
+        assert ("doc", "output_cache_read") in names
+        assert ("doc", "input_to_output") not in names
+
+
+def test_profiling_lazy_inputs():
+    @PipelineStepBase.auto_step("doc")
+    class SlowInputsDocStep:
+        def full_config_to_inputs(self, full_config, **kwargs) -> Iterable[DocInput]:
+            for input in super().full_config_to_inputs(full_config, **kwargs):
+                time.sleep(0.05)
+                yield input
+
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    pipeline = PipelineBase()
+    pipeline.add_step(SlowInputsDocStep())
+    profiler = Profiler()
+    pipeline.run(OmegaConf.create(config_str), profiler=profiler)
+    assert len(pipeline.results["doc"]) == 2
+
+    # the span covers producing the inputs, not just creating the generator
+    [span] = [span for span in profiler.spans if span.name == "full_config_to_inputs"]
+    assert span.wall_ns >= 0.1e9
+
+
+def test_profiling_disabled():
+    assert get_profiler() is None
+    assert profile_span("anything") is profile_span("something else")
+    profiler = Profiler()
+    with profiler.activate():
+        with profile_span("outer", "some_step"):
+            with profile_span("inner"):
+                pass
+    with profile_span("ignored"):
+        pass
+    assert [(span.step_name, span.name) for span in profiler.spans] == [("some_step", "inner"), ("some_step", "outer")]
@@ -1,8 +1,9 @@
-from typing import Any, Generator
+from typing import Any, Generator, Sequence
 
 from pypes.utils.read_type_hints import (
     get_first_param_and_return_type,
     unpack_generator_type_hint,
+    unpack_list_type_hint,
 )
 
 import pytest
@@ -132,6 +133,17 @@ def test_unpack_gen():
         unpack_generator_type_hint(Generator)
 
 
+def test_unpack_list():
+    assert unpack_list_type_hint(list[A]) == A
+    assert unpack_list_type_hint(Sequence[B]) == B
+
+    with pytest.raises(ValueError):
+        unpack_list_type_hint(A)
+
+    with pytest.raises(ValueError):
+        unpack_list_type_hint(dict[A, B])
+
+
 def test_real_use_cases():
     class MyClass:
         def my_method(self, input: A, second_arg: B, **kwargs: Any) -> C:
@@ -0,0 +1,167 @@
+import gc
+from pathlib import Path
+import tempfile
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.step import PipelineStepBase
+from pypes.base.pipeline import PipelineBase
+from pypes.results.spill import SpillingResults
+from pypes.utils.dag import release_schedule, sink_steps
+from pypes.utils.pydantic_utils import get_fields_dict
+
+import pytest
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  nsentences: [1, 2]
+
+length: {}
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+
+
+class LengthOutput(StepInput):
+    length: int
+
+
+def create_pipeline(transient_truncated_doc: bool = False) -> PipelineBase:
+    @PipelineStepBase.auto_step("doc")
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc", transient=transient_truncated_doc)
+    class TruncatedDocStep:
+        def input_to_output(self, input: TruncatedDocInput, doc: DocOutput, **kwargs) -> TruncatedDocOutput:
+            sentences = doc.text.split(".")[:input.nsentences]
+            return TruncatedDocOutput(
+                **get_fields_dict(input),
+                text=".".join(sentences),
+            )
+
+    @PipelineStepBase.auto_step("length", deps_spec="truncated_doc")
+    class LengthStep:
+        def input_to_output(self, input: StepInput, truncated_doc: TruncatedDocOutput, **kwargs) -> LengthOutput:
+            return LengthOutput(trial=input.trial, length=len(truncated_doc.text))
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TruncatedDocStep(), LengthStep()])
+    return the_pipeline
+
+
+def lineage_outputs(pipeline: PipelineBase) -> list[tuple]:
+    return [
+        (fso.deps["doc"].output, fso.deps["truncated_doc"].output, fso.output)
+        for fso in pipeline.results["length"]
+    ]
+
+
+def test_release_schedule():
+    deps_by_step = dict(a=[], b=["a"], c=["a", "b"], d=["c"])
+    step_names = list(deps_by_step.keys())
+    assert sink_steps(deps_by_step, step_names) == ["d"]
+    assert release_schedule(deps_by_step, step_names, keep={"d"}) == dict(a=[], b=[], c=["a", "b"], d=["c"])
+    assert release_schedule(deps_by_step, step_names, keep={"a", "d"}) == dict(a=[], b=[], c=["b"], d=["c"])
+    assert release_schedule(deps_by_step, step_names, keep=set()) == dict(a=[], b=[], c=["a", "b"], d=["c", "d"])
+
+
+def test_keep_final_results():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(spill_dir=str(tmp_dir))
+
+        reference = create_pipeline()
+        reference.run(full_config)
+
+        pipeline = create_pipeline()
+        pipeline.run(full_config, keep_results="final")
+        assert list(pipeline.results.keys()) == ["length"]
+        for fso in pipeline.results["length"]:
+            assert not fso.is_spilled
+            assert fso.deps["doc"].is_spilled
+            assert fso.deps["truncated_doc"].is_spilled
+        assert lineage_outputs(pipeline) == lineage_outputs(reference)
+
+        # saving materializes the spilled payloads
+        dill_path = tmp_dir / "results.dill"
+        pipeline.save_results(dill_path=dill_path)
+        loaded = PipelineBase.load_results(dill_path)
+        for fso in loaded["length"]:
+            assert not fso.deps["doc"].is_spilled
+        assert [fso.deps["doc"].output for fso in loaded["length"]] \
+            == [fso.deps["doc"].output for fso in reference.results["length"]]
+
+        # the run's spill directory goes away with the last output referring to it
+        (spill_run_dir,) = [path for path in tmp_dir.iterdir() if path.is_dir()]
+        assert any(spill_run_dir.iterdir())
+        del pipeline, fso, loaded
+        gc.collect()
+        assert not spill_run_dir.exists()
+
+
+def test_reused_results_are_not_spilled():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(spill_dir=str(tmp_dir))
+
+        reference = create_pipeline()
+        reference.run(full_config)
+        prev_results = reference.results
+
+        for results in [None, SpillingResults(tmp_dir / "results")]:
+            pipeline = PipelineBase(results=results)
+            pipeline.add_steps(create_pipeline()._steps.values())
+            pipeline.run(full_config, targets=["length"], reuse_results=prev_results, keep_results="final")
+            assert pipeline.results["length"][0].deps["doc"] is prev_results["doc"][0]
+            for step_name in ["doc", "truncated_doc"]:
+                assert not any(fso.is_spilled for fso in prev_results[step_name])
+
+
+def test_transient_step():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(spill_dir=tmpdirname)
+
+        pipeline = create_pipeline(transient_truncated_doc=True)
+        pipeline.run(full_config)
+        assert list(pipeline.results.keys()) == ["doc", "length"]
+        assert not pipeline.results["doc"][0].is_spilled
+        assert len(pipeline.results["length"]) == 4
+
+
+def test_bad_keep_results():
+    full_config = OmegaConf.create(config_str)
+    with pytest.raises(ValueError):
+        create_pipeline().run(full_config, keep_results="some")
+    with pytest.raises(ValueError):
+        create_pipeline().run(full_config, keep_results=["no_such_step"])
@@ -0,0 +1,161 @@
+from pathlib import Path
+import tempfile
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.step import PipelineStepBase
+from pypes.base.grouped import PipelineGroupedStep
+from pypes.base.pipeline import PipelineBase
+from pypes.results.columnar import ColumnarStep
+from pypes.results.diff import diff_results
+from pypes.utils.pydantic_utils import get_fields_dict
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  ntrials: 2
+  nsentences: [1, 2]
+
+doc_stats: {}
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+
+
+class StatsOutput(StepInput):
+    count: int
+    total_length: int
+
+
+def create_pipeline() -> PipelineBase:
+    @PipelineStepBase.auto_step("doc")
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc")
+    class TruncatedDocStep:
+        def input_to_output(self, input: TruncatedDocInput, doc: DocOutput, **kwargs) -> TruncatedDocOutput:
+            sentences = doc.text.split(".")[:input.nsentences]
+            return TruncatedDocOutput(**get_fields_dict(input), text=".".join(sentences))
+
+    @PipelineGroupedStep.auto_step("doc_stats", deps_spec="truncated_doc", group_by="doc")
+    class DocStatsStep:
+        def input_to_output(self, input: StepInput, doc: DocOutput, truncated_doc: list[TruncatedDocOutput], **kwargs) -> StatsOutput:
+            return StatsOutput(
+                trial=input.trial,
+                count=len(truncated_doc),
+                total_length=sum(len(td.text) for td in truncated_doc),
+            )
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TruncatedDocStep(), DocStatsStep()])
+    return the_pipeline
+
+
+def save_run(config_str: str, results_dir: Path, **kwargs) -> PipelineBase:
+    pipeline = create_pipeline()
+    pipeline.run(OmegaConf.create(config_str), **kwargs)
+    pipeline.save_columnar_results(results_dir)
+    return pipeline
+
+
+def test_results_diff():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        save_run(config_str, tmp_dir / "old")
+        save_run(config_str, tmp_dir / "same")
+        assert diff_results(tmp_dir / "old", tmp_dir / "same").is_empty
+
+        new_config_str = config_str \
+            .replace("nsentences: [1, 2]", "nsentences: [1, 3, 2]") \
+            .replace("This is another document. It is slightly longer.", "Completely different. Text.")
+        new_pipeline = save_run(new_config_str, tmp_dir / "new")
+        diff = diff_results(tmp_dir / "old", tmp_dir / "new")
+        assert diff.to_df().loc[["doc", "truncated_doc", "doc_stats"]].values.tolist() == [
+            # added, removed, changed, unchanged
+            [0, 0, 1, 1],
+            [4, 0, 4, 4],
+            [0, 0, 2, 0],
+        ]
+
+        # the edited doc changed in place; the first doc's new truncation was added
+        doc_diff = diff.steps["doc"]
+        assert new_pipeline.results["doc"][doc_diff.changed_new[0]].output.name == "second-doc"
+        truncated_diff = diff.steps["truncated_doc"]
+        added = [new_pipeline.results["truncated_doc"][j] for j in truncated_diff.added]
+        assert sorted(fso.output.nsentences for fso in added if fso.deps["doc"].output.name == "first-doc") == [3, 3]
+        assert sum(fso.deps["doc"].output.name == "second-doc" for fso in added) == 2
+        assert all(
+            new_pipeline.results["truncated_doc"][j].deps["doc"].output.name == "second-doc"
+            for j in truncated_diff.changed_new
+        )
+
+        # lineage keys depend on the inputs and lineage only, not on the order of the results
+        old_keys = ColumnarStep(tmp_dir / "old" / "truncated_doc").lineage_keys
+        new_keys = ColumnarStep(tmp_dir / "new" / "truncated_doc").lineage_keys
+        assert len(set(old_keys.tolist()) & set(new_keys.tolist())) == 4
+
+
+def test_results_diff_missing_steps():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        save_run(config_str, tmp_dir / "old")
+        save_run(config_str, tmp_dir / "new", targets=["doc"])
+        diff = diff_results(tmp_dir / "old", tmp_dir / "new")
+        assert list(diff.steps) == ["doc", "truncated_doc", "doc_stats"]
+        assert diff.steps["doc"].is_empty
+        assert len(diff.steps["truncated_doc"].removed) == 8
+        assert len(diff_results(tmp_dir / "new", tmp_dir / "old").steps["doc_stats"].added) == 2
+
+
+class Payload:
+    # its repr holds its address, so it differs between runs
+    def __init__(self, text: str):
+        self.text = text
+
+
+class PayloadOutput(DocInput, arbitrary_types_allowed=True):
+    payload: Payload
+
+
+def test_results_diff_ignores_reprs():
+    @PipelineStepBase.auto_step("doc")
+    class PayloadStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> PayloadOutput:
+            return PayloadOutput(**get_fields_dict(input), payload=Payload(input.text))
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        for name, text in [("before", "same"), ("after", "same"), ("changed", "other")]:
+            pipeline = PipelineBase()
+            pipeline.add_steps([PayloadStep()])
+            pipeline.run(OmegaConf.create(dict(doc=[dict(name="a", text=text)])))
+            pipeline.save_columnar_results(tmp_dir / name)
+        assert diff_results(tmp_dir / "before", tmp_dir / "after").is_empty
+        assert len(diff_results(tmp_dir / "before", tmp_dir / "changed").steps["doc"].changed_new) == 1
@@ -0,0 +1,216 @@
+from pathlib import Path
+import tempfile
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.core.mytyping import GroupedFullDepsDict
+from pypes.base.step import PipelineStepBase
+from pypes.base.grouped import PipelineGroupedStep
+from pypes.base.pipeline import PipelineBase
+from pypes.results.columnar import ColumnarStep
+from pypes.results.indexes import HashIndex, SortedIndex
+from pypes.results.reader import LazyStepResults, open_results
+from pypes.results.summary import summarize
+from pypes.utils.pydantic_utils import get_fields_dict
+
+import pytest
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  ntrials: 2
+  nsentences: [1, 2]
+
+doc_stats: {}
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+    tags: list[str]
+
+
+class StatsOutput(StepInput):
+    count: int
+    total_length: int
+
+
+def create_pipeline() -> PipelineBase:
+    @PipelineStepBase.auto_step("doc")
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc")
+    class TruncatedDocStep:
+        def input_to_output(self, input: TruncatedDocInput, doc: DocOutput, **kwargs) -> TruncatedDocOutput:
+            sentences = doc.text.split(".")[:input.nsentences]
+            return TruncatedDocOutput(**get_fields_dict(input), text=".".join(sentences), tags=[doc.name])
+
+    @PipelineGroupedStep.auto_step("doc_stats", deps_spec="truncated_doc", group_by="doc")
+    class DocStatsStep:
+        def input_to_output(self, input: StepInput, doc: DocOutput, truncated_doc: list[TruncatedDocOutput], **kwargs) -> StatsOutput:
+            return StatsOutput(
+                trial=input.trial,
+                count=len(truncated_doc),
+                total_length=sum(len(td.text) for td in truncated_doc),
+            )
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TruncatedDocStep(), DocStatsStep()])
+    return the_pipeline
+
+
+def test_results_reader():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        results_dir = Path(tmpdirname) / "columnar"
+        pipeline = create_pipeline()
+        pipeline.run(OmegaConf.create(config_str))
+        pipeline.save_columnar_results(results_dir)
+        expected = pipeline.results
+
+        reader = open_results(results_dir)
+        assert list(reader.keys()) == ["doc", "truncated_doc", "doc_stats"]
+        truncated = reader["truncated_doc"]
+        assert isinstance(truncated, LazyStepResults)
+        assert len(truncated) == 8
+        assert reader.step("truncated_doc")._columns == {}
+
+        # predicates are answered from the indexes, without reading the columns
+        selected = truncated.where(trial=1, nsentences=[2, 3], text=[fso.output.text for fso in expected["truncated_doc"]])
+        assert list(selected.row_indices) == [i for i, fso in enumerate(expected["truncated_doc"]) if fso.output.trial == 1 and fso.output.nsentences == 2]
+        assert reader.step("truncated_doc")._columns == {}
+        assert [fso.output for fso in selected] == [expected["truncated_doc"][i].output for i in selected.row_indices]
+        assert len(truncated.where(tags=[["second-doc"]])) == 4
+        assert len(truncated.where(trial=5, text="anything")) == 0
+
+        # each row has a single lazy FullStepOutput, shared by the lineage of its descendants
+        fso = truncated[-1]
+        assert fso is truncated[7]
+        assert fso.is_spilled
+        assert fso.output == expected["truncated_doc"][-1].output
+        assert fso.deps["doc"] is reader["doc"][1]
+        stats = reader["doc_stats"][0]
+        assert isinstance(stats.deps, GroupedFullDepsDict)
+        assert all(member["doc"] is stats.deps["doc"] for member in stats.deps.members)
+        assert any(member["truncated_doc"] is truncated[0] for member in stats.deps.members)
+
+        # column projection
+        projected = truncated[2:6].select("trial", "text")
+        assert len(projected) == 4
+        output = projected[0].output
+        assert output.text == expected["truncated_doc"][2].output.text
+        assert "tags" not in output.model_fields_set
+        df = projected.to_df()
+        assert list(df.columns) == ["trial", "text"]
+        assert list(df.index) == [2, 3, 4, 5]
+        with pytest.raises(KeyError):
+            truncated.select("nothing")
+        with pytest.raises(KeyError):
+            truncated.where(nothing=1)
+        with pytest.raises(IndexError):
+            truncated[8]
+
+        materialized = reader.materialize()
+        assert [fso.output for fso in materialized["doc_stats"]] == [fso.output for fso in expected["doc_stats"]]
+
+
+def test_results_reader_without_indexes():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        results_dir = Path(tmpdirname) / "columnar"
+        pipeline = create_pipeline()
+        pipeline.run(OmegaConf.create(config_str))
+        pipeline.save_columnar_results(results_dir)
+        step = ColumnarStep(results_dir / "truncated_doc")
+        assert step.meta["indexes"] == dict(trial="sorted", nsentences="sorted", text="hash")
+
+        reader = open_results(results_dir)
+        indexed = reader["truncated_doc"]
+        scanned = reader["truncated_doc"]
+        scanned.step = step
+        step.meta.pop("indexes")
+        for conditions in [dict(nsentences=2), dict(text="This is my first document"), dict(trial=0, nsentences=[1])]:
+            assert len(indexed.where(**conditions)) > 0
+            assert list(scanned.where(**conditions).row_indices) == list(indexed.where(**conditions).row_indices)
+        assert set(step._columns) == {"trial", "nsentences"}
+        assert list(scanned.between("nsentences", 2, 5).row_indices) == list(indexed.between("nsentences", 2, 5).row_indices) \
+            == [i for i, fso in enumerate(pipeline.results["truncated_doc"]) if fso.output.nsentences == 2]
+        with pytest.raises(KeyError):
+            scanned.between("text", 0, 1)
+
+
+def test_lazy_summary():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        results_dir = Path(tmpdirname) / "columnar"
+        pipeline = create_pipeline()
+        pipeline.run(OmegaConf.create(config_str))
+        pipeline.save_columnar_results(results_dir)
+
+        truncated = open_results(results_dir)["truncated_doc"]
+        summary = truncated.summarize("nsentences")
+        assert list(summary.index) == [1, 2]
+        assert list(summary["count"]) == [4, 4]
+        assert "len(tags) mean" not in summary.columns
+        texts = [fso.output.text for fso in pipeline.results["truncated_doc"] if fso.output.nsentences == 2]
+        assert summary.loc[2, "len(text) max"] == max(map(len, texts))
+        assert summary.loc[2, "len(text) mean"] == pytest.approx(np.mean([len(text) for text in texts]))
+
+        # string fields come from their codes, matching a summary of the decoded frame
+        view = truncated.where(trial=1).select("trial", "text")
+        assert_frame_equal(view.summarize(), summarize(view.to_df()))
+        with pytest.raises(KeyError):
+            truncated.summarize("nothing")
+
+        # the frame summaries are built from: strings as categoricals, object fields left out unless kept
+        df = truncated.to_scalar_df()
+        assert isinstance(df["text"].dtype, pd.CategoricalDtype)
+        assert "tags" not in df.columns
+        assert list(df["text"]) == [fso.output.text for fso in pipeline.results["truncated_doc"]]
+        assert "tags" in truncated.to_scalar_df("tags").columns
+
+
+def test_column_indexes():
+    index = HashIndex.build(["a", "b", "c"], np.array([1, 0, 1, 2, 1], dtype=np.int32))
+    assert list(index.lookup(["b"])) == [0, 2, 4]
+    assert list(index.lookup(["c", "a", "missing", 3])) == [1, 3]
+
+    index = SortedIndex.build(np.array([3.0, 1.0, 2.0, 1.0]))
+    assert list(index.lookup([1])) == [1, 3]
+    assert list(index.lookup([2.0, 5, "x"])) == [2]
+    assert list(index.between(1.5, 3.0)) == [0, 2]
+
+
+def test_open_results_requires_columnar():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        dill_path = Path(tmpdirname) / "results.dill"
+        pipeline = create_pipeline()
+        pipeline.run(OmegaConf.create(config_str), targets=["doc"])
+        pipeline.save_results(dill_path)
+        with pytest.raises(ValueError):
+            open_results(dill_path)
@@ -0,0 +1,145 @@
+from pathlib import Path
+import tempfile
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.core.mytyping import GroupedFullDepsDict
+from pypes.base.step import PipelineStepBase
+from pypes.base.grouped import PipelineGroupedStep
+from pypes.base.pipeline import PipelineBase
+from pypes.results.stream import ResultsSink, ResultsTail, read_step_index, read_streamed_results
+from pypes.utils.pydantic_utils import get_fields_dict
+
+import pytest
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  ntrials: 2
+  nsentences: [1, 2]
+
+doc_stats: {}
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+
+
+class StatsOutput(StepInput):
+    count: int
+    total_length: int
+
+
+def create_pipeline(fail_on: str|None = None) -> PipelineBase:
+    @PipelineStepBase.auto_step("doc")
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc")
+    class TruncatedDocStep:
+        def input_to_output(self, input: TruncatedDocInput, doc: DocOutput, **kwargs) -> TruncatedDocOutput:
+            if doc.name == fail_on:
+                raise RuntimeError("interrupted")
+            sentences = doc.text.split(".")[:input.nsentences]
+            return TruncatedDocOutput(**get_fields_dict(input), text=".".join(sentences))
+
+    @PipelineGroupedStep.auto_step("doc_stats", deps_spec="truncated_doc", group_by="doc")
+    class DocStatsStep:
+        def input_to_output(self, input: StepInput, doc: DocOutput, truncated_doc: list[TruncatedDocOutput], **kwargs) -> StatsOutput:
+            return StatsOutput(
+                trial=input.trial,
+                count=len(truncated_doc),
+                total_length=sum(len(td.text) for td in truncated_doc),
+            )
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TruncatedDocStep(), DocStatsStep()])
+    return the_pipeline
+
+
+def test_results_stream():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        results_dir = Path(tmpdirname) / "stream"
+        pipeline = create_pipeline()
+        tail = ResultsTail(results_dir)
+        seen: list[tuple[str, int]] = []
+
+        @pipeline.hooks.on("on_input_end")
+        def follow(step_name: str, **kwargs) -> None:
+            # with flush_every=1, each output is readable as soon as it is produced,
+            # i.e. from the end of the following input on
+            new_outputs = tail.poll()
+            seen.extend((name, len(fsos)) for name, fsos in new_outputs.items() if fsos)
+
+        pipeline.run(OmegaConf.create(config_str), sink=ResultsSink(results_dir, flush_every=1))
+        assert seen[:2] == [("doc", 1), ("doc", 1)]
+        assert sum(count for name, count in seen if name == "truncated_doc") == 8
+        assert sum(count for name, count in seen if name == "doc_stats") == 1
+
+        assert {name: len(fsos) for name, fsos in tail.poll().items()} == dict(doc_stats=1)
+        assert tail.complete_steps == {"doc", "truncated_doc", "doc_stats"}
+        results = read_streamed_results(results_dir)
+        for tailed in [tail.results, results]:
+            assert list(tailed.keys()) == ["doc", "truncated_doc", "doc_stats"]
+            for step_name, fsos in pipeline.results.items():
+                assert [fso.output for fso in tailed[step_name]] == [fso.output for fso in fsos]
+
+        docs = results["doc"]
+        for fso in results["truncated_doc"]:
+            assert any(fso.deps["doc"] is doc for doc in docs)
+        for fso in results["doc_stats"]:
+            assert isinstance(fso.deps, GroupedFullDepsDict)
+            assert len(fso.deps.members) == 4
+            assert all(member["doc"] is fso.deps["doc"] for member in fso.deps.members)
+
+        assert len(read_step_index(results_dir / "truncated_doc.seg")) == 8
+
+        # a new run starts from empty logs
+        create_pipeline().run(OmegaConf.create(config_str), targets=["doc"], sink=ResultsSink(results_dir))
+        assert list(read_streamed_results(results_dir).keys()) == ["doc"]
+        assert not (results_dir / "truncated_doc.seg").exists()
+
+
+def test_results_stream_crash():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        results_dir = Path(tmpdirname) / "stream"
+        pipeline = create_pipeline(fail_on="second-doc")
+        with pytest.raises(RuntimeError):
+            pipeline.run(OmegaConf.create(config_str), sink=ResultsSink(results_dir, flush_every=1000))
+
+        # a torn record at the end is ignored
+        with open(results_dir / "truncated_doc.seg", 'ab') as f:
+            f.write(b"\x40\x00\x00")
+
+        tail = ResultsTail(results_dir)
+        tail.poll()
+        assert tail.complete_steps == {"doc"}
+        assert len(tail.results["doc"]) == 2
+        assert [fso.deps["doc"].output.name for fso in tail.results["truncated_doc"]] == ["first-doc"] * 4
+        assert read_step_index(results_dir / "doc.seg") is not None
+        assert read_step_index(results_dir / "truncated_doc.seg") is None
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from pypes.results.summary import as_categories, groupable_fields, summarize
+
+import pytest
+
+
+def create_df(n: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    texts = np.array(["", "a", "bb", "ccc", "dddd", "a longer text"], dtype=object)
+    df = pd.DataFrame(dict(
+        model=rng.choice(["small", "large"], n).astype(object),
+        prompt_version=rng.integers(0, 3, n),
+        score=rng.random(n),
+        ok=rng.random(n) > 0.5,
+        text=texts[rng.integers(0, len(texts), n)],
+        extra=[dict(i=i) for i in range(n)],
+    ))
+    df.loc[3, "text"] = None
+    df.loc[4, "score"] = np.nan
+    return df
+
+
+def reference_summary(df: pd.DataFrame, by: list[str]) -> pd.DataFrame:
+    lengths = df.text.str.len()
+    grouped = pd.DataFrame(dict(score=df.score, ok=df.ok.astype(float), length=lengths)).groupby([df[name] for name in by])
+    return pd.DataFrame({
+        "count": grouped.size(),
+        "score mean": grouped.score.mean(),
+        "ok mean": grouped.ok.mean(),
+        "len(text) mean": grouped.length.mean(),
+        "len(text) p50": grouped.length.quantile(0.5, interpolation="lower"),
+        "len(text) max": grouped.length.max(),
+    })
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_summarize(categorical: bool):
+    df = create_df()
+    if categorical:
+        df = as_categories(df)
+        assert isinstance(df.text.dtype, pd.CategoricalDtype)
+
+    summary = summarize(df, ["model", "prompt_version"])
+    expected = reference_summary(create_df(), ["model", "prompt_version"])
+    assert list(summary.index) == list(expected.index)
+    assert summary.index.names == ["model", "prompt_version"]
+    assert "extra mean" not in summary.columns
+    assert "len(model) mean" not in summary.columns
+    pd.testing.assert_frame_equal(summary[expected.columns], expected, check_dtype=False, check_names=False)
+
+    overall = summarize(df)
+    assert len(overall) == 1
+    assert overall.loc[0, "count"] == len(df)
+    assert overall.loc[0, "len(model) max"] == len("small")
+
+
+def test_summarize_edge_cases():
+    df = create_df()
+    # one group per row: the lengths are sorted within groups instead of counted
+    by_id = summarize(df.assign(uid=np.arange(len(df))), ["uid"])
+    lengths = df.text.str.len().to_numpy()
+    np.testing.assert_array_equal(by_id["len(text) p90"].to_numpy(), lengths)
+    np.testing.assert_array_equal(by_id["len(text) max"].to_numpy(), lengths)
+
+    empty = summarize(df.iloc[:0], ["model"])
+    assert len(empty) == 0
+    assert summarize(df.iloc[:0]).loc[0, "count"] == 0
+
+    with pytest.raises(KeyError):
+        summarize(df, ["nothing"])
+    assert groupable_fields(df, max_groups=10) == ["model", "prompt_version", "ok", "text"]
@@ -0,0 +1,216 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+
+import dill
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.core.mytyping import ResultsSpec
+from pypes.base.step import PipelineStepBase
+from pypes.base.grouped import PipelineGroupedStep
+from pypes.base.pipeline import PipelineBase
+from pypes.utils.hashing import stable_hash
+from pypes.utils.pydantic_utils import get_fields_dict
+from pypes.utils.sharding import shard_of, merge_shard_results
+
+import pytest
+
+
+config_str = """
+doc:
+  name: [doc-a, doc-b, doc-c, doc-d, doc-e, doc-f, doc-g, doc-h]
+
+style:
+  style: [plain, fancy]
+
+rendered_doc:
+  ntrials: 2
+
+styled_doc: {}
+
+doc_count: {}
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+
+class DocOutput(DocInput):
+    pass
+
+@PipelineStepBase.auto_step("doc")
+class DocStep:
+    def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+        return DocOutput(**get_fields_dict(input))
+
+
+class StyleInput(StepInput):
+    style: str
+
+class StyleOutput(StyleInput):
+    pass
+
+@PipelineStepBase.auto_step("style")
+class StyleStep:
+    def input_to_output(self, input: StyleInput, **kwargs) -> StyleOutput:
+        return StyleOutput(**get_fields_dict(input))
+
+
+class RenderedDocOutput(StepInput):
+    text: str
+
+@PipelineStepBase.auto_step("rendered_doc", deps_spec="doc")
+class RenderedDocStep:
+    def input_to_output(self, input: StepInput, doc: DocOutput, **kwargs) -> RenderedDocOutput:
+        return RenderedDocOutput(trial=input.trial, text=f"{doc.name}/{input.trial}")
+
+
+@PipelineStepBase.auto_step("styled_doc", deps_spec=["rendered_doc", "style"])
+class StyledDocStep:
+    def input_to_output(self, input: StepInput, rendered_doc: RenderedDocOutput, style: StyleOutput, **kwargs) -> RenderedDocOutput:
+        return RenderedDocOutput(trial=input.trial, text=f"{rendered_doc.text}/{style.style}")
+
+
+class CountOutput(StepInput):
+    count: int
+
+@PipelineGroupedStep.auto_step("doc_count", deps_spec="rendered_doc", group_by="doc")
+class DocCountStep:
+    def input_to_output(self, input: StepInput, doc: DocOutput, rendered_doc: list[RenderedDocOutput], **kwargs) -> CountOutput:
+        return CountOutput(trial=input.trial, count=len(rendered_doc))
+
+
+class StyleCountOutput(StepInput):
+    count: int
+
+@PipelineGroupedStep.auto_step("style_count", deps_spec="styled_doc", group_by="style")
+class StyleCountStep:
+    def input_to_output(self, input: StepInput, style: StyleOutput, styled_doc: list[RenderedDocOutput], **kwargs) -> StyleCountOutput:
+        return StyleCountOutput(trial=input.trial, count=len(styled_doc))
+
+
+def create_pipeline() -> PipelineBase:
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps(
+        [
+            DocStep(),
+            StyleStep(),
+            RenderedDocStep(),
+            StyledDocStep(),
+            DocCountStep(),
+        ],
+    )
+    return the_pipeline
+
+
+def outputs_by_step(results: ResultsSpec) -> dict[str, list]:
+    return {
+        step_name: sorted(repr(fso.output) for fso in step_results)
+        for step_name, step_results in results.items()
+    }
+
+
+def test_shard_of():
+    assert shard_of("dummy", 3) == shard_of("dummy", 3)
+    assert {shard_of(f"dummy-{i}", 3) for i in range(100)} == {0, 1, 2}
+
+    # pydantic inputs are assigned from their fields, whatever the process
+    assert shard_of(DocInput(trial=0, name="doc-a"), 3) == shard_of(DocInput(trial=0, name="doc-a"), 3)
+    assert shard_of(DocInput(trial=0, name="doc-a"), 1000) == int(stable_hash(DocInput(trial=0, name="doc-a")), 16) % 1000
+    assert {shard_of(DocInput(trial=0, name=f"doc-{i}"), 3) for i in range(100)} == {0, 1, 2}
+
+    code = (
+        "from pydantic import BaseModel\n"
+        "from pypes.utils.sharding import shard_of\n"
+        "class DocInput(BaseModel, frozen=True):\n"
+        "    trial: int\n"
+        "    name: str\n"
+        "print([shard_of(DocInput(trial=0, name=f'doc-{i}'), 7) for i in range(20)])\n"
+    )
+    shards = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True, text=True, check=True,
+        ).stdout
+        for seed in ["1", "2"]
+    }
+    assert len(shards) == 1
+
+
+def test_sharded_runs_merge_to_full_run():
+    full_config = OmegaConf.create(config_str)
+
+    full_pipeline = create_pipeline()
+    full_pipeline.run(full_config)
+
+    num_shards = 3
+    shard_results = []
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        for shard_index in range(num_shards):
+            pipeline = create_pipeline()
+            pipeline.run(full_config, shard_index=shard_index, num_shards=num_shards)
+            assert pipeline.shard_step == "doc"
+            # unsharded steps are computed in full on every shard
+            assert len(pipeline.results["style"]) == 2
+            dill_path = Path(tmpdirname) / f"results.shard-{shard_index}.dill"
+            pipeline.save_results(dill_path=dill_path)
+            with open(dill_path, 'rb') as fdill:
+                shard_results.append(dill.load(fdill))
+
+    assert sum(len(results["doc"]) for results in shard_results) == len(full_pipeline.results["doc"])
+
+    merged = merge_shard_results(shard_results)
+    assert outputs_by_step(merged) == outputs_by_step(full_pipeline.results)
+
+    # the lineage of every merged output points at outputs of the merged results
+    ids_by_step = {
+        step_name: {id(fso) for fso in step_results}
+        for step_name, step_results in merged.items()
+    }
+    for step_results in merged.values():
+        for fso in step_results:
+            for label, upstream in fso.deps.items():
+                assert id(upstream) in ids_by_step[label]
+
+
+def test_bad_shards():
+    full_config = OmegaConf.create(config_str)
+    pipeline = create_pipeline()
+    with pytest.raises(ValueError):
+        pipeline.run(full_config, shard_index=3, num_shards=3)
+    with pytest.raises(ValueError):
+        pipeline.run(full_config, num_shards=2, shard_step="rendered_doc")
+    with pytest.raises(ValueError):
+        pipeline.run(full_config, num_shards=2, shard_step="unknown")
+    with pytest.raises(ValueError):
+        merge_shard_results([])
+
+
+def test_merge_groups_spanning_shards():
+    full_config = OmegaConf.create(config_str)
+    full_config.style_count = {}
+
+    shard_results = []
+    for shard_index in range(2):
+        pipeline = create_pipeline()
+        pipeline.add_step(StyleCountStep())
+        pipeline.run(full_config, shard_index=shard_index, num_shards=2)
+        shard_results.append(pipeline.results)
+
+    # each shard only counted its own docs for every style
+    with pytest.raises(ValueError):
+        merge_shard_results(shard_results)
+    merged = merge_shard_results([
+        {step_name: step_results for step_name, step_results in results.items() if step_name != "style_count"}
+        for results in shard_results
+    ])
+    assert len(merged["styled_doc"]) == 8 * 2 * 2
@@ -0,0 +1,150 @@
+from pathlib import Path
+import tempfile
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.step import PipelineStepBase
+from pypes.base.pipeline import PipelineBase
+from pypes.results.spill import SpilledStepList, SpillingResults, SpillStore
+from pypes.utils.pydantic_utils import get_fields_dict
+
+import pytest
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  ntrials: 2
+  nsentences: [1, 2]
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+
+
+def create_pipeline(results: SpillingResults|None = None) -> PipelineBase:
+    @PipelineStepBase.auto_step("doc")
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc")
+    class TruncatedDocStep:
+        def input_to_output(self, input: TruncatedDocInput, doc: DocOutput, **kwargs) -> TruncatedDocOutput:
+            sentences = doc.text.split(".")[:input.nsentences]
+            return TruncatedDocOutput(
+                **get_fields_dict(input),
+                text=".".join(sentences),
+            )
+
+    the_pipeline = PipelineBase(results=results)
+    the_pipeline.add_steps([DocStep(), TruncatedDocStep()])
+    return the_pipeline
+
+
+def test_spilling_results():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        full_config = OmegaConf.create(config_str)
+
+        reference = create_pipeline()
+        reference.run(full_config)
+
+        results = SpillingResults(tmp_dir / "spill", cache_size=2)
+        pipeline = create_pipeline(results)
+        pipeline.run(full_config)
+        assert pipeline.results is results
+        seg_path = results.store_for("truncated_doc").fpath
+        assert seg_path.exists() and seg_path.parent.parent == tmp_dir / "spill"
+
+        for step_name in ["doc", "truncated_doc"]:
+            assert all(fso.is_spilled for fso in results[step_name])
+            assert [fso.output for fso in results[step_name]] \
+                == [fso.output for fso in reference.results[step_name]]
+            assert len(results.store_for(step_name)._cache) <= 2
+        for fso in results["truncated_doc"]:
+            assert any(fso.deps["doc"] is fso_doc for fso_doc in results["doc"])
+
+        dill_path = tmp_dir / "results.dill"
+        pipeline.save_results(dill_path=dill_path)
+        loaded = PipelineBase.load_results(dill_path)
+        assert type(loaded) is dict
+        assert type(loaded["truncated_doc"]) is list
+        assert not any(fso.is_spilled for fso in loaded["truncated_doc"])
+        assert [fso.output for fso in loaded["truncated_doc"]] \
+            == [fso.output for fso in reference.results["truncated_doc"]]
+
+
+def test_spill_store_reads_after_growth():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        store = SpillStore(Path(tmpdirname) / "step.seg", cache_size=0)
+        first = store.put(dict(index=0))
+        assert first.load() == dict(index=0)
+        refs = [store.put(dict(index=i)) for i in range(1, 100)]
+        assert [ref.load()["index"] for ref in refs] == list(range(1, 100))
+        store.close()
+        assert store._mmap is None
+        assert first.load() == dict(index=0)
+        store.close()
+        assert store._mmap is None
+
+
+def test_spill_store_refuses_existing_file():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        fpath = Path(tmpdirname) / "step.seg"
+        store = SpillStore(fpath)
+        ref = store.put(dict(index=0))
+        with pytest.raises(FileExistsError):
+            SpillStore(fpath)
+        assert ref.load() == dict(index=0)
+
+
+def test_spilling_results_mutations():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        spill_dir = Path(tmpdirname) / "spill"
+        full_config = OmegaConf.create(config_str)
+        reference = create_pipeline()
+        reference.run(full_config)
+        fsos = reference.results["truncated_doc"]
+
+        # results sharing a spill dir don't overwrite each other's payloads
+        first, second = SpillingResults(spill_dir), SpillingResults(spill_dir)
+        first["doc"] = reference.results["doc"][:1]
+        second["doc"] = reference.results["doc"][1:]
+        assert first["doc"][0].output == reference.results["doc"][0].output
+
+        results = SpillingResults(spill_dir)
+        results.update(truncated_doc=[])
+        results.setdefault("other", [])
+        results |= dict(more=[])
+        step_results = results["truncated_doc"]
+        step_results += fsos[:2]
+        step_results.insert(0, fsos[2])
+        step_results[1] = fsos[3]
+        step_results[2:] = fsos[4:6]
+        assert step_results == [fsos[2], fsos[3], fsos[4], fsos[5]]
+        assert all(fso.is_spilled for fso in fsos[2:6])
+        assert all(isinstance(results[step_name], SpilledStepList) for step_name in ["other", "more"])
@@ -0,0 +1,133 @@
+from pathlib import Path
+import tempfile
+
+from omegaconf import OmegaConf
+from pydantic import BaseModel
+
+from pypes.base.step import PipelineStepBase
+from pypes.base.pipeline import PipelineBase
+from pypes.utils.pydantic_utils import get_fields_dict
+
+
+config_str = """
+doc:
+  - name: first-doc
+    text: "This is my first document. It is short."
+  - name: second-doc
+    text: "This is another document. It is slightly longer."
+
+truncated_doc:
+  nsentences: [1, 2]
+
+"""
+
+
+class StepInput(BaseModel, frozen=True):
+    trial: int
+
+
+class DocInput(StepInput):
+    name: str
+    text: str
+
+class DocOutput(DocInput):
+    pass
+
+
+class TruncatedDocInput(StepInput):
+    nsentences: int
+
+class TruncatedDocOutput(TruncatedDocInput):
+    text: str
+
+
+def create_pipeline(calls: dict[str, int], truncated_doc_version: str = "v1") -> PipelineBase:
+    @PipelineStepBase.auto_step("doc", cache_outputs=True)
+    class DocStep:
+        def input_to_output(self, input: DocInput, **kwargs) -> DocOutput:
+            calls["doc"] += 1
+            return DocOutput(**get_fields_dict(input))
+
+    @PipelineStepBase.auto_step("truncated_doc", deps_spec="doc", cache_outputs=True, code_version=truncated_doc_version)
+    class TruncatedDocStep:
+        def input_to_output(self, input: TruncatedDocInput, doc: DocOutput, **kwargs) -> TruncatedDocOutput:
+            calls["truncated_doc"] += 1
+            sentences = doc.text.split(".")[:input.nsentences]
+            return TruncatedDocOutput(
+                **get_fields_dict(input),
+                text=".".join(sentences),
+            )
+
+    the_pipeline = PipelineBase()
+    the_pipeline.add_steps([DocStep(), TruncatedDocStep()])
+    return the_pipeline
+
+
+def run(full_config, truncated_doc_version: str = "v1") -> tuple[PipelineBase, dict[str, int]]:
+    calls = dict(doc=0, truncated_doc=0)
+    pipeline = create_pipeline(calls, truncated_doc_version=truncated_doc_version)
+    pipeline.run(full_config)
+    return pipeline, calls
+
+
+def test_step_output_cache():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tmp_dir = Path(tmpdirname)
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(cache_base_dir=str(tmp_dir))
+
+        first_pipeline, calls = run(full_config)
+        assert calls == dict(doc=2, truncated_doc=4)
+        assert len(list((tmp_dir / "truncated_doc/base/_step_outputs").glob("*.dill"))) == 4
+
+        second_pipeline, calls = run(full_config)
+        assert calls == dict(doc=0, truncated_doc=0)
+        for step_name in ["doc", "truncated_doc"]:
+            assert [fso.output for fso in second_pipeline.results[step_name]] \
+                == [fso.output for fso in first_pipeline.results[step_name]]
+
+        # a new code version invalidates only that step
+        _, calls = run(full_config, truncated_doc_version="v2")
+        assert calls == dict(doc=0, truncated_doc=4)
+
+        # changed upstream outputs invalidate the downstream rows that depend on them
+        full_config.doc[1].text = "This is a changed document. It is new."
+        _, calls = run(full_config)
+        assert calls == dict(doc=1, truncated_doc=2)
+
+
+class Sentences:
+    # a plain object: not hashable by `myhash`, and its repr holds its address
+    def __init__(self, sentences: list[str]):
+        self.sentences = sentences
+
+
+class FirstSentenceOutput(StepInput):
+    text: str
+
+
+def test_step_output_cache_with_plain_object_outputs():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        full_config = OmegaConf.create(config_str)
+        full_config.pipeline = dict(cache_base_dir=tmpdirname)
+        calls = dict(sentences=0, first_sentence=0)
+
+        @PipelineStepBase.auto_step("sentences", deps_spec="doc")
+        class SentencesStep:
+            def input_to_output(self, input: StepInput, doc: DocOutput, **kwargs) -> Sentences:
+                calls["sentences"] += 1
+                return Sentences(doc.text.split("."))
+
+        @PipelineStepBase.auto_step("first_sentence", deps_spec="sentences", cache_outputs=True)
+        class FirstSentenceStep:
+            def input_to_output(self, input: StepInput, sentences: Sentences, **kwargs) -> FirstSentenceOutput:
+                calls["first_sentence"] += 1
+                return FirstSentenceOutput(trial=input.trial, text=sentences.sentences[0])
+
+        for expected_calls in [2, 0]:
+            pipeline = create_pipeline(dict(doc=0, truncated_doc=0))
+            pipeline.add_steps([SentencesStep(), FirstSentenceStep()])
+            pipeline.run(OmegaConf.merge(full_config, dict(sentences={}, first_sentence={})))
+            assert calls["first_sentence"] == expected_calls
+            calls["first_sentence"] = 0
+        assert [fso.output.text for fso in pipeline.results["first_sentence"]] == ["This is my first document", "This is another document"]